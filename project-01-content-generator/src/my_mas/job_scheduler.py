@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Content Generation Job Scheduler
+Runs generation jobs with bounded concurrency, a bounded queue and round-robin fairness across clients
+"""
+
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional, Set, Tuple
+
+
+class SchedulerFull(Exception):
+    """Raised when a job can't be queued; retry_after is a hint in seconds"""
+
+    def __init__(self, message: str, retry_after: int = 30):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class JobScheduler:
+    """
+    Admission control and dispatch for content generation jobs
+
+    - at most max_concurrency jobs run at once (CONTENT_MAX_CONCURRENT_JOBS)
+    - up to max_queue more wait (CONTENT_MAX_QUEUED_JOBS), at most
+      max_queued_per_client of them from one client
+      (CONTENT_MAX_QUEUED_PER_CLIENT); beyond that submit() raises SchedulerFull
+    - waiting jobs are dispatched round-robin across clients, so a client
+      that submits a burst doesn't starve everyone queued behind it
+    """
+
+    def __init__(self, max_concurrency: Optional[int] = None, max_queue: Optional[int] = None,
+                 max_queued_per_client: Optional[int] = None):
+        self.max_concurrency = max_concurrency or int(os.environ.get("CONTENT_MAX_CONCURRENT_JOBS", "2"))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get("CONTENT_MAX_QUEUED_JOBS", "20"))
+        self.max_queued_per_client = max_queued_per_client or int(
+            os.environ.get("CONTENT_MAX_QUEUED_PER_CLIENT", "5")
+        )
+
+        # client id -> its waiting (job id, job) pairs; _rotation holds the
+        # clients with waiting jobs in dispatch order
+        self._queues: Dict[str, Deque[Tuple[str, Callable[[], Awaitable]]]] = {}
+        self._rotation: Deque[str] = deque()
+        self._queued = 0
+        self._running = 0
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self._tasks: Set[asyncio.Task] = set()
+
+        # Counters for monitoring
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def submit(self, job_id: str, client_id: str, job: Callable[[], Awaitable]) -> int:
+        """
+        Queue a job; job() is awaited once a slot is free
+
+        Returns:
+            The job's 1-based position in the queue
+
+        Raises:
+            SchedulerFull: If the queue, or this client's share of it, is full
+        """
+        if self._queued >= self.max_queue:
+            self.rejected += 1
+            raise SchedulerFull(f"{self._queued} jobs are already queued, try again later")
+        queue = self._queues.get(client_id)
+        if queue is not None and len(queue) >= self.max_queued_per_client:
+            self.rejected += 1
+            raise SchedulerFull(f"You already have {len(queue)} jobs queued, wait for them to start")
+
+        if queue is None:
+            queue = self._queues[client_id] = deque()
+            self._rotation.append(client_id)
+        queue.append((job_id, job))
+        self._queued += 1
+        if self._ready is not None:
+            self._ready.set()
+        return self.position(job_id)
+
+    def _next(self) -> Tuple[str, Callable[[], Awaitable]]:
+        client_id = self._rotation.popleft()
+        queue = self._queues[client_id]
+        item = queue.popleft()
+        if queue:
+            self._rotation.append(client_id)
+        else:
+            del self._queues[client_id]
+        self._queued -= 1
+        return item
+
+    def position(self, job_id: str) -> Optional[int]:
+        """
+        1-based position in the dispatch order, or None if the job isn't queued
+
+        Dispatch takes one job per client per round in rotation order, so a
+        job k deep in its client's queue waits for k + 1 jobs of each client
+        ahead of its client in the rotation and k jobs of each client after it.
+        """
+        for rank, client_id in enumerate(self._rotation):
+            queue = self._queues[client_id]
+            for depth, (queued_id, _) in enumerate(queue):
+                if queued_id != job_id:
+                    continue
+                ahead = depth
+                for other_rank, other_id in enumerate(self._rotation):
+                    if other_id != client_id:
+                        ahead += min(len(self._queues[other_id]), depth + (other_rank < rank))
+                return ahead + 1
+        return None
+
+    async def _run(self, job_id: str, job: Callable[[], Awaitable]):
+        try:
+            await job()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            print(f"Job {job_id} failed: {e}")
+        finally:
+            self._running -= 1
+            self._slots.release()
+
+    async def _dispatch(self):
+        while True:
+            await self._slots.acquire()
+            while not self._rotation:
+                self._ready.clear()
+                await self._ready.wait()
+            job_id, job = self._next()
+            self._running += 1
+            task = asyncio.create_task(self._run(job_id, job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def start(self):
+        """Start dispatching (must be called from the event loop)"""
+        if self._dispatcher is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._ready = asyncio.Event()
+            if self._rotation:
+                self._ready.set()
+            self._dispatcher = asyncio.create_task(self._dispatch())
+
+    async def stop(self):
+        """Stop dispatching and cancel running jobs"""
+        if self._dispatcher is not None:
+            self._dispatcher.cancel()
+            self._dispatcher = None
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "running": self._running,
+            "queued": self._queued,
+            "queued_clients": len(self._rotation),
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
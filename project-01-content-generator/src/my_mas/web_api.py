@@ -4,13 +4,15 @@ FastAPI Web Layer for Content Generator
 Provides REST API and WebSocket endpoints for the CrewAI content generation system
 """
 
-from fastapi import FastAPI, WebSocket, HTTPException, BackgroundTasks
+from fastapi import FastAPI, WebSocket, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Union
 import asyncio
+import time
 import uuid
 import json
+import ipaddress
 from datetime import datetime
 import os
 from pathlib import Path
@@ -18,6 +20,7 @@ from urllib.parse import urlparse
 from dotenv import load_dotenv
 
 from my_mas.crew import ContentGeneratorCrew
+from my_mas.job_scheduler import JobScheduler, SchedulerFull
 import httpx
 
 # Load .env file without overriding existing environment variables
@@ -73,8 +76,66 @@ app.add_middleware(
 jobs: Dict[str, Dict] = {}
 active_connections: Dict[str, WebSocket] = {}
 
-async def validate_api_keys() -> Dict[str, bool]:
-    """Validate OpenAI API key and return status"""
+# Generation jobs run through a bounded, per-client fair scheduler
+job_scheduler = JobScheduler()
+
+
+def _parse_trusted_proxies(raw_proxies: str) -> List[Union[ipaddress.IPv4Network, ipaddress.IPv6Network]]:
+    """Parse CONTENT_TRUSTED_PROXIES (comma-separated addresses or CIDR ranges)"""
+    networks = []
+    for candidate in (proxy.strip() for proxy in raw_proxies.split(",")):
+        if not candidate:
+            continue
+        try:
+            networks.append(ipaddress.ip_network(candidate, strict=False))
+        except ValueError:
+            print(f"Ignoring invalid CONTENT_TRUSTED_PROXIES entry: {candidate}")
+    return networks
+
+
+# Reverse proxies whose X-Forwarded-For header is believed (none by default)
+trusted_proxies = _parse_trusted_proxies(os.environ.get("CONTENT_TRUSTED_PROXIES", ""))
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in network for network in trusted_proxies)
+
+
+def client_key(http_request: Request) -> str:
+    """
+    Identify the caller for per-client queue limits from what the server controls
+
+    That is the connection's peer address, or, when the peer is a trusted
+    proxy, the last X-Forwarded-For hop that isn't one. Headers a client
+    sets itself are ignored, so it can't take more than its share of the
+    queue by varying them.
+    """
+    peer = http_request.client.host if http_request.client else None
+    if peer is None:
+        return "anonymous"
+    if _is_trusted_proxy(peer):
+        hops = [hop.strip() for hop in http_request.headers.get("X-Forwarded-For", "").split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted_proxy(hop):
+                return hop
+    return peer
+
+
+@app.on_event("startup")
+async def start_job_scheduler():
+    job_scheduler.start()
+
+
+@app.on_event("shutdown")
+async def stop_job_scheduler():
+    await job_scheduler.stop()
+
+async def _probe_api_keys() -> Dict[str, bool]:
+    """Validate OpenAI API key with a live request and return status"""
     validation_results = {
         "openai_valid": False,
         "demo_mode": False,
@@ -110,6 +171,115 @@ async def validate_api_keys() -> Dict[str, bool]:
 
     return validation_results
 
+
+class APIKeyValidationCache:
+    """
+    Caches the API key validation result so requests don't each probe OpenAI
+
+    - a valid result is reused for ttl seconds (API_KEY_VALIDATION_TTL_SECONDS),
+      a failed one for failure_ttl seconds (API_KEY_VALIDATION_FAILURE_TTL_SECONDS)
+      so a transient network error doesn't pin demo mode for long
+    - single-flight: concurrent callers on an expired entry await one shared probe
+    - a background refresher re-probes every refresh_interval seconds
+      (API_KEY_REFRESH_INTERVAL_SECONDS) so requests normally never wait
+    - a changed OPENAI_API_KEY invalidates the cached result
+    """
+
+    def __init__(self, ttl: Optional[float] = None, failure_ttl: Optional[float] = None,
+                 refresh_interval: Optional[float] = None):
+        self.ttl = ttl or float(os.environ.get("API_KEY_VALIDATION_TTL_SECONDS", "300"))
+        self.failure_ttl = failure_ttl or float(os.environ.get("API_KEY_VALIDATION_FAILURE_TTL_SECONDS", "30"))
+        self.refresh_interval = refresh_interval or float(
+            os.environ.get("API_KEY_REFRESH_INTERVAL_SECONDS", str(self.ttl / 2))
+        )
+        self._result: Optional[Dict[str, bool]] = None
+        self._expires_at = 0.0
+        self._checked_at: Optional[datetime] = None
+        self._key: Optional[str] = None
+        self._in_flight: Optional[asyncio.Task] = None
+        self._refresher: Optional[asyncio.Task] = None
+
+        # Counters for monitoring
+        self.hits = 0
+        self.probes = 0
+
+    def _fresh(self) -> bool:
+        return (self._result is not None and time.monotonic() < self._expires_at
+                and self._key == os.environ.get("OPENAI_API_KEY"))
+
+    async def _probe(self) -> Dict[str, bool]:
+        try:
+            self.probes += 1
+            result = await _probe_api_keys()
+            self._result = result
+            self._key = os.environ.get("OPENAI_API_KEY")
+            self._checked_at = datetime.now()
+            self._expires_at = time.monotonic() + (self.ttl if result["openai_valid"] else self.failure_ttl)
+            return result
+        finally:
+            self._in_flight = None
+
+    def _start_probe(self) -> asyncio.Task:
+        if self._in_flight is None:
+            self._in_flight = asyncio.create_task(self._probe())
+        return self._in_flight
+
+    async def refresh(self) -> Dict[str, bool]:
+        """Probe now, or join the probe already in flight"""
+        # Shielded so a cancelled caller doesn't cancel the probe the others share
+        return dict(await asyncio.shield(self._start_probe()))
+
+    async def get(self) -> Dict[str, bool]:
+        """Cached validation result, probing only when it has expired"""
+        if self._fresh():
+            self.hits += 1
+            return dict(self._result)
+        return await self.refresh()
+
+    async def _refresh_loop(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.refresh()
+            except Exception as e:
+                print(f"API key refresh failed: {e}")
+
+    def start(self):
+        """Warm the cache and start the background refresher"""
+        if self._refresher is None:
+            self._start_probe()
+            self._refresher = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self):
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+
+    def stats(self) -> Dict:
+        return {
+            "checked_at": self._checked_at.isoformat() if self._checked_at else None,
+            "cache_hits": self.hits,
+            "probes": self.probes,
+        }
+
+
+api_key_cache = APIKeyValidationCache()
+
+
+async def validate_api_keys() -> Dict[str, bool]:
+    """Validate OpenAI API key and return status (cached, see APIKeyValidationCache)"""
+    return await api_key_cache.get()
+
+
+@app.on_event("startup")
+async def start_api_key_refresher():
+    api_key_cache.start()
+
+
+@app.on_event("shutdown")
+async def stop_api_key_refresher():
+    await api_key_cache.stop()
+
 class ContentRequest(BaseModel):
     topic: str
     agents: Optional[Dict] = None
@@ -123,6 +293,7 @@ class JobStatus(BaseModel):
     completed_at: Optional[datetime] = None
     result: Optional[str] = None
     error: Optional[str] = None
+    queue_position: Optional[int] = None  # 1-based, while pending
 
 @app.get("/")
 async def root():
@@ -130,7 +301,8 @@ async def root():
     return {
         "message": "Content Generator API",
         "version": "1.0.0",
-        "status": "healthy"
+        "status": "healthy",
+        "jobs": job_scheduler.stats()
     }
 
 @app.get("/api/status")
@@ -140,21 +312,23 @@ async def api_status():
     return {
         "openai_connected": validation["openai_valid"],
         "demo_mode": validation["demo_mode"],
+        "validation": api_key_cache.stats(),
         "timestamp": datetime.now().isoformat()
     }
 
-@app.post("/api/generate", response_model=Dict[str, str])
-async def generate_content(request: ContentRequest, background_tasks: BackgroundTasks):
+@app.post("/api/generate", response_model=Dict[str, Union[str, int]])
+async def generate_content(request: ContentRequest, http_request: Request):
     """
     Start content generation process
     Returns job_id for tracking progress
+
+    Jobs are queued per client (see client_key) and answered with 429 when
+    the queue is full.
     """
     job_id = str(uuid.uuid4())
+    client_id = client_key(http_request)
 
-    # Validate API keys first
-    api_validation = await validate_api_keys()
-
-    # Initialize job record
+    # Initialize job record (API keys are checked when the job starts)
     jobs[job_id] = {
         "job_id": job_id,
         "status": "pending",
@@ -165,14 +339,20 @@ async def generate_content(request: ContentRequest, background_tasks: Background
         "result": None,
         "error": None,
         "console_output": [],
-        "demo_mode": api_validation["demo_mode"],
-        "api_status": api_validation
+        "demo_mode": None,
+        "api_status": None
     }
 
-    # Start background task
-    background_tasks.add_task(run_content_generation, job_id, request, api_validation)
+    # Queue the job; it starts when the scheduler has a free slot
+    try:
+        position = job_scheduler.submit(
+            job_id, client_id, lambda: run_content_generation(job_id, request)
+        )
+    except SchedulerFull as e:
+        del jobs[job_id]
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": str(e.retry_after)})
 
-    return {"job_id": job_id, "status": "pending"}
+    return {"job_id": job_id, "status": "pending", "queue_position": position}
 
 @app.get("/api/status/{job_id}", response_model=JobStatus)
 async def get_job_status(job_id: str):
@@ -188,7 +368,8 @@ async def get_job_status(job_id: str):
         started_at=job.get("started_at"),
         completed_at=job.get("completed_at"),
         result=job.get("result"),
-        error=job.get("error")
+        error=job.get("error"),
+        queue_position=job_scheduler.position(job_id) if job["status"] == "pending" else None
     )
 
 @app.get("/api/result/{job_id}")
@@ -264,9 +445,12 @@ async def send_console_message(job_id: str, message: str, message_type: str = "i
             if job_id in active_connections:
                 del active_connections[job_id]
 
-async def run_content_generation(job_id: str, request: ContentRequest, api_validation: Dict[str, bool]):
+async def run_content_generation(job_id: str, request: ContentRequest):
     """
     Background task to run the CrewAI content generation with improved error handling
+
+    API keys are validated when the job starts, not when it was queued, so a
+    job that waited in the queue uses the current key status.
     """
     try:
         jobs[job_id]["status"] = "running"
@@ -275,7 +459,9 @@ async def run_content_generation(job_id: str, request: ContentRequest, api_valid
         await send_console_message(job_id, f"🚀 Starting content generation for: {request.topic}", "info")
 
         # Determine mode based on API validation
-        demo_mode = api_validation["demo_mode"]
+        api_validation = await validate_api_keys()
+        jobs[job_id]["api_status"] = api_validation
+        jobs[job_id]["demo_mode"] = demo_mode = api_validation["demo_mode"]
 
         if demo_mode:
             await send_console_message(job_id, "🤖 Using demo content - No valid API keys found", "warning")
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from my_mas.job_scheduler import JobScheduler, SchedulerFull
+
+
+def recorder(order, name, release=None):
+    async def job():
+        order.append(name)
+        if release is not None:
+            await release.wait()
+    return job
+
+
+def test_positions_follow_round_robin_order():
+    scheduler = JobScheduler(max_concurrency=1, max_queue=10, max_queued_per_client=5)
+    assert scheduler.submit("a1", "alice", recorder([], "a1")) == 1
+    assert scheduler.submit("a2", "alice", recorder([], "a2")) == 2
+    assert scheduler.submit("a3", "alice", recorder([], "a3")) == 3
+    assert scheduler.submit("b1", "bob", recorder([], "b1")) == 2
+
+    assert [scheduler.position(job_id) for job_id in ("a1", "b1", "a2", "a3")] == [1, 2, 3, 4]
+    assert scheduler.position("unknown") is None
+
+
+def test_per_client_and_global_limits():
+    scheduler = JobScheduler(max_concurrency=1, max_queue=3, max_queued_per_client=2)
+    scheduler.submit("a1", "alice", recorder([], "a1"))
+    scheduler.submit("a2", "alice", recorder([], "a2"))
+    with pytest.raises(SchedulerFull):
+        scheduler.submit("a3", "alice", recorder([], "a3"))
+
+    scheduler.submit("b1", "bob", recorder([], "b1"))
+    with pytest.raises(SchedulerFull):
+        scheduler.submit("c1", "carol", recorder([], "c1"))
+    assert scheduler.stats()["rejected"] == 2
+    assert scheduler.stats()["queued"] == 3
+
+
+def test_dispatch_is_fair_and_bounded():
+    async def main():
+        order = []
+        release = asyncio.Event()
+        scheduler = JobScheduler(max_concurrency=2, max_queue=10, max_queued_per_client=5)
+        for job_id in ("a1", "a2", "a3"):
+            scheduler.submit(job_id, "alice", recorder(order, job_id, release))
+        scheduler.submit("b1", "bob", recorder(order, "b1", release))
+
+        scheduler.start()
+        await asyncio.sleep(0.05)
+        assert order == ["a1", "b1"]
+        assert scheduler.stats()["running"] == 2
+
+        release.set()
+        for _ in range(100):
+            if scheduler.stats()["completed"] == 4:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(main())
+    assert order == ["a1", "b1", "a2", "a3"]
+    assert stats["completed"] == 4
+    assert stats["running"] == 0 and stats["queued"] == 0
+
+
+def test_failed_jobs_free_their_slot():
+    async def main():
+        order = []
+        scheduler = JobScheduler(max_concurrency=1, max_queue=10, max_queued_per_client=5)
+        scheduler.start()
+
+        async def broken():
+            raise RuntimeError("boom")
+
+        scheduler.submit("bad", "alice", broken)
+        scheduler.submit("good", "alice", recorder(order, "good"))
+        for _ in range(100):
+            if scheduler.stats()["completed"] == 1:
+                break
+            await asyncio.sleep(0.01)
+        await scheduler.stop()
+        return order, scheduler.stats()
+
+    order, stats = asyncio.run(main())
+    assert order == ["good"]
+    assert stats["failed"] == 1
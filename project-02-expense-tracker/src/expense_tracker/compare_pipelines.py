@@ -0,0 +1,136 @@
+#!/usr/bin/env python
+"""
+Pipeline Comparison Harness
+Runs the sample expenses through the three-agent and the fused pipelines and
+reports latency, token usage and field accuracy for each
+"""
+
+import argparse
+import csv
+import json
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from expense_tracker.crew import PIPELINES
+
+DEFAULT_SAMPLE_CSV = Path(__file__).resolve().parents[2] / "data" / "expenses_sample.csv"
+
+ACCURACY_FIELDS = ("date", "amount", "vendor", "category")
+
+
+def load_cases(sample_csv: Path, limit: Optional[int] = None) -> List[Dict]:
+    """
+    Build natural language descriptions from ledger rows, keeping the row as the expected answer
+    """
+    cases = []
+    with open(sample_csv, "r", newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            description = f"{row['description']} at {row['vendor']} for ${float(row['amount']):.2f} on {row['date']}"
+            if row.get("business_purpose"):
+                description += f" ({row['business_purpose']})"
+            cases.append({"description": description, "expected": row})
+            if limit and len(cases) >= limit:
+                break
+    return cases
+
+
+def _field_matches(field: str, expected: Dict, actual: Dict) -> bool:
+    if field == "amount":
+        try:
+            return abs(float(actual.get("amount")) - float(expected["amount"])) < 0.01
+        except (TypeError, ValueError):
+            return False
+    if field == "vendor":
+        want, got = expected["vendor"].lower(), str(actual.get("vendor") or "").lower()
+        return bool(got) and (want in got or got in want)
+    return str(actual.get(field) or "").upper() == expected[field].upper()
+
+
+def _percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def evaluate(pipeline: str, cases: List[Dict]) -> Dict:
+    """
+    Run every case through one pipeline's LLM crew (bypassing the cache and fast path)
+
+    Returns:
+        Dictionary with latency, token and accuracy figures
+    """
+    crew = PIPELINES[pipeline]()
+    latencies, tokens, errors = [], [], 0
+    correct = {field: 0 for field in ACCURACY_FIELDS}
+    all_correct = 0
+
+    for case in cases:
+        start = time.perf_counter()
+        try:
+            record, usage = crew.run_pipeline(case["description"])
+        except Exception as e:
+            print(f"[{pipeline}] error on '{case['description']}': {e}")
+            record, usage = {"error": str(e)}, {}
+        latencies.append(time.perf_counter() - start)
+        tokens.append(usage.get("total_tokens", 0))
+
+        if "error" in record:
+            errors += 1
+            continue
+        matches = [_field_matches(field, case["expected"], record) for field in ACCURACY_FIELDS]
+        for field, matched in zip(ACCURACY_FIELDS, matches):
+            correct[field] += matched
+        all_correct += all(matches)
+
+    count = len(cases)
+    return {
+        "pipeline": pipeline,
+        "cases": count,
+        "errors": errors,
+        "latency_mean_s": round(statistics.mean(latencies), 3) if latencies else 0.0,
+        "latency_p50_s": round(_percentile(latencies, 0.5), 3) if latencies else 0.0,
+        "latency_p95_s": round(_percentile(latencies, 0.95), 3) if latencies else 0.0,
+        "tokens_total": sum(tokens),
+        "tokens_per_expense": round(sum(tokens) / count, 1) if count else 0.0,
+        "accuracy": {field: round(correct[field] / count, 3) if count else 0.0 for field in ACCURACY_FIELDS},
+        "accuracy_all_fields": round(all_correct / count, 3) if count else 0.0,
+    }
+
+
+def print_report(results: List[Dict]) -> None:
+    columns = ["pipeline", "cases", "errors", "latency_mean_s", "latency_p95_s",
+               "tokens_per_expense", "accuracy_all_fields"]
+    print(" | ".join(columns))
+    for result in results:
+        print(" | ".join(str(result[column]) for column in columns))
+    for result in results:
+        per_field = ", ".join(f"{field}={score}" for field, score in result["accuracy"].items())
+        print(f"{result['pipeline']} field accuracy: {per_field}")
+
+
+def run():
+    """
+    Compare the sequential and fused pipelines on the sample CSV.
+    """
+    parser = argparse.ArgumentParser(description="Compare expense pipelines on a labelled CSV")
+    parser.add_argument("--csv", type=Path, default=DEFAULT_SAMPLE_CSV, help="Labelled expenses CSV")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N rows")
+    parser.add_argument("--pipelines", default=",".join(PIPELINES), help="Comma-separated pipelines to run")
+    parser.add_argument("--output", type=Path, default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    cases = load_cases(args.csv, args.limit)
+    pipelines = [name.strip() for name in args.pipelines.split(",") if name.strip()]
+    unknown = [name for name in pipelines if name not in PIPELINES]
+    if unknown:
+        raise SystemExit(f"Unknown pipelines: {', '.join(unknown)}. Use: {', '.join(PIPELINES)}")
+
+    results = [evaluate(pipeline, cases) for pipeline in pipelines]
+    print_report(results)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    run()
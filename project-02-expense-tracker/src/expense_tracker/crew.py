@@ -1,12 +1,179 @@
 from crewai import Agent, Crew, Process, Task
 from crewai.project import CrewBase, agent, crew, task
 from crewai.agents.agent_builder.base_agent import BaseAgent
-from typing import List
+from pydantic import BaseModel
+from typing import AsyncIterator, Callable, Dict, List, Literal, Optional, Tuple
+import asyncio
 import json
-from datetime import datetime, timezone
+import os
+from datetime import date, datetime, timezone
+
+from expense_tracker.crew_executor import get_crew_executor
+from expense_tracker.tools.fast_parser import fast_path_enabled, get_fast_parser
+from expense_tracker.tools.result_cache import get_result_cache, result_cache_enabled
+from expense_tracker.tools.vendor_index import category_index_enabled, get_vendor_index
+
+IRS_CATEGORIES = ("MEALS", "CAR_TRUCK", "OFFICE_EXPENSE", "SOFTWARE", "TRAVEL",
+                  "ADVERTISING", "LEGAL_PROFESSIONAL", "UTILITIES", "OTHER")
+
+# Ledger category signal: pre-fill the categorization task above HINT confidence,
+# skip it for vendors above SKIP confidence with at least SKIP_MIN_SUPPORT expenses
+CATEGORY_HINT_MIN_CONFIDENCE = float(os.environ.get("EXPENSE_CATEGORY_HINT_CONFIDENCE", "0.6"))
+CATEGORY_SKIP_MIN_CONFIDENCE = float(os.environ.get("EXPENSE_CATEGORY_SKIP_CONFIDENCE", "0.9"))
+CATEGORY_SKIP_MIN_SUPPORT = int(os.environ.get("EXPENSE_CATEGORY_SKIP_MIN_SUPPORT", "5"))
+
+class ExpenseRecordOutput(BaseModel):
+    """Schema the fused pipeline's single structured-output call is validated against"""
+    date: str
+    amount: float
+    vendor: str
+    category: Literal[IRS_CATEGORIES]  # type: ignore[valid-type]
+    description: str = ""
+    business_purpose: str = ""
+    notes: str = ""
+    tax_deductible: Optional[bool] = None
+    deductible_percentage: Optional[int] = None
+    validation_status: str = "complete"
+    recommendations: List[str] = []
+
+class ExpenseBatchItem(ExpenseRecordOutput):
+    """One record of a packed batch prompt; index refers back to the input list"""
+    index: int
+
+class ExpenseBatchOutput(BaseModel):
+    """Schema for a packed batch prompt: one record per numbered description"""
+    expenses: List[ExpenseBatchItem]
+
+def _usage_counts(usage) -> Dict:
+    """Token counts from crewai usage metrics (empty if the LLM didn't report usage)"""
+    if usage is None:
+        return {}
+    return {field: getattr(usage, field, 0) or 0
+            for field in ("total_tokens", "prompt_tokens", "completion_tokens", "successful_requests")}
+
+def _kickoff(crew: Crew, inputs: Dict) -> Tuple[object, Dict]:
+    """
+    Kick off a crew and return its result with the token usage of this run alone
+    
+    A reused crew's usage metrics accumulate over its kickoffs, so the totals
+    seen before the run are subtracted (unless they were reset in between).
+    """
+    before = _usage_counts(getattr(crew, "usage_metrics", None))
+    result = crew.kickoff(inputs=inputs)
+    after = _usage_counts(getattr(result, "token_usage", None))
+    if after.get("total_tokens", 0) < before.get("total_tokens", 0):
+        return result, after
+    return result, {field: count - before.get(field, 0) for field, count in after.items()}
+
+def _record_from_result(result, expense_description: str) -> dict:
+    """Turn a crew result (structured output or JSON text) into an expense record"""
+    structured = getattr(result, "pydantic", None)
+    try:
+        expense_record = structured.model_dump() if structured is not None else json.loads(str(result))
+        # Add processing timestamp
+        expense_record["created_at"] = datetime.now(timezone.utc).isoformat()
+        return expense_record
+    except json.JSONDecodeError:
+        # Fallback if JSON parsing fails
+        return {
+            "error": "Failed to parse expense",
+            "raw_result": str(result),
+            "expense_description": expense_description,
+            "created_at": datetime.now(timezone.utc).isoformat()
+        }
+
+def shortcut_record(expense_description: str) -> Optional[dict]:
+    """Answer from the result cache or the fast-path parser, or None if an LLM is needed"""
+    if result_cache_enabled():
+        cached_record = get_result_cache().get(expense_description)
+        if cached_record is not None:
+            return cached_record
+    
+    if fast_path_enabled():
+        return get_fast_parser().parse(expense_description)
+    return None
+
+def remember_record(expense_description: str, expense_record: dict) -> None:
+    """Cache an LLM-produced record for repeated descriptions"""
+    if result_cache_enabled():
+        get_result_cache().put(expense_description, expense_record)
+
+def process_with_shortcuts(expense_description: str,
+                           run_pipeline: Callable[[str], Tuple[dict, Dict]]) -> dict:
+    """
+    Answer from the result cache or the fast-path parser when possible,
+    otherwise run the given LLM pipeline and cache its result
+    """
+    expense_record = shortcut_record(expense_description)
+    if expense_record is not None:
+        return expense_record
+    
+    expense_record, _ = run_pipeline(expense_description)
+    remember_record(expense_description, expense_record)
+    return expense_record
+
+def ledger_category_hint(expense_description: str) -> Tuple[str, bool]:
+    """
+    Category signal from the ledger's vendor/keyword history
+    
+    Returns:
+        (text for the {category_hint} task placeholder, whether the signal is
+        strong enough to skip the categorization task)
+    """
+    if not category_index_enabled():
+        return "", False
+    suggestion = get_fast_parser().suggest_category(expense_description)
+    if suggestion is None or suggestion["confidence"] < CATEGORY_HINT_MIN_CONFIDENCE:
+        return "", False
+    
+    category, share, support = suggestion["category"], suggestion["confidence"], suggestion["support"]
+    skip = (suggestion["source"] == "vendor" and share >= CATEGORY_SKIP_MIN_CONFIDENCE
+            and support >= CATEGORY_SKIP_MIN_SUPPORT)
+    get_vendor_index().record_use(skip)
+    
+    evidence = "from this vendor" if suggestion["source"] == "vendor" else "with similar descriptions"
+    history = (f"Ledger history: {round(share * support)} of {support} previous expenses {evidence} "
+               f"were filed as {category}.")
+    if skip:
+        return f"{history} Use {category} as the category.", True
+    return f"{history} Prefer {category} unless the expense clearly belongs elsewhere.", False
+
+def reset_crew_state(built_crew: Crew) -> None:
+    """Clear what a kickoff leaves behind so a built Crew can run the next input"""
+    for crew_task in getattr(built_crew, "tasks", None) or []:
+        if hasattr(crew_task, "output"):
+            crew_task.output = None
+    for crew_agent in getattr(built_crew, "agents", None) or []:
+        if hasattr(crew_agent, "tools_results"):
+            crew_agent.tools_results = []
+
+class ReusableCrew:
+    """
+    Builds the Crew once per instance instead of on every request
+    
+    An instance (with its agents, tasks and Crew) must only be used by one
+    thread at a time; CrewPool hands out one instance per worker thread.
+    """
+
+    _built_crews: Optional[Dict[str, Crew]] = None
+
+    def build_crew(self, variant: str) -> Crew:
+        """Build a Crew variant (subclasses may add variants besides the default one)"""
+        return self.crew()
+
+    def prepared_crew(self, variant: str = "default") -> Crew:
+        """The instance's Crew for a variant, built on first use and reset before every later run"""
+        if self._built_crews is None:
+            self._built_crews = {}
+        built_crew = self._built_crews.get(variant)
+        if built_crew is None:
+            built_crew = self._built_crews[variant] = self.build_crew(variant)
+        else:
+            reset_crew_state(built_crew)
+        return built_crew
 
 @CrewBase
-class ExpenseTrackerCrew():
+class ExpenseTrackerCrew(ReusableCrew):
     """Expense Tracker crew with 3-agent workflow: Parse → Categorize → Validate"""
 
     agents: List[BaseAgent]
@@ -65,28 +232,240 @@ class ExpenseTrackerCrew():
             memory=False,   # Disable memory for faster processing
         )
 
+    def build_crew(self, variant: str) -> Crew:
+        """The "categorized" variant drops the category specialist when the ledger already knows the category"""
+        if variant != "categorized":
+            return self.crew()
+        return Crew(
+            agents=[self.expense_parser(), self.compliance_validator()],
+            tasks=[self.parse_expense_task(), self.validate_expense_task()],
+            process=Process.sequential,
+            verbose=False,
+            memory=False,
+        )
+
+    def run_pipeline(self, expense_description: str) -> Tuple[dict, Dict]:
+        """
+        Run the three-agent crew only (no cache or fast path)
+        Returns the expense record and the kickoff's token usage
+        
+        The ledger's category history is passed to the tasks as a hint; when
+        it is decisive the categorization task is skipped altogether.
+        """
+        category_hint, skip_categorization = ledger_category_hint(expense_description)
+        
+        # Set the input for the crew
+        inputs = {"expense_description": expense_description, "category_hint": category_hint}
+        
+        # Run the crew; the final result should be JSON from the validator
+        result, usage = _kickoff(self.prepared_crew("categorized" if skip_categorization else "default"), inputs)
+        return _record_from_result(result, expense_description), usage
+
     def process_expense(self, expense_description: str) -> dict:
         """
         Process a single expense description through the full pipeline
         Returns the final validated expense record as a dictionary
-        """
-        # Set the input for the crew
-        inputs = {"expense_description": expense_description}
         
-        # Run the crew
-        result = self.crew().kickoff(inputs=inputs)
+        Repeated or near-identical descriptions are answered from the result
+        cache. Well-formed inputs ("$12 Spotify subscription") are handled by the
+        rule-based fast-path parser; the crew runs only when it isn't confident.
+        """
+        return process_with_shortcuts(expense_description, self.run_pipeline)
+
+
+@CrewBase
+class FusedExpenseCrew(ReusableCrew):
+    """Single-agent expense crew: parse, categorize and validate in one structured-output call"""
+
+    agents_config = 'config/fused_agents.yaml'
+    tasks_config = 'config/fused_tasks.yaml'
+
+    agents: List[BaseAgent]
+    tasks: List[Task]
+
+    @agent
+    def expense_processor(self) -> Agent:
+        return Agent(
+            config=self.agents_config['expense_processor'], # type: ignore[index]
+            verbose=False
+        )
+
+    @task
+    def process_expense_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['process_expense_task'], # type: ignore[index]
+            output_pydantic=ExpenseRecordOutput
+        )
+
+    @crew
+    def crew(self) -> Crew:
+        """Creates the fused crew: one agent, one task, one LLM round-trip"""
+        return Crew(
+            agents=self.agents,
+            tasks=self.tasks,
+            process=Process.sequential,
+            verbose=False,
+            memory=False,
+        )
+
+    def run_pipeline(self, expense_description: str) -> Tuple[dict, Dict]:
+        """
+        Run the fused crew only (no cache or fast path)
+        Returns the expense record and the kickoff's token usage
+        """
+        inputs = {
+            "expense_description": expense_description,
+            "current_date": date.today().isoformat()
+        }
+        result, usage = _kickoff(self.prepared_crew(), inputs)
+        return _record_from_result(result, expense_description), usage
+
+    def process_expense(self, expense_description: str) -> dict:
+        """Process a single expense description with the fused single-agent pipeline"""
+        return process_with_shortcuts(expense_description, self.run_pipeline)
+
+
+@CrewBase
+class BatchExpenseCrew(ReusableCrew):
+    """
+    Fused crew that packs several descriptions into one prompt and gets a JSON array back
+    
+    Prompts run concurrently (bounded by EXPENSE_BATCH_CONCURRENCY), with
+    EXPENSE_BATCH_PROMPT_SIZE descriptions each. They are submitted to the
+    shared crew executor, so its worker limit, queue depth and timeout cover
+    batch prompts as well as single expenses, and each runs on the worker
+    thread's pooled batch crew (see CrewPool) rather than a fresh copy.
+    """
+
+    agents_config = 'config/fused_agents.yaml'
+    tasks_config = 'config/batch_tasks.yaml'
+
+    agents: List[BaseAgent]
+    tasks: List[Task]
+
+    def __init__(self, prompt_size: Optional[int] = None, concurrency: Optional[int] = None):
+        self.prompt_size = prompt_size or int(os.environ.get("EXPENSE_BATCH_PROMPT_SIZE", "10"))
+        self.concurrency = concurrency or int(os.environ.get("EXPENSE_BATCH_CONCURRENCY", "4"))
+
+    @agent
+    def expense_processor(self) -> Agent:
+        return Agent(
+            config=self.agents_config['expense_processor'], # type: ignore[index]
+            verbose=False
+        )
+
+    @task
+    def process_expense_batch_task(self) -> Task:
+        return Task(
+            config=self.tasks_config['process_expense_batch_task'], # type: ignore[index]
+            output_pydantic=ExpenseBatchOutput
+        )
+
+    @crew
+    def crew(self) -> Crew:
+        """Creates the batch crew: one agent, one task per packed prompt"""
+        return Crew(
+            agents=self.agents,
+            tasks=self.tasks,
+            process=Process.sequential,
+            verbose=False,
+            memory=False,
+        )
+
+    def kickoff_prompt(self, inputs: Dict):
+        """Run one packed prompt on this instance's crew (one thread at a time, like any ReusableCrew)"""
+        return self.prepared_crew().kickoff(inputs=inputs)
+
+    async def run_prompt(self, expense_descriptions: List[str]) -> List[dict]:
+        """
+        Process several descriptions with one LLM call
+        Returns one record per description, in input order (error records for any it skipped)
+        """
+        inputs = {
+            "expense_descriptions": "\n".join(
+                f"{index}. {description}" for index, description in enumerate(expense_descriptions)
+            ),
+            "current_date": date.today().isoformat()
+        }
+        result = await get_crew_executor().run(_kickoff_pooled_batch, inputs)
         
-        # Parse the final result (should be JSON from the validator)
+        structured = getattr(result, "pydantic", None)
         try:
-            expense_record = json.loads(str(result))
-            # Add processing timestamp
+            if structured is not None:
+                items = [item.model_dump() for item in structured.expenses]
+            else:
+                parsed = json.loads(str(result))
+                items = parsed["expenses"] if isinstance(parsed, dict) else parsed
+        except (json.JSONDecodeError, KeyError, TypeError):
+            items = []
+        
+        by_index = {item.get("index"): item for item in items if isinstance(item, dict)}
+        records = []
+        for index, description in enumerate(expense_descriptions):
+            expense_record = by_index.get(index)
+            if expense_record is None:
+                expense_record = {
+                    "error": "Failed to parse expense",
+                    "raw_result": str(result),
+                    "expense_description": description
+                }
+            else:
+                expense_record = {key: value for key, value in expense_record.items() if key != "index"}
             expense_record["created_at"] = datetime.now(timezone.utc).isoformat()
-            return expense_record
-        except json.JSONDecodeError:
-            # Fallback if JSON parsing fails
-            return {
-                "error": "Failed to parse expense",
-                "raw_result": str(result),
-                "expense_description": expense_description,
-                "created_at": datetime.now(timezone.utc).isoformat()
-            }
\ No newline at end of file
+            records.append(expense_record)
+        return records
+
+    async def process_batch(self, expense_descriptions: List[str]) -> AsyncIterator[Tuple[int, dict]]:
+        """
+        Yield (index, record) for every description as soon as it is ready
+        
+        Cache hits and fast-path parses come back first; the rest are packed
+        into prompts that complete in whatever order the LLM finishes them.
+        """
+        pending = []
+        for index, description in enumerate(expense_descriptions):
+            expense_record = await asyncio.to_thread(shortcut_record, description)
+            if expense_record is not None:
+                yield index, expense_record
+            else:
+                pending.append(index)
+        
+        semaphore = asyncio.Semaphore(self.concurrency)
+        
+        async def run_group(indexes: List[int]) -> Tuple[List[int], List[dict]]:
+            async with semaphore:
+                try:
+                    records = await self.run_prompt([expense_descriptions[i] for i in indexes])
+                except Exception as e:
+                    records = [{"error": f"Batch processing failed: {e}"} for _ in indexes]
+            return indexes, records
+        
+        groups = [pending[start:start + self.prompt_size] for start in range(0, len(pending), self.prompt_size)]
+        for completed in asyncio.as_completed([run_group(group) for group in groups]):
+            indexes, records = await completed
+            for index, expense_record in zip(indexes, records):
+                if "error" not in expense_record:
+                    remember_record(expense_descriptions[index], expense_record)
+                yield index, expense_record
+
+
+# Selectable expense pipelines; EXPENSE_PIPELINE sets the default
+PIPELINES = {
+    "sequential": ExpenseTrackerCrew,
+    "fused": FusedExpenseCrew,
+}
+
+# CrewPool name of the batch crew (not a pipeline for single expenses)
+BATCH_PIPELINE = "batch"
+
+def _kickoff_pooled_batch(inputs: Dict):
+    """Runs on a crew worker thread with that thread's pooled batch crew"""
+    # Imported here because crew_pool builds its factories from this module
+    from expense_tracker.crew_pool import get_crew_pool
+    return get_crew_pool().get(BATCH_PIPELINE).kickoff_prompt(inputs)
+
+def default_pipeline() -> str:
+    pipeline = os.environ.get("EXPENSE_PIPELINE", "sequential").lower()
+    if pipeline not in PIPELINES:
+        raise ValueError(f"EXPENSE_PIPELINE must be one of {', '.join(PIPELINES)}")
+    return pipeline
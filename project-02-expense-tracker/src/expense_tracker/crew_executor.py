@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+Bounded Crew Executor
+Runs blocking crew pipelines on a fixed worker pool so async handlers never block the event loop
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+
+class CrewExecutorSaturated(Exception):
+    """Raised when every worker is busy and the wait queue is full"""
+
+
+class CrewTimeout(Exception):
+    """Raised when a crew run exceeds the per-job timeout"""
+
+
+class CrewExecutor:
+    """
+    Thread pool for crew runs with a concurrency limit, a bounded queue and a timeout
+
+    - max_workers crews run at once (EXPENSE_CREW_WORKERS)
+    - up to max_queue more wait for a worker (EXPENSE_CREW_QUEUE_DEPTH);
+      beyond that submissions are rejected with CrewExecutorSaturated
+    - callers stop waiting after timeout seconds (EXPENSE_CREW_TIMEOUT_SECONDS);
+      the run itself can't be interrupted, so it keeps its slot until it finishes
+
+    Worker threads keep their own pre-built crews through the CrewPool.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queue: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.max_workers = max_workers or int(os.environ.get("EXPENSE_CREW_WORKERS", "4"))
+        self.max_queue = max_queue if max_queue is not None else int(os.environ.get("EXPENSE_CREW_QUEUE_DEPTH", "16"))
+        self.timeout = timeout or float(os.environ.get("EXPENSE_CREW_TIMEOUT_SECONDS", "120"))
+
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="crew-worker")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+
+        # Counters for monitoring
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def saturated(self) -> bool:
+        """True when a new submission would be rejected"""
+        with self._lock:
+            return self._in_flight >= self.max_workers + self.max_queue
+
+    def _reserve(self) -> None:
+        with self._lock:
+            if self._in_flight >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise CrewExecutorSaturated(
+                    f"All {self.max_workers} crew workers are busy and {self.max_queue} requests are queued"
+                )
+            self._in_flight += 1
+
+    def _run(self, fn: Callable, args: tuple):
+        with self._lock:
+            self._running += 1
+        try:
+            result = fn(*args)
+        except Exception:
+            with self._lock:
+                self.failed += 1
+            raise
+        else:
+            with self._lock:
+                self.completed += 1
+            return result
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._in_flight -= 1
+
+    def _release_if_cancelled(self, future: Future) -> None:
+        # A run cancelled while queued (caller timed out or went away) never
+        # reaches _run, so its reservation is returned here instead
+        if future.cancelled():
+            with self._lock:
+                self._in_flight -= 1
+
+    async def run(self, fn: Callable, *args, timeout: Optional[float] = None):
+        """
+        Run a blocking function on a crew worker and await its result
+
+        Raises:
+            CrewExecutorSaturated: If the worker pool and queue are full
+            CrewTimeout: If the run doesn't finish within the timeout
+        """
+        self._reserve()
+        try:
+            # Carry the caller's context (e.g. the request's tenant) to the worker, like asyncio.to_thread
+            future = self._executor.submit(contextvars.copy_context().run, self._run, fn, args)
+        except Exception:
+            with self._lock:
+                self._in_flight -= 1
+            raise
+        future.add_done_callback(self._release_if_cancelled)
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), timeout or self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self.timed_out += 1
+            raise CrewTimeout(f"Crew run exceeded {timeout or self.timeout:.0f}s")
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "max_workers": self.max_workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._in_flight - self._running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "rejected": self.rejected,
+                "timed_out": self.timed_out,
+            }
+
+
+_executor: Optional[CrewExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def get_crew_executor() -> CrewExecutor:
+    """Get the process-wide crew executor"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = CrewExecutor()
+        return _executor
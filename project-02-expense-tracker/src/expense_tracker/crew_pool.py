@@ -0,0 +1,94 @@
+#!/usr/bin/env python
+"""
+Per-thread Crew Pool
+Keeps one pre-built crew per (worker thread, pipeline) so requests skip crew construction
+"""
+
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from expense_tracker.crew import BATCH_PIPELINE, PIPELINES, BatchExpenseCrew, default_pipeline
+
+
+class CrewPool:
+    """
+    Pool of reusable crews, one per worker thread and pipeline
+
+    Building a crew loads the agent/task YAML and constructs agents, tasks and
+    the Crew object. The pool does that once per thread; later requests on the
+    same thread reuse the built crew (reset between runs by prepared_crew()).
+    Construction and reuse are timed so the saved setup cost is visible.
+    """
+
+    def __init__(self, factories: Optional[Dict[str, Callable[[], object]]] = None):
+        self.factories = factories or {**PIPELINES, BATCH_PIPELINE: BatchExpenseCrew}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+        # Profiling counters
+        self.constructions = 0
+        self.construction_seconds = 0.0
+        self.reuses = 0
+        self.reuse_seconds = 0.0
+        self.threads = 0
+
+    def get(self, pipeline: Optional[str] = None):
+        """
+        Get this thread's crew for a pipeline, building it on first use
+
+        Args:
+            pipeline: "sequential", "fused" or "batch" (default: EXPENSE_PIPELINE)
+
+        Returns:
+            Crew instance owned by the calling thread
+        """
+        pipeline = pipeline or default_pipeline()
+        if pipeline not in self.factories:
+            raise ValueError(f"Unknown pipeline '{pipeline}'. Use one of: {', '.join(self.factories)}")
+
+        crews = getattr(self._local, "crews", None)
+        if crews is None:
+            crews = self._local.crews = {}
+            with self._lock:
+                self.threads += 1
+
+        start = time.perf_counter()
+        expense_crew = crews.get(pipeline)
+        if expense_crew is None:
+            expense_crew = self.factories[pipeline]()
+            if hasattr(expense_crew, "prepared_crew"):
+                expense_crew.prepared_crew()
+            crews[pipeline] = expense_crew
+            with self._lock:
+                self.constructions += 1
+                self.construction_seconds += time.perf_counter() - start
+        else:
+            with self._lock:
+                self.reuses += 1
+                self.reuse_seconds += time.perf_counter() - start
+        return expense_crew
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "threads": self.threads,
+                "constructions": self.constructions,
+                "reuses": self.reuses,
+                "avg_construction_ms": round(1000 * self.construction_seconds / self.constructions, 3)
+                if self.constructions else 0.0,
+                "avg_reuse_ms": round(1000 * self.reuse_seconds / self.reuses, 3) if self.reuses else 0.0,
+            }
+
+
+_pool: Optional[CrewPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_crew_pool() -> CrewPool:
+    """Get the process-wide crew pool"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = CrewPool()
+        return _pool
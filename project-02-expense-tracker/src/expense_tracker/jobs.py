@@ -0,0 +1,472 @@
+#!/usr/bin/env python
+"""
+Durable Job Queue
+Pluggable job backends (SQLite by default, in-memory for tests and single-process use)
+plus an asyncio worker pool with priorities, retries with backoff and TTL cleanup
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional
+
+PENDING = "pending"
+RUNNING = "running"
+COMPLETED = "completed"
+ERROR = "error"
+
+ACTIVE_STATUSES = (PENDING, RUNNING)
+FINISHED_STATUSES = (COMPLETED, ERROR)
+
+# Error recorded for a job whose worker died on its last attempt
+WORKER_LOST = "worker lost"
+
+
+class PermanentJobError(Exception):
+    """Raised by a job handler for failures that retrying can't fix"""
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobBackend(ABC):
+    """
+    Storage interface for queued jobs
+
+    Implementations must make claim() atomic across every process sharing the
+    backend, so any API worker can run any job and /jobs/{job_id} can be served
+    by any worker. A Redis-style backend would implement the same methods.
+    """
+
+    @abstractmethod
+    def enqueue(self, job_type: str, payload: Dict, priority: int = 0, max_attempts: int = 3,
+                progress: Optional[Dict] = None) -> Dict:
+        """Store a new pending job and return it"""
+
+    @abstractmethod
+    def claim(self, job_types: List[str]) -> Optional[Dict]:
+        """Atomically mark the next due job (highest priority, then oldest) running and return it"""
+
+    @abstractmethod
+    def update_progress(self, job_id: str, progress: Dict) -> None:
+        """Record intermediate progress for a running job (also renews its lease)"""
+
+    @abstractmethod
+    def complete(self, job_id: str, result: Dict) -> None:
+        """Mark a job completed with its result"""
+
+    @abstractmethod
+    def fail(self, job_id: str, error: str, retry_in: Optional[float] = None) -> None:
+        """Mark a job failed, or back to pending after retry_in seconds when it will be retried"""
+
+    @abstractmethod
+    def get(self, job_id: str) -> Optional[Dict]:
+        """Return a job by id, or None"""
+
+    @abstractmethod
+    def count(self, statuses: Optional[tuple] = None) -> int:
+        """Number of jobs, optionally restricted to some statuses"""
+
+    @abstractmethod
+    def cleanup(self, ttl_seconds: float) -> int:
+        """Delete finished jobs older than ttl_seconds; returns how many were removed"""
+
+    @abstractmethod
+    def recover_stale(self, lease_seconds: float) -> int:
+        """
+        Recover running jobs whose worker disappeared (claimed longer than lease_seconds ago)
+
+        Jobs with attempts left go back to pending; the rest fail with "worker
+        lost" so a job that must not be replayed (max_attempts=1) never is.
+        """
+
+
+def _new_job(job_type: str, payload: Dict, priority: int, max_attempts: int, progress: Optional[Dict]) -> Dict:
+    return {
+        "job_id": str(uuid.uuid4()),
+        "job_type": job_type,
+        "status": PENDING,
+        "priority": priority,
+        "request": payload,
+        "attempts": 0,
+        "max_attempts": max_attempts,
+        "run_after": 0.0,
+        "claimed_at": None,
+        "created_at": _now_iso(),
+        "started_at": None,
+        "completed_at": None,
+        "finished_at": None,
+        "result": None,
+        "error": None,
+        "progress": progress,
+    }
+
+
+class InMemoryJobBackend(JobBackend):
+    """Process-local backend; jobs are lost on restart"""
+
+    def __init__(self):
+        self._jobs: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, job_type: str, payload: Dict, priority: int = 0, max_attempts: int = 3,
+                progress: Optional[Dict] = None) -> Dict:
+        job = _new_job(job_type, payload, priority, max_attempts, progress)
+        with self._lock:
+            self._jobs[job["job_id"]] = job
+        return dict(job)
+
+    def claim(self, job_types: List[str]) -> Optional[Dict]:
+        now = time.time()
+        with self._lock:
+            due = [job for job in self._jobs.values()
+                   if job["status"] == PENDING and job["job_type"] in job_types and job["run_after"] <= now]
+            if not due:
+                return None
+            job = min(due, key=lambda item: (-item["priority"], item["created_at"]))
+            job.update(status=RUNNING, attempts=job["attempts"] + 1, claimed_at=now,
+                       started_at=job["started_at"] or _now_iso())
+            return dict(job)
+
+    def _update(self, job_id: str, **fields) -> None:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None:
+                job.update(fields)
+
+    def update_progress(self, job_id: str, progress: Dict) -> None:
+        self._update(job_id, progress=progress, claimed_at=time.time())
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        self._update(job_id, status=COMPLETED, result=result, error=None,
+                     completed_at=_now_iso(), finished_at=time.time())
+
+    def fail(self, job_id: str, error: str, retry_in: Optional[float] = None) -> None:
+        if retry_in is not None:
+            self._update(job_id, status=PENDING, error=error, run_after=time.time() + retry_in)
+        else:
+            self._update(job_id, status=ERROR, error=error, completed_at=_now_iso(), finished_at=time.time())
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def count(self, statuses: Optional[tuple] = None) -> int:
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if statuses is None or job["status"] in statuses)
+
+    def cleanup(self, ttl_seconds: float) -> int:
+        cutoff = time.time() - ttl_seconds
+        with self._lock:
+            expired = [job_id for job_id, job in self._jobs.items()
+                       if job["status"] in FINISHED_STATUSES and job["finished_at"] < cutoff]
+            for job_id in expired:
+                del self._jobs[job_id]
+        return len(expired)
+
+    def recover_stale(self, lease_seconds: float) -> int:
+        cutoff = time.time() - lease_seconds
+        recovered = 0
+        with self._lock:
+            for job in self._jobs.values():
+                if job["status"] == RUNNING and job["claimed_at"] < cutoff:
+                    if job["attempts"] < job["max_attempts"]:
+                        job.update(status=PENDING, run_after=0.0)
+                    else:
+                        job.update(status=ERROR, error=WORKER_LOST, completed_at=_now_iso(),
+                                   finished_at=time.time())
+                    recovered += 1
+        return recovered
+
+
+class SQLiteJobBackend(JobBackend):
+    """
+    Jobs in a SQLite database (WAL mode), shared by every API worker on the host
+
+    Each thread uses its own connection; claim() runs in an IMMEDIATE
+    transaction so two workers can never take the same job.
+    """
+
+    _JSON_FIELDS = ("request", "result", "progress")
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+        conn = self._connection()
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                job_type TEXT NOT NULL,
+                status TEXT NOT NULL,
+                priority INTEGER NOT NULL DEFAULT 0,
+                request TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                max_attempts INTEGER NOT NULL DEFAULT 3,
+                run_after REAL NOT NULL DEFAULT 0,
+                claimed_at REAL,
+                created_at TEXT NOT NULL,
+                started_at TEXT,
+                completed_at TEXT,
+                finished_at REAL,
+                result TEXT,
+                error TEXT,
+                progress TEXT
+            )
+        """)
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_due ON jobs (status, priority DESC, created_at)")
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (status, finished_at)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _row_to_job(self, row: sqlite3.Row) -> Dict:
+        job = dict(row)
+        for field in self._JSON_FIELDS:
+            job[field] = json.loads(job[field]) if job[field] else None
+        return job
+
+    def enqueue(self, job_type: str, payload: Dict, priority: int = 0, max_attempts: int = 3,
+                progress: Optional[Dict] = None) -> Dict:
+        job = _new_job(job_type, payload, priority, max_attempts, progress)
+        self._connection().execute(
+            "INSERT INTO jobs (job_id, job_type, status, priority, request, attempts, max_attempts, run_after, "
+            "created_at, progress) VALUES (?, ?, ?, ?, ?, 0, ?, 0, ?, ?)",
+            (job["job_id"], job_type, PENDING, priority, json.dumps(payload, default=str), max_attempts,
+             job["created_at"], json.dumps(progress) if progress is not None else None),
+        )
+        return job
+
+    def claim(self, job_types: List[str]) -> Optional[Dict]:
+        conn = self._connection()
+        placeholders = ", ".join("?" for _ in job_types)
+        now = time.time()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                f"SELECT * FROM jobs WHERE status = ? AND job_type IN ({placeholders}) AND run_after <= ? "
+                "ORDER BY priority DESC, created_at LIMIT 1",
+                (PENDING, *job_types, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, attempts = attempts + 1, claimed_at = ?, "
+                "started_at = COALESCE(started_at, ?) WHERE job_id = ?",
+                (RUNNING, now, _now_iso(), row["job_id"]),
+            )
+            claimed = conn.execute("SELECT * FROM jobs WHERE job_id = ?", (row["job_id"],)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return self._row_to_job(claimed)
+
+    def update_progress(self, job_id: str, progress: Dict) -> None:
+        self._connection().execute("UPDATE jobs SET progress = ?, claimed_at = ? WHERE job_id = ?",
+                                   (json.dumps(progress, default=str), time.time(), job_id))
+
+    def complete(self, job_id: str, result: Dict) -> None:
+        self._connection().execute(
+            "UPDATE jobs SET status = ?, result = ?, error = NULL, completed_at = ?, finished_at = ? WHERE job_id = ?",
+            (COMPLETED, json.dumps(result, default=str), _now_iso(), time.time(), job_id),
+        )
+
+    def fail(self, job_id: str, error: str, retry_in: Optional[float] = None) -> None:
+        if retry_in is not None:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ? WHERE job_id = ?",
+                (PENDING, error, time.time() + retry_in, job_id),
+            )
+        else:
+            self._connection().execute(
+                "UPDATE jobs SET status = ?, error = ?, completed_at = ?, finished_at = ? WHERE job_id = ?",
+                (ERROR, error, _now_iso(), time.time(), job_id),
+            )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        row = self._connection().execute("SELECT * FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return self._row_to_job(row) if row is not None else None
+
+    def count(self, statuses: Optional[tuple] = None) -> int:
+        if statuses is None:
+            return self._connection().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+        placeholders = ", ".join("?" for _ in statuses)
+        return self._connection().execute(
+            f"SELECT COUNT(*) FROM jobs WHERE status IN ({placeholders})", statuses
+        ).fetchone()[0]
+
+    def cleanup(self, ttl_seconds: float) -> int:
+        cursor = self._connection().execute(
+            "DELETE FROM jobs WHERE status IN (?, ?) AND finished_at < ?",
+            (*FINISHED_STATUSES, time.time() - ttl_seconds),
+        )
+        return cursor.rowcount
+
+    def recover_stale(self, lease_seconds: float) -> int:
+        conn = self._connection()
+        cutoff = time.time() - lease_seconds
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            failed = conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, completed_at = ?, finished_at = ? "
+                "WHERE status = ? AND claimed_at < ? AND attempts >= max_attempts",
+                (ERROR, WORKER_LOST, _now_iso(), time.time(), RUNNING, cutoff),
+            ).rowcount
+            requeued = conn.execute(
+                "UPDATE jobs SET status = ?, run_after = 0 WHERE status = ? AND claimed_at < ?",
+                (PENDING, RUNNING, cutoff),
+            ).rowcount
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return failed + requeued
+
+
+JobHandler = Callable[[Dict, Callable[[Dict], None]], Awaitable[Dict]]
+
+
+class JobWorkerPool:
+    """
+    Asyncio workers that claim jobs from a backend and run their handlers
+
+    Every API process runs its own pool against the shared backend. Failed
+    jobs are retried with exponential backoff (retry_backoff * 2**(attempt-1)
+    seconds, capped at max_backoff) until max_attempts; handlers raise
+    PermanentJobError for failures that shouldn't be retried. Finished jobs
+    are deleted after ttl_seconds.
+    """
+
+    def __init__(self, backend: JobBackend, handlers: Dict[str, JobHandler],
+                 workers: Optional[int] = None, poll_interval: float = 0.5,
+                 retry_backoff: Optional[float] = None, max_backoff: float = 300.0,
+                 ttl_seconds: Optional[float] = None, lease_seconds: Optional[float] = None):
+        self.backend = backend
+        self.handlers = handlers
+        self.workers = workers or int(os.environ.get("EXPENSE_JOB_WORKERS", "4"))
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff or float(os.environ.get("EXPENSE_JOB_RETRY_BACKOFF", "2.0"))
+        self.max_backoff = max_backoff
+        self.ttl_seconds = ttl_seconds or float(os.environ.get("EXPENSE_JOB_TTL_SECONDS", "86400"))
+        self.lease_seconds = lease_seconds or float(os.environ.get("EXPENSE_JOB_LEASE_SECONDS", "900"))
+
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def notify(self) -> None:
+        """Wake idle workers after a local enqueue instead of waiting for the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        await asyncio.to_thread(self.backend.recover_stale, self.lease_seconds)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._janitor()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _worker(self) -> None:
+        job_types = list(self.handlers)
+        while True:
+            try:
+                job = await asyncio.to_thread(self.backend.claim, job_types)
+            except Exception as e:
+                print(f"Error claiming job: {e}")
+                job = None
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict) -> None:
+        job_id = job["job_id"]
+
+        def report_progress(progress: Dict) -> None:
+            self.backend.update_progress(job_id, progress)
+
+        try:
+            result = await self.handlers[job["job_type"]](job, report_progress)
+        except asyncio.CancelledError:
+            raise
+        except PermanentJobError as e:
+            await asyncio.to_thread(self.backend.fail, job_id, str(e))
+        except Exception as e:
+            retry_in = None
+            if job["attempts"] < job["max_attempts"]:
+                retry_in = min(self.max_backoff, self.retry_backoff * 2 ** (job["attempts"] - 1))
+            await asyncio.to_thread(self.backend.fail, job_id, str(e), retry_in)
+        else:
+            await asyncio.to_thread(self.backend.complete, job_id, result)
+
+    async def _janitor(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.backend.cleanup, self.ttl_seconds)
+                await asyncio.to_thread(self.backend.recover_stale, self.lease_seconds)
+            except Exception as e:
+                print(f"Error cleaning up jobs: {e}")
+            await asyncio.sleep(min(self.ttl_seconds, 60.0))
+
+    def stats(self) -> Dict:
+        return {
+            "workers": self.workers,
+            "pending": self.backend.count((PENDING,)),
+            "running": self.backend.count((RUNNING,)),
+        }
+
+
+_backend: Optional[JobBackend] = None
+_backend_lock = threading.Lock()
+
+
+def get_job_backend() -> JobBackend:
+    """
+    Get the configured job backend
+
+    EXPENSE_JOB_BACKEND selects "sqlite" (default) or "memory"; EXPENSE_JOB_DB
+    overrides the database path (default: jobs.sqlite3 in the data directory).
+    """
+    global _backend
+    with _backend_lock:
+        if _backend is None:
+            backend = os.environ.get("EXPENSE_JOB_BACKEND", "sqlite").lower()
+            if backend == "memory":
+                _backend = InMemoryJobBackend()
+            elif backend == "sqlite":
+                db_path = os.environ.get("EXPENSE_JOB_DB")
+                if not db_path:
+                    from expense_tracker.tools import get_csv_handler
+                    db_path = get_csv_handler().data_dir / "jobs.sqlite3"
+                _backend = SQLiteJobBackend(Path(db_path))
+            else:
+                raise ValueError("EXPENSE_JOB_BACKEND must be 'sqlite' or 'memory'")
+        return _backend
@@ -1,8 +1,11 @@
 from .csv_handler import ExpenseCSVHandler, get_csv_handler, add_expense_to_csv, get_all_expenses_from_csv
+from .expense_store import ExpenseStore, get_expense_store
 
 __all__ = [
     'ExpenseCSVHandler',
     'get_csv_handler', 
     'add_expense_to_csv',
-    'get_all_expenses_from_csv'
+    'get_all_expenses_from_csv',
+    'ExpenseStore',
+    'get_expense_store'
 ]
\ No newline at end of file
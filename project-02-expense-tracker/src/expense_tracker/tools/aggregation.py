@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Columnar Aggregation Engine for Expense Tracker
+Holds expenses as NumPy columns so summaries are vectorized reductions
+"""
+
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+# Supported group-by keys for ExpenseColumns.totals()
+GROUP_BY_FIELDS = ("category", "month", "vendor")
+
+
+class ExpenseColumns:
+    """
+    Columnar view of the expense table
+
+    - amounts: float64 array
+    - dates: datetime64[D] array (NaT for missing/invalid dates)
+    - categories / vendors: dictionary-encoded int32 codes
+    """
+
+    _INITIAL_CAPACITY = 1024
+
+    def __init__(self, capacity: int = _INITIAL_CAPACITY):
+        capacity = max(capacity, 1)
+        self._size = 0
+        self._amounts = np.zeros(capacity, dtype=np.float64)
+        self._dates = np.full(capacity, np.datetime64("NaT"), dtype="datetime64[D]")
+        self._category_codes = np.zeros(capacity, dtype=np.int32)
+        self._vendor_codes = np.zeros(capacity, dtype=np.int32)
+
+        # Dictionaries for the encoded columns: code -> value and value -> code
+        self.categories: List[str] = []
+        self.vendors: List[str] = []
+        self._category_lookup: Dict[str, int] = {}
+        self._vendor_lookup: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> "ExpenseColumns":
+        """Build the columns in one pass over expense dictionaries"""
+        rows = list(rows)
+        columns = cls(capacity=max(len(rows), cls._INITIAL_CAPACITY))
+        size = len(rows)
+
+        columns._amounts[:size] = [_to_amount(row.get("amount")) for row in rows]
+        columns._dates[:size] = _to_dates([row.get("date") for row in rows])
+        columns._category_codes[:size] = [
+            _encode(_category_of(row), columns.categories, columns._category_lookup) for row in rows
+        ]
+        columns._vendor_codes[:size] = [
+            _encode(row.get("vendor") or "", columns.vendors, columns._vendor_lookup) for row in rows
+        ]
+        columns._size = size
+        return columns
+
+    def append(self, row: Dict) -> None:
+        """Append a single expense, growing the arrays geometrically"""
+        if self._size == len(self._amounts):
+            self._grow()
+
+        i = self._size
+        self._amounts[i] = _to_amount(row.get("amount"))
+        self._dates[i] = _to_dates([row.get("date")])[0]
+        self._category_codes[i] = _encode(_category_of(row), self.categories, self._category_lookup)
+        self._vendor_codes[i] = _encode(row.get("vendor") or "", self.vendors, self._vendor_lookup)
+        self._size += 1
+
+    def _grow(self) -> None:
+        capacity = len(self._amounts) * 2
+        self._amounts = np.resize(self._amounts, capacity)
+        self._dates = np.resize(self._dates, capacity)
+        self._category_codes = np.resize(self._category_codes, capacity)
+        self._vendor_codes = np.resize(self._vendor_codes, capacity)
+
+    def _mask(self, start_date: Optional[str], end_date: Optional[str]) -> Optional[np.ndarray]:
+        """Boolean mask for start_date <= date <= end_date (None when unfiltered)"""
+        if not start_date and not end_date:
+            return None
+
+        dates = self._dates[:self._size]
+        mask = ~np.isnat(dates)
+        if start_date:
+            mask &= dates >= np.datetime64(start_date, "D")
+        if end_date:
+            mask &= dates <= np.datetime64(end_date, "D")
+        return mask
+
+    def totals(self, group_by: str = "category",
+               start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Dict]:
+        """
+        Total and count of expenses grouped by category, month or vendor
+
+        Args:
+            group_by: One of "category", "month", "vendor"
+            start_date: Optional inclusive start date (YYYY-MM-DD)
+            end_date: Optional inclusive end date (YYYY-MM-DD)
+
+        Returns:
+            Dictionary of group -> {'total': float, 'count': int}
+        """
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_FIELDS)}")
+
+        amounts = self._amounts[:self._size]
+        mask = self._mask(start_date, end_date)
+
+        if group_by == "month":
+            months = self._dates[:self._size].astype("datetime64[M]")
+            valid = ~np.isnat(months)
+            mask = valid if mask is None else mask & valid
+            labels, codes = np.unique(months[mask], return_inverse=True)
+            names = [str(label) for label in labels]
+            amounts = amounts[mask]
+        else:
+            if group_by == "category":
+                codes, names = self._category_codes[:self._size], self.categories
+            else:
+                codes, names = self._vendor_codes[:self._size], self.vendors
+            if mask is not None:
+                codes, amounts = codes[mask], amounts[mask]
+
+        counts = np.bincount(codes, minlength=len(names))
+        sums = np.bincount(codes, weights=amounts, minlength=len(names))
+
+        return {
+            names[code]: {"total": float(sums[code]), "count": int(counts[code])}
+            for code in np.flatnonzero(counts)
+        }
+
+
+def _category_of(row: Dict) -> str:
+    category = row.get("category", "OTHER")
+    return "OTHER" if category is None else category
+
+
+def _encode(value: str, values: List[str], lookup: Dict[str, int]) -> int:
+    code = lookup.get(value)
+    if code is None:
+        code = len(values)
+        values.append(value)
+        lookup[value] = code
+    return code
+
+
+def _to_amount(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _to_dates(values: List[Optional[str]]) -> np.ndarray:
+    """Parse YYYY-MM-DD strings to datetime64[D], using NaT for anything invalid"""
+    cleaned = [value or "NaT" for value in values]
+    try:
+        return np.array(cleaned, dtype="datetime64[D]")
+    except ValueError:
+        parsed = np.full(len(cleaned), np.datetime64("NaT"), dtype="datetime64[D]")
+        for i, value in enumerate(cleaned):
+            try:
+                parsed[i] = np.datetime64(value, "D")
+            except ValueError:
+                pass
+        return parsed
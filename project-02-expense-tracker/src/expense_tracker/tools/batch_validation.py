@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Vectorized Batch Validation for Expense Tracker
+Validates a columnar frame of candidate records with pandas instead of one dict at a time
+"""
+
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .vendor_index import canonical_vendor
+
+REQUIRED_FIELDS = ("amount", "vendor", "date")
+
+# Check name -> message; ERROR_CHECKS reject a row, WARNING_CHECKS only annotate it
+ERROR_CHECKS = {
+    "missing_amount": "Missing required field: amount",
+    "missing_vendor": "Missing required field: vendor",
+    "missing_date": "Missing required field: date",
+    "invalid_amount": "Amount must be a valid number",
+    "invalid_date": "Date must be a valid YYYY-MM-DD date",
+}
+WARNING_CHECKS = {
+    "non_positive_amount": "Amount should be greater than 0",
+    "duplicate_in_ledger": "Possible duplicate of an existing expense (same date, amount and vendor)",
+    "near_duplicate_in_ledger": "Possible duplicate of an existing expense (same amount within a day, similar vendor)",
+    "duplicate_in_batch": "Duplicate of an earlier record in this batch (same date, amount and vendor)",
+}
+# Warning checks that become errors under the "reject" duplicate policy
+DUPLICATE_CHECKS = ("duplicate_in_ledger", "near_duplicate_in_ledger", "duplicate_in_batch")
+
+_ISO_DATE_FORMAT = "%Y-%m-%d"
+_ISO_DATE_LENGTH = len("YYYY-MM-DD")
+
+
+def coerce_amounts(values: pd.Series) -> pd.Series:
+    """
+    Parse amounts as float64, accepting "$1,234.50" and accounting-style
+    "(12.00)" negatives; anything else becomes NaN
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.astype("float64")
+    amounts = pd.to_numeric(values, errors="coerce").astype("float64")
+
+    # Only the rows plain parsing rejected go through the (slower) clean-up
+    retry = amounts.isna() & values.notna()
+    if retry.any():
+        text = values[retry].astype("string").str.strip()
+        negative = text.str.startswith("(", na=False) & text.str.endswith(")", na=False)
+        cleaned = pd.to_numeric(text.str.replace(r"[$,()\s]", "", regex=True), errors="coerce").astype("float64")
+        amounts[retry] = cleaned.where(~negative, -cleaned).to_numpy()
+    return amounts
+
+
+def parse_iso_dates(values: pd.Series) -> pd.Series:
+    """Parse strictly formatted YYYY-MM-DD dates (real calendar dates only); others become NaT"""
+    if not (pd.api.types.is_object_dtype(values) or pd.api.types.is_string_dtype(values)):
+        # Columns read as numbers (20240115) have no .str accessor; as text they fail the checks below
+        values = values.astype("string")
+    dates = pd.to_datetime(values, format=_ISO_DATE_FORMAT, errors="coerce")
+    # to_datetime also accepts unpadded months and days ("2024-1-5")
+    dates = dates.where(values.str.len().eq(_ISO_DATE_LENGTH).fillna(False).astype(bool))
+
+    retry = dates.isna() & values.notna()
+    if retry.any():
+        text = values[retry].astype("string").str.strip()
+        retried = pd.to_datetime(text, format=_ISO_DATE_FORMAT, errors="coerce")
+        dates[retry] = retried.where(text.str.len().eq(_ISO_DATE_LENGTH).fillna(False).astype(bool))
+    return dates
+
+
+def _normalize_vendor(vendor) -> str:
+    # Same key as the DuplicateIndex, so batch and single-record checks agree
+    return canonical_vendor(vendor) if isinstance(vendor, str) else ""
+
+
+def duplicate_hashes(dates: pd.Series, amounts: pd.Series, vendors: pd.Series) -> np.ndarray:
+    """
+    uint64 hash of (date, amount in cents, normalized vendor) per row
+
+    dates are YYYY-MM-DD strings; callers hash the cleaned values so ledger
+    rows and candidates agree on the representation.
+    """
+    # Vendors repeat heavily, so normalize each distinct name once
+    codes, uniques = pd.factorize(vendors.to_numpy(dtype=object), use_na_sentinel=False)
+    normalized = np.array([_normalize_vendor(vendor) for vendor in uniques], dtype=object)
+    key = pd.DataFrame({
+        "date": dates.fillna("").to_numpy(dtype=object),
+        "cents": (amounts.astype("float64") * 100).round().fillna(0).astype("int64").to_numpy(),
+        "vendor": normalized[codes] if len(codes) else normalized,
+    })
+    return pd.util.hash_pandas_object(key, index=False).to_numpy()
+
+
+def ledger_hashes(rows: Iterable[Dict]) -> np.ndarray:
+    """Duplicate hashes of ledger rows (already stored, so no cleaning needed)"""
+    frame = pd.DataFrame(list(rows), columns=["date", "amount", "vendor"])
+    if frame.empty:
+        return np.empty(0, dtype=np.uint64)
+    return duplicate_hashes(frame["date"], coerce_amounts(frame["amount"]), frame["vendor"])
+
+
+class BatchValidationResult:
+    """
+    Outcome of validate_frame
+
+    - frame: the candidate records with date and amount cleaned
+    - masks: one boolean column per check, True where the row failed it
+    - valid: True for rows without any error check failing (duplicate
+      checks count as errors when reject_duplicates is set)
+    """
+
+    def __init__(self, frame: pd.DataFrame, masks: pd.DataFrame, reject_duplicates: bool = False):
+        self.frame = frame
+        self.masks = masks
+        self.error_checks = dict(ERROR_CHECKS)
+        self.warning_checks = dict(WARNING_CHECKS)
+        if reject_duplicates:
+            for check in DUPLICATE_CHECKS:
+                self.error_checks[check] = self.warning_checks.pop(check)
+        self.valid = ~masks[list(self.error_checks)].any(axis=1)
+
+    def __len__(self) -> int:
+        return len(self.frame)
+
+    def _messages(self, checks: Dict[str, str]) -> List[List[str]]:
+        messages: List[List[str]] = [[] for _ in range(len(self.frame))]
+        for check, message in checks.items():
+            for position in np.flatnonzero(self.masks[check].to_numpy()):
+                messages[position].append(message)
+        return messages
+
+    def to_results(self, records: Optional[List[Dict]] = None) -> List[Dict]:
+        """
+        Per-row results in the shape validate_expense_record returns
+
+        Args:
+            records: The dictionaries the frame was built from; when given, each
+                cleaned_record is a copy of its input with date and amount cleaned
+        """
+        errors = self._messages(self.error_checks)
+        warnings = self._messages(self.warning_checks)
+        if records is None:
+            records = self.frame.astype(object).where(self.frame.notna(), None).to_dict("records")
+        else:
+            date_ok = ~(self.masks["missing_date"] | self.masks["invalid_date"]).to_numpy()
+            amount_ok = ~(self.masks["missing_amount"] | self.masks["invalid_amount"]).to_numpy()
+            cleaned = []
+            for position, (record, date, amount) in enumerate(
+                    zip(records, self.frame["date"].tolist(), self.frame["amount"].tolist())):
+                record = dict(record)
+                if date_ok[position]:
+                    record["date"] = date
+                if amount_ok[position]:
+                    record["amount"] = amount
+                cleaned.append(record)
+            records = cleaned
+        return [
+            {"valid": not row_errors, "errors": row_errors, "warnings": row_warnings, "cleaned_record": record}
+            for record, row_errors, row_warnings in zip(records, errors, warnings)
+        ]
+
+
+def validate_frame(frame: pd.DataFrame, existing_hashes: Optional[np.ndarray] = None,
+                   near_duplicates: Optional[Callable[[List, List, List], np.ndarray]] = None,
+                   duplicate_policy: str = "warn") -> BatchValidationResult:
+    """
+    Validate candidate expense records column by column
+
+    Args:
+        frame: One row per candidate record (date, amount, vendor and any other fields)
+        existing_hashes: duplicate_hashes of the ledger, to flag likely re-imports
+        near_duplicates: Called with the (dates, amounts, vendors) of complete
+            rows that aren't exact ledger duplicates; returns a boolean mask of
+            rows resembling a stored expense (see DuplicateIndex.matches_mask)
+        duplicate_policy: "warn" flags duplicates, "reject" makes them errors
+            and "off" skips the duplicate checks
+
+    Returns:
+        BatchValidationResult with the cleaned frame and per-check row masks
+    """
+    frame = frame.reset_index(drop=True).copy()
+    for field in REQUIRED_FIELDS:
+        if field not in frame.columns:
+            frame[field] = None
+
+    masks = pd.DataFrame(index=frame.index)
+    for field in REQUIRED_FIELDS:
+        values = frame[field]
+        blank = values.isna()
+        if not pd.api.types.is_numeric_dtype(values):
+            blank |= values.eq("").fillna(False).astype(bool)
+        masks[f"missing_{field}"] = blank.to_numpy()
+
+    amounts = coerce_amounts(frame["amount"])
+    masks["invalid_amount"] = (amounts.isna() & ~masks["missing_amount"]).to_numpy()
+    dates = parse_iso_dates(frame["date"])
+    masks["invalid_date"] = (dates.isna() & ~masks["missing_date"]).to_numpy()
+    masks["non_positive_amount"] = (amounts <= 0).to_numpy()
+
+    iso_dates = dates.dt.strftime(_ISO_DATE_FORMAT)
+    frame["amount"] = amounts.where(amounts.notna(), frame["amount"])
+    frame["date"] = iso_dates.where(dates.notna(), frame["date"])
+
+    for check in DUPLICATE_CHECKS:
+        masks[check] = False
+    if duplicate_policy == "off":
+        return BatchValidationResult(frame, masks)
+
+    complete = ~(masks[list(ERROR_CHECKS)].any(axis=1)).to_numpy()
+    hashes = duplicate_hashes(iso_dates, amounts, frame["vendor"])
+    if existing_hashes is not None and len(existing_hashes):
+        masks["duplicate_in_ledger"] = complete & np.isin(hashes, existing_hashes)
+    if near_duplicates is not None:
+        near = np.zeros(len(frame), dtype=bool)
+        candidates = np.flatnonzero(complete & ~masks["duplicate_in_ledger"].to_numpy())
+        if len(candidates):
+            near[candidates] = near_duplicates(iso_dates.iloc[candidates].tolist(),
+                                               amounts.iloc[candidates].tolist(),
+                                               frame["vendor"].iloc[candidates].tolist())
+        masks["near_duplicate_in_ledger"] = near
+    in_batch = np.zeros(len(frame), dtype=bool)
+    candidates = np.flatnonzero(complete)
+    in_batch[candidates] = pd.Series(hashes[candidates]).duplicated(keep="first").to_numpy()
+    masks["duplicate_in_batch"] = in_batch & ~masks["duplicate_in_ledger"].to_numpy()
+
+    return BatchValidationResult(frame, masks, reject_duplicates=duplicate_policy == "reject")
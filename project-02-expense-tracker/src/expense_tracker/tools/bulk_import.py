@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Bulk Expense Import
+Streams CSV or JSONL files (e.g. bank exports) into the expense store in bounded chunks
+"""
+
+import csv
+import json
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import numpy as np
+
+from .batch_validation import ledger_hashes
+from .duplicate_index import duplicate_policy
+
+IMPORT_FORMATS = ("csv", "jsonl")
+
+# Header aliases commonly found in bank and card exports -> expense field
+FIELD_ALIASES = {
+    "date": "date", "transaction_date": "date", "posted_date": "date", "posting_date": "date",
+    "amount": "amount", "debit": "amount", "value": "amount",
+    "vendor": "vendor", "merchant": "vendor", "payee": "vendor", "name": "vendor",
+    "category": "category",
+    "description": "description", "memo": "description", "details": "description",
+    "business_purpose": "business_purpose", "purpose": "business_purpose",
+    "notes": "notes", "note": "notes",
+    "created_at": "created_at",
+}
+
+# Cap on the number of rejected rows reported back to the caller
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_format(filename: Optional[str], explicit: Optional[str] = None) -> str:
+    """Pick the import format from an explicit value or the file extension"""
+    fmt = (explicit or Path(filename or "").suffix.lstrip(".")).lower()
+    if fmt in ("ndjson", "json"):
+        fmt = "jsonl"
+    if fmt not in IMPORT_FORMATS:
+        raise ValueError(f"Unsupported import format '{fmt}'. Use one of: {', '.join(IMPORT_FORMATS)}")
+    return fmt
+
+
+def _normalize_keys(row: Dict) -> Dict:
+    record = {}
+    for key, value in row.items():
+        if key is None:
+            continue
+        field = FIELD_ALIASES.get(key.strip().lower().replace(" ", "_"))
+        if field and field not in record:
+            record[field] = value.strip() if isinstance(value, str) else value
+    return record
+
+
+def iter_records(path: Path, fmt: str) -> Iterator[Dict]:
+    """Yield expense dictionaries from a CSV or JSONL file, one row at a time"""
+    with open(path, "r", newline="", encoding="utf-8-sig") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield _normalize_keys(row)
+        else:
+            for line_number, line in enumerate(f, start=1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield {"_parse_error": f"line {line_number}: {e.msg}"}
+                    continue
+                if not isinstance(row, dict):
+                    yield {"_parse_error": f"line {line_number}: not a JSON object"}
+                    continue
+                yield _normalize_keys(row)
+
+
+def import_expenses(handler, path: Path, fmt: str, chunk_size: int = 5000,
+                    progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+    """
+    Validate and append every record of an import file, chunk by chunk
+
+    Args:
+        handler: ExpenseCSVHandler (or compatible backend)
+        path: File to import
+        fmt: "csv" or "jsonl"
+        chunk_size: Rows validated and written together with one buffered append
+        progress: Optional callback receiving the running totals after each chunk
+
+    Returns:
+        Dictionary with rows_processed, rows_imported, rows_rejected and errors
+    """
+    totals = {"rows_processed": 0, "rows_imported": 0, "rows_rejected": 0, "errors": []}
+
+    # Hash the ledger once for the whole import and add each chunk's saved
+    # rows to it, instead of rescanning the ledger for every chunk
+    ledger = handler.ledger_duplicate_hashes() if duplicate_policy() != "off" else None
+
+    def reject(row_number: int, errors: List[str]) -> None:
+        totals["rows_rejected"] += 1
+        if len(totals["errors"]) < MAX_REPORTED_ERRORS:
+            totals["errors"].append({"row": row_number, "errors": errors})
+
+    def flush(chunk: List[Dict]) -> None:
+        nonlocal ledger
+        first_row = totals["rows_processed"] + 1
+        parsed = []
+        for offset, record in enumerate(chunk):
+            if "_parse_error" in record:
+                reject(first_row + offset, [record["_parse_error"]])
+            else:
+                parsed.append((first_row + offset, record))
+
+        results = handler.validate_expense_records([record for _, record in parsed], ledger)
+        valid = []
+        for (row_number, _), result in zip(parsed, results):
+            if result["valid"]:
+                valid.append(result["cleaned_record"])
+            else:
+                reject(row_number, result["errors"])
+
+        written = handler.add_expenses(valid)
+        totals["rows_imported"] += written
+        if ledger is not None and written:
+            ledger = np.concatenate([ledger, ledger_hashes(valid[:written])])
+        totals["rows_processed"] += len(chunk)
+        if progress:
+            progress(dict(totals, errors=list(totals["errors"])))
+
+    chunk: List[Dict] = []
+    for record in iter_records(path, fmt):
+        chunk.append(record)
+        if len(chunk) >= chunk_size:
+            flush(chunk)
+            chunk = []
+    if chunk:
+        flush(chunk)
+
+    return totals
@@ -4,19 +4,35 @@ CSV Handler for Expense Tracker
 Manages expense data storage and retrieval in CSV format
 """
 
+import calendar
 import csv
+import numpy as np
 import pandas as pd
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, Iterator, List, Optional
 from datetime import datetime, timezone
 import json
 import os
 
+from .batch_validation import WARNING_CHECKS, BatchValidationResult, validate_frame
+from .csv_scanner import scan_expenses
+from .duplicate_index import duplicate_policy, get_duplicate_index
+from .expense_store import get_expense_store
+from .expense_writer import get_expense_writer
+from .file_lock import FileLock
+from .pagination import validate_page_request
+from .tenants import TenantCatalog, current_tenant, get_tenant_catalog
+from .vendor_index import observe_expenses
+
+# Shared ledger location; tenant shards live under DEFAULT_DATA_DIR/tenants/
+DEFAULT_DATA_DIR = "/app/data"
+
 class ExpenseCSVHandler:
     """Handles CSV operations for expense tracking data"""
     
-    def __init__(self, data_dir: str = "/app/data"):
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, tenant_id: Optional[str] = None):
         self.data_dir = Path(data_dir)
+        self.tenant_id = tenant_id
         self.expenses_file = self.data_dir / "expenses.csv"
         self.subscriptions_file = self.data_dir / "subscriptions.csv"
         
@@ -31,13 +47,27 @@ class ExpenseCSVHandler:
         
         # Initialize CSV files if they don't exist
         self._initialize_csv_files()
+        
+        # Shared, indexed in-memory copy of the expenses file
+        self._store = get_expense_store(self.expenses_file)
+        
+        # Shared writer queue that batches appends from every caller
+        self._writer = get_expense_writer(self.expenses_file, self.expense_headers, self._store)
+        
+        # Shared (day, amount) index of this ledger for duplicate checks on ingest
+        self.duplicates = get_duplicate_index(
+            self.data_dir, lambda: self.scan_expenses(columns=["date", "amount", "vendor"]),
+            signature=self.ledger_signature
+        )
     
     def _initialize_csv_files(self):
         """Initialize CSV files with headers if they don't exist"""
         if not self.expenses_file.exists():
-            with open(self.expenses_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(self.expense_headers)
+            with FileLock(self.expenses_file.with_name(f"{self.expenses_file.name}.lock")):
+                if not self.expenses_file.exists():
+                    with open(self.expenses_file, 'w', newline='', encoding='utf-8') as f:
+                        writer = csv.writer(f)
+                        writer.writerow(self.expense_headers)
     
     def add_expense(self, expense_record: Dict) -> bool:
         """
@@ -50,22 +80,11 @@ class ExpenseCSVHandler:
             bool: True if successful, False otherwise
         """
         try:
-            # Ensure all required fields are present
-            csv_record = {
-                "date": expense_record.get("date", ""),
-                "amount": expense_record.get("amount", 0.0),
-                "vendor": expense_record.get("vendor", ""),
-                "category": expense_record.get("category", "OTHER"),
-                "description": expense_record.get("description", ""),
-                "business_purpose": expense_record.get("business_purpose", ""),
-                "notes": expense_record.get("notes", ""),
-                "created_at": expense_record.get("created_at", datetime.now(timezone.utc).isoformat())
-            }
+            csv_record = self._build_csv_record(expense_record)
             
-            # Append to CSV file
-            with open(self.expenses_file, 'a', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=self.expense_headers)
-                writer.writerow(csv_record)
+            # Append through the shared writer queue (batched, locked, fsync per policy)
+            self._writer.write([csv_record])
+            self._record_saved([csv_record])
             
             return True
             
@@ -73,32 +92,123 @@ class ExpenseCSVHandler:
             print(f"Error adding expense to CSV: {e}")
             return False
     
-    def get_all_expenses(self) -> List[Dict]:
+    def add_expenses(self, expense_records: List[Dict]) -> int:
+        """
+        Add several expense records with a single buffered append
+        
+        Args:
+            expense_records: List of dictionaries containing expense data
+            
+        Returns:
+            int: Number of records written
+        """
+        csv_records = [self._build_csv_record(record) for record in expense_records]
+        written = self._writer.write(csv_records)
+        self._record_saved(csv_records[:written])
+        return written
+    
+    def _record_saved(self, csv_records: List[Dict]) -> None:
+        """Feed saved expenses to the category and duplicate indexes"""
+        observe_expenses(csv_records, self.tenant_id)
+        self.duplicates.add(csv_records)
+    
+    def _build_csv_record(self, expense_record: Dict) -> Dict:
+        """Ensure all required fields are present, in CSV schema order"""
+        return {
+            "date": expense_record.get("date", ""),
+            "amount": expense_record.get("amount", 0.0),
+            "vendor": expense_record.get("vendor", ""),
+            "category": expense_record.get("category", "OTHER"),
+            "description": expense_record.get("description", ""),
+            "business_purpose": expense_record.get("business_purpose", ""),
+            "notes": expense_record.get("notes", ""),
+            "created_at": expense_record.get("created_at", datetime.now(timezone.utc).isoformat())
+        }
+    
+    def get_all_expenses(self, columns: Optional[List[str]] = None) -> List[Dict]:
         """
         Retrieve all expense records from CSV
         
+        Args:
+            columns: Optional list of columns to return (uses the scanning mode)
+        
         Returns:
             List of expense dictionaries
         """
+        if columns:
+            return self.scan_expenses(columns=columns)
+        
         try:
-            if not self.expenses_file.exists():
-                return []
-            
-            expenses = []
-            with open(self.expenses_file, 'r', newline='', encoding='utf-8') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    # Convert amount to float
-                    if row['amount']:
-                        row['amount'] = float(row['amount'])
-                    expenses.append(row)
-            
-            return expenses
+            return self._store.all()
             
         except Exception as e:
             print(f"Error reading expenses from CSV: {e}")
             return []
     
+    def scan_expenses(self, columns: Optional[List[str]] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Dict]:
+        """
+        Scan the CSV file directly, materializing only the requested columns
+        
+        Rows that fail the date/category predicates are rejected on raw bytes and
+        never decoded. Useful for one-off queries that don't need full records.
+        
+        Args:
+            columns: Columns to return, e.g. ["date", "amount"] (default: all)
+            start_date: Optional inclusive start date in YYYY-MM-DD format
+            end_date: Optional inclusive end date in YYYY-MM-DD format
+            category: Optional category filter (case-insensitive)
+            
+        Returns:
+            List of dictionaries holding only the requested columns
+        """
+        try:
+            return scan_expenses(self.expenses_file, columns, start_date, end_date, category)
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Error scanning expenses CSV: {e}")
+            return []
+    
+    def iter_expenses(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Lazily iterate over expenses in file order, for streaming exports
+        
+        Args:
+            start_date: Optional inclusive start date in YYYY-MM-DD format
+            end_date: Optional inclusive end date in YYYY-MM-DD format
+            category: Optional category filter (case-insensitive)
+            
+        Returns:
+            Iterator of expense dictionaries
+        """
+        return self._store.iter_rows(start_date, end_date, category)
+    
+    def get_expenses_page(self, sort_by: str = "date", descending: bool = False,
+                          cursor: Optional[str] = None, limit: Optional[int] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None,
+                          category: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+        """
+        Get one keyset-paginated page of expenses
+        
+        Args:
+            sort_by: "date", "amount" or "vendor" (ties broken by created_at)
+            descending: Sort in descending order
+            cursor: next_cursor from the previous page, None for the first page
+            limit: Page size (None returns every remaining row)
+            start_date: Optional inclusive start date in YYYY-MM-DD format
+            end_date: Optional inclusive end date in YYYY-MM-DD format
+            category: Optional category filter (case-insensitive)
+            fields: Optional list of fields to return
+            
+        Returns:
+            Dictionary with "expenses" and "next_cursor" (None on the last page)
+        """
+        validate_page_request(sort_by, limit, fields, self.expense_headers)
+        return self._store.page(sort_by, descending, cursor, limit, start_date, end_date, category, fields)
+    
     def get_expenses_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
         """
         Get expenses within a date range
@@ -110,15 +220,11 @@ class ExpenseCSVHandler:
         Returns:
             List of expense dictionaries within date range
         """
-        all_expenses = self.get_all_expenses()
-        filtered_expenses = []
-        
-        for expense in all_expenses:
-            expense_date = expense.get('date', '')
-            if start_date <= expense_date <= end_date:
-                filtered_expenses.append(expense)
-        
-        return filtered_expenses
+        try:
+            return self._store.by_date_range(start_date, end_date)
+        except Exception as e:
+            print(f"Error reading expenses from CSV: {e}")
+            return []
     
     def get_expenses_by_category(self, category: str) -> List[Dict]:
         """
@@ -130,80 +236,92 @@ class ExpenseCSVHandler:
         Returns:
             List of expense dictionaries for the category
         """
-        all_expenses = self.get_all_expenses()
-        return [exp for exp in all_expenses if exp.get('category', '').upper() == category.upper()]
+        try:
+            return self._store.by_category(category)
+        except Exception as e:
+            print(f"Error reading expenses from CSV: {e}")
+            return []
+    
+    def get_category_totals(self, year: Optional[int] = None, month: Optional[int] = None) -> Dict:
+        """
+        Get total and count per category from the monthly rollup
+        
+        Args:
+            year: Optional year (e.g., 2024)
+            month: Optional month (1-12); all-time totals when year/month are omitted
+            
+        Returns:
+            Dictionary mapping each category to {'total': float, 'count': int}
+        """
+        return self._store.category_totals(year, month)
     
-    def get_monthly_summary(self, year: int, month: int) -> Dict:
+    def get_monthly_summary(self, year: int, month: int, include_expenses: bool = False,
+                            offset: int = 0, limit: Optional[int] = None) -> Dict:
         """
         Get monthly expense summary by category
         
         Args:
             year: Year (e.g., 2024)
             month: Month (1-12)
+            include_expenses: Also return the month's individual expenses
+            offset: Number of expenses to skip when include_expenses is set
+            limit: Maximum number of expenses to return when include_expenses is set
             
         Returns:
             Dictionary with category totals and overall summary
         """
-        # Create date range for the month
-        start_date = f"{year}-{month:02d}-01"
-        if month == 12:
-            end_date = f"{year+1}-01-01"
-        else:
-            end_date = f"{year}-{month+1:02d}-01"
-        
-        expenses = self.get_expenses_by_date_range(start_date, end_date)
+        category_totals = self.get_category_totals(year, month)
         
-        # Group by category
-        category_totals = {}
-        total_amount = 0.0
-        
-        for expense in expenses:
-            category = expense.get('category', 'OTHER')
-            amount = expense.get('amount', 0.0)
-            
-            if category not in category_totals:
-                category_totals[category] = {'total': 0.0, 'count': 0, 'expenses': []}
-            
-            category_totals[category]['total'] += amount
-            category_totals[category]['count'] += 1
-            category_totals[category]['expenses'].append(expense)
-            total_amount += amount
-        
-        return {
+        summary = {
             'year': year,
             'month': month,
-            'total_amount': total_amount,
-            'total_expenses': len(expenses),
+            'total_amount': sum(totals['total'] for totals in category_totals.values()),
+            'total_expenses': sum(totals['count'] for totals in category_totals.values()),
             'categories': category_totals
         }
+        
+        if include_expenses:
+            start_date = f"{year}-{month:02d}-01"
+            end_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+            expenses = self.get_expenses_by_date_range(start_date, end_date)
+            end = None if limit is None else offset + limit
+            summary['expenses'] = expenses[offset:end]
+            summary['offset'] = offset
+            summary['limit'] = limit
+        
+        return summary
     
-    def search_expenses(self, query: str) -> List[Dict]:
+    def get_expense_totals(self, group_by: str = "category",
+                           start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict:
         """
-        Search expenses by vendor, description, or business purpose
+        Get expense totals grouped by category, month or vendor
         
         Args:
-            query: Search query string
+            group_by: One of "category", "month" (YYYY-MM) or "vendor"
+            start_date: Optional inclusive start date in YYYY-MM-DD format
+            end_date: Optional inclusive end date in YYYY-MM-DD format
             
         Returns:
-            List of matching expense dictionaries
-        """
-        all_expenses = self.get_all_expenses()
-        query_lower = query.lower()
-        
-        matching_expenses = []
-        for expense in all_expenses:
-            # Search in vendor, description, business_purpose, and notes
-            searchable_fields = [
-                expense.get('vendor', ''),
-                expense.get('description', ''),
-                expense.get('business_purpose', ''),
-                expense.get('notes', '')
-            ]
-            
-            if any(query_lower in field.lower() for field in searchable_fields):
-                matching_expenses.append(expense)
+            Dictionary mapping each group to {'total': float, 'count': int}
+        """
+        return self._store.totals(group_by, start_date, end_date)
+    
+    def search_expenses(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Search expenses by vendor, description, business purpose, or notes
         
-        return matching_expenses
+        Args:
+            query: Search query string (case-insensitive substring)
+            limit: Optional maximum number of results
+            
+        Returns:
+            List of matching expense dictionaries, best matches first
+        """
+        try:
+            return self._store.search(query, limit)
+        except Exception as e:
+            print(f"Error searching expenses: {e}")
+            return []
     
     def export_to_json(self, output_file: Optional[str] = None) -> str:
         """
@@ -234,15 +352,14 @@ class ExpenseCSVHandler:
         if not self.expenses_file.exists():
             return {"exists": False}
         
-        expenses = self.get_all_expenses()
-        file_size = self.expenses_file.stat().st_size
+        file_stat = self.expenses_file.stat()
         
         return {
             "exists": True,
             "file_path": str(self.expenses_file),
-            "file_size_bytes": file_size,
-            "total_records": len(expenses),
-            "last_modified": datetime.fromtimestamp(self.expenses_file.stat().st_mtime).isoformat()
+            "file_size_bytes": file_stat.st_size,
+            "total_records": len(self._store),
+            "last_modified": datetime.fromtimestamp(file_stat.st_mtime).isoformat()
         }
     
     def validate_expense_record(self, record: Dict) -> Dict:
@@ -284,12 +401,110 @@ class ExpenseCSVHandler:
         if date_str and len(date_str) < 8:  # Basic length check
             validation_result["warnings"].append("Date format may be invalid (expected YYYY-MM-DD)")
         
+        # Duplicate check against the ledger (O(1) index lookup)
+        policy = duplicate_policy()
+        if validation_result["valid"] and policy != "off":
+            if policy == "reject":
+                # Don't let a missing or stale index wave a duplicate through
+                self.duplicates.wait_until_current()
+            cleaned = validation_result["cleaned_record"]
+            match = self.duplicates.find(cleaned.get("date"), cleaned.get("amount"), cleaned.get("vendor"))
+            if match:
+                message = WARNING_CHECKS["duplicate_in_ledger" if match == "exact" else "near_duplicate_in_ledger"]
+                if policy == "reject":
+                    validation_result["valid"] = False
+                    validation_result["errors"].append(message)
+                else:
+                    validation_result["warnings"].append(message)
+        
         return validation_result
 
+    def ledger_signature(self):
+        """(mtime_ns, size) of the expenses file; the duplicate index rebuilds when it changes"""
+        return self._store.file_signature()
+
+    def ledger_duplicate_hashes(self):
+        """(date, amount, vendor) hashes of the stored expenses (see batch_validation)"""
+        return self._store.duplicate_hashes()
+    
+    def validate_expense_frame(self, frame: pd.DataFrame,
+                               ledger_hashes: Optional[np.ndarray] = None) -> BatchValidationResult:
+        """
+        Vectorized validation of a frame of candidate records
+        
+        Dates must be real YYYY-MM-DD dates, amounts are coerced to float and
+        rows matching an existing expense (or an earlier row) on date, amount
+        and vendor, or a stored expense with the same amount within a day and
+        a similar vendor, are flagged as likely duplicates (rejected under
+        EXPENSE_DUPLICATE_POLICY=reject).
+        
+        Args:
+            frame: One row per candidate expense record
+            ledger_hashes: ledger_duplicate_hashes() already computed by the
+                caller (e.g. once per bulk import); hashed now when omitted
+            
+        Returns:
+            BatchValidationResult with the cleaned frame and per-check error masks
+        """
+        policy = duplicate_policy()
+        if policy == "off":
+            return validate_frame(frame, duplicate_policy=policy)
+        if policy == "reject":
+            self.duplicates.wait_until_current()
+        if ledger_hashes is None:
+            ledger_hashes = self.ledger_duplicate_hashes()
+        return validate_frame(frame, ledger_hashes,
+                              near_duplicates=self.duplicates.matches_mask, duplicate_policy=policy)
+    
+    def validate_expense_records(self, records: List[Dict],
+                                 ledger_hashes: Optional[np.ndarray] = None) -> List[Dict]:
+        """
+        Validate a batch of expense records (bulk import path)
+        
+        Args:
+            records: List of expense record dictionaries
+            ledger_hashes: Optional precomputed ledger_duplicate_hashes()
+            
+        Returns:
+            List of validation results, one per record, in input order
+        """
+        if not records:
+            return []
+        return self.validate_expense_frame(pd.DataFrame.from_records(records), ledger_hashes).to_results(records)
+
 # Convenience functions for easy import
-def get_csv_handler() -> ExpenseCSVHandler:
-    """Get a CSV handler instance"""
-    return ExpenseCSVHandler()
+def tenant_catalog() -> TenantCatalog:
+    """Catalog of the tenant shards under the default data directory"""
+    return get_tenant_catalog(Path(DEFAULT_DATA_DIR))
+
+def get_csv_handler(tenant_id: Optional[str] = None) -> ExpenseCSVHandler:
+    """
+    Get a handler instance for the configured storage backend
+    
+    EXPENSE_STORAGE_BACKEND selects the backend: "csv" (default), "segments" or "sqlite"
+    
+    Args:
+        tenant_id: Tenant whose shard to open (default: the current request's
+            tenant); without a tenant the shared ledger is used
+    
+    Raises:
+        ValueError: If the tenant id is not valid
+        UnknownTenantError: If the tenant isn't registered in the catalog
+    """
+    backend = os.environ.get("EXPENSE_STORAGE_BACKEND", "csv").lower()
+    if backend == "segments":
+        from .segment_handler import ExpenseSegmentHandler
+        handler_class = ExpenseSegmentHandler
+    elif backend == "sqlite":
+        from .sqlite_handler import ExpenseSQLiteHandler
+        handler_class = ExpenseSQLiteHandler
+    else:
+        handler_class = ExpenseCSVHandler
+    
+    tenant_id = tenant_id or current_tenant.get()
+    if not tenant_id:
+        return handler_class()
+    return handler_class(str(tenant_catalog().shard_dir(tenant_id)), tenant_id)
 
 def add_expense_to_csv(expense_record: Dict) -> bool:
     """Quick function to add an expense to CSV"""
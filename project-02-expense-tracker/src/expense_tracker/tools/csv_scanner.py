@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Memory-mapped CSV Scanner for Expense Tracker
+Finds rows with bytes-level searches and decodes only the rows and columns a query needs
+"""
+
+import csv
+import mmap
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence
+
+_UTF8_BOM = b"\xef\xbb\xbf"
+
+
+def _split_quoted(raw: bytes) -> List[str]:
+    """Parse one CSV record containing quotes with the csv module (slow path)"""
+    return next(csv.reader([raw.decode("utf-8")]), [])
+
+
+def scan_expenses(expenses_file: Path,
+                  columns: Optional[Sequence[str]] = None,
+                  start_date: Optional[str] = None,
+                  end_date: Optional[str] = None,
+                  category: Optional[str] = None) -> List[Dict]:
+    """
+    Scan an expenses CSV file without building a dict per row
+
+    Row boundaries are found with bytes.find on a memory map. The date and
+    category predicates are evaluated on the raw bytes, so rows that fail them
+    are never decoded, and only the requested columns are materialized.
+
+    Args:
+        expenses_file: Path to the CSV file (first line is the header)
+        columns: Columns to return (default: every column in the header)
+        start_date: Optional inclusive start date (YYYY-MM-DD)
+        end_date: Optional inclusive end date (YYYY-MM-DD)
+        category: Optional category filter (case-insensitive)
+
+    Returns:
+        List of dictionaries holding only the requested columns, in file order
+    """
+    path = Path(expenses_file)
+    if not path.exists() or path.stat().st_size == 0:
+        return []
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        size = len(buffer)
+        header_end = buffer.find(b"\n")
+        if header_end == -1:
+            header_end = size
+        header_line = bytes(buffer[:header_end]).rstrip(b"\r")
+        if header_line.startswith(_UTF8_BOM):
+            header_line = header_line[len(_UTF8_BOM):]
+        headers = _split_quoted(header_line) if b'"' in header_line else header_line.decode("utf-8").split(",")
+
+        wanted = list(columns) if columns else headers
+        unknown = [column for column in wanted if column not in headers]
+        if unknown:
+            raise ValueError(f"Unknown expense columns: {', '.join(unknown)}")
+        positions = [(column, headers.index(column)) for column in wanted]
+
+        date_pos = headers.index("date") if "date" in headers else None
+        category_pos = headers.index("category") if "category" in headers else None
+        # Predicate bounds as bytes (fast path) and as str (rows parsed by the csv module)
+        bounds = {
+            False: (start_date.encode("utf-8") if start_date else None,
+                    end_date.encode("utf-8") if end_date else None,
+                    category.upper().encode("utf-8") if category is not None else None,
+                    b""),
+            True: (start_date or None, end_date or None,
+                   category.upper() if category is not None else None, ""),
+        }
+        filter_dates = date_pos is not None and (start_date or end_date)
+        filter_category = category_pos is not None and category is not None
+        n_columns = len(headers)
+
+        # Date bounds as bytes for the raw pre-filter on unquoted rows
+        low_bytes, high_bytes = bounds[False][0], bounds[False][1]
+
+        results: List[Dict] = []
+        for raw in _iter_records(buffer, header_end + 1):
+            raw = raw.rstrip(b"\r")
+            if not raw:
+                continue  # csv.DictReader skips blank lines too
+
+            quoted = b'"' in raw
+            if filter_dates and not quoted:
+                # Cut out just the date field and reject the row before splitting it
+                # (short rows have no date field here; the padded path below checks them)
+                leading = raw.split(b",", date_pos + 1)
+                row_date = leading[date_pos] if len(leading) > date_pos else None
+                if row_date is not None and (
+                        (low_bytes is not None and row_date < low_bytes) or
+                        (high_bytes is not None and row_date > high_bytes)):
+                    continue
+
+            fields: List = raw.split(b",")
+            decoded = False
+            if quoted or len(fields) != n_columns:
+                fields = _split_quoted(raw)
+                fields += [None] * (n_columns - len(fields))
+                decoded = True
+
+            if decoded or filter_category:
+                low, high, wanted_category, empty = bounds[decoded]
+                if filter_dates and decoded:
+                    row_date = fields[date_pos] or empty
+                    if (low is not None and row_date < low) or (high is not None and row_date > high):
+                        continue
+                if filter_category and (fields[category_pos] or empty).upper() != wanted_category:
+                    continue
+
+            row = {}
+            for column, index in positions:
+                value = fields[index]
+                if value is not None and not decoded:
+                    value = value.decode("utf-8")
+                if column == "amount" and value:
+                    try:
+                        value = float(value)
+                    except ValueError:
+                        pass  # keep the text of a malformed amount rather than fail the scan
+                row[column] = value
+            results.append(row)
+
+    return results
+
+
+def _iter_records(buffer: mmap.mmap, start: int) -> Iterator[bytes]:
+    """
+    Yield raw CSV records from a memory map, starting at byte offset start
+
+    Records are cut out one at a time, so only the current record is copied
+    out of the map (never the whole file).
+    """
+    size = len(buffer)
+    # Without any quote in the file every newline is a record boundary
+    quoting = buffer.find(b'"', start) != -1
+
+    pos = start
+    while pos < size:
+        end = buffer.find(b"\n", pos)
+        if end == -1:
+            end = size
+        raw = buffer[pos:end]
+
+        # A quoted field may contain newlines: extend until the quotes balance
+        if quoting and b'"' in raw:
+            while raw.count(b'"') % 2 and end < size:
+                next_end = buffer.find(b"\n", end + 1)
+                end = size if next_end == -1 else next_end
+                raw = buffer[pos:end]
+        pos = end + 1
+        yield raw
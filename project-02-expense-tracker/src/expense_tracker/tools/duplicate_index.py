@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+"""
+Duplicate Expense Index
+Hash index over (day, amount in cents) that finds exact and near-duplicate expenses in O(1)
+"""
+
+import difflib
+import os
+import sys
+import threading
+import time
+from datetime import date
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+from .vendor_index import canonical_vendor
+
+DUPLICATE_POLICIES = ("warn", "reject", "off")
+
+# Minimum difflib ratio for two vendor names to count as the same merchant
+NEAR_VENDOR_CUTOFF = 0.85
+
+# Vendors this long or longer also match when one is a prefix of the other
+# ("amazon" / "amazon marketplace")
+MIN_PREFIX_VENDOR_LENGTH = 4
+
+_CENTS_BITS = 40
+
+
+def duplicate_policy() -> str:
+    """EXPENSE_DUPLICATE_POLICY: "warn" (default), "reject" or "off" for likely duplicates"""
+    policy = os.environ.get("EXPENSE_DUPLICATE_POLICY", "warn").lower()
+    if policy not in DUPLICATE_POLICIES:
+        print(f"Unknown EXPENSE_DUPLICATE_POLICY {policy!r}, using 'warn'")
+        return "warn"
+    return policy
+
+
+def _day(value) -> Optional[int]:
+    try:
+        return date.fromisoformat(value).toordinal() if isinstance(value, str) else None
+    except ValueError:
+        return None
+
+
+def _cents(value) -> Optional[int]:
+    try:
+        amount = float(value)
+    except (TypeError, ValueError):
+        return None
+    return round(amount * 100) if amount == amount else None
+
+
+def _key(day: int, cents: int) -> int:
+    # One int per bucket keeps a 1M-row index compact (no tuple keys)
+    return (day << _CENTS_BITS) | (cents & ((1 << _CENTS_BITS) - 1))
+
+
+def _insert(buckets: Dict[int, Union[str, List[str]]], date_value, amount, vendor_key: str) -> int:
+    """Add one expense to a bucket map; returns 1 if it was indexed, 0 if it lacks a key field"""
+    day, cents = _day(date_value), _cents(amount)
+    if day is None or cents is None or not vendor_key:
+        return 0
+    key = _key(day, cents)
+    existing = buckets.get(key)
+    if existing is None:
+        buckets[key] = vendor_key
+    elif isinstance(existing, str):
+        buckets[key] = [existing, vendor_key]
+    else:
+        existing.append(vendor_key)
+    return 1
+
+
+def similar_vendors(a: str, b: str) -> bool:
+    """True when two canonical vendor keys most likely name the same merchant"""
+    if a == b:
+        return True
+    if min(len(a), len(b)) >= MIN_PREFIX_VENDOR_LENGTH and (a.startswith(b) or b.startswith(a)):
+        return True
+    matcher = difflib.SequenceMatcher(None, a, b)
+    return matcher.quick_ratio() >= NEAR_VENDOR_CUTOFF and matcher.ratio() >= NEAR_VENDOR_CUTOFF
+
+
+class DuplicateIndex:
+    """
+    Index of a ledger's expenses by (day, amount in cents)
+
+    - exact duplicate: same day, same amount, same canonical vendor
+    - near duplicate: same amount within window_days and a similar vendor
+      (fuzzy match or prefix), e.g. a receipt entered once on the purchase
+      date and again on the posting date
+
+    A lookup probes 2 * window_days + 1 buckets, so its cost doesn't depend
+    on the ledger size. Built from a column scan on first use, kept current
+    by add() as expenses are saved, and rebuilt when the ledger's signature
+    (e.g. its mtime and size) shows a write from another process, or every
+    refresh_seconds without one. Scans run on a background thread so a lookup
+    never waits for one: until the first build finishes nothing is reported
+    as a duplicate, and during a rebuild the previous index serves. Callers
+    that must not miss a duplicate call wait_until_current() first.
+    """
+
+    def __init__(self, source: Optional[Callable[[], Iterable[Dict]]] = None,
+                 window_days: Optional[int] = None, refresh_seconds: Optional[float] = None,
+                 signature: Optional[Callable[[], object]] = None):
+        self.source = source
+        self.signature = signature
+        self.window_days = window_days if window_days is not None else int(
+            os.environ.get("EXPENSE_DUPLICATE_WINDOW_DAYS", "1")
+        )
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.environ.get("EXPENSE_DUPLICATE_INDEX_REFRESH_SECONDS", "3600")
+        )
+        # Bucket key -> canonical vendor, or a list of them when several share the bucket
+        self._buckets: Dict[int, Union[str, List[str]]] = {}
+        self._size = 0
+        self._built_at: Optional[float] = None
+        # Ledger signature the index reflects (taken before the scan that built it)
+        self._signature = None
+        self._lock = threading.RLock()
+
+        # Set while a background build runs; rows saved meanwhile are replayed
+        # into its result, since the scan may have started before they were written
+        self._builder: Optional[threading.Thread] = None
+        self._saved_during_build: List[Dict] = []
+
+        # Counters for monitoring
+        self.lookups = 0
+        self.exact_matches = 0
+        self.near_matches = 0
+
+    def _ensure_built(self) -> None:
+        """Start a background build when the index is missing or stale (call with the lock held)"""
+        if self.source is None or self._builder is not None:
+            return
+        stale = self._built_at is None or time.monotonic() - self._built_at >= self.refresh_seconds
+        if not stale and self.signature is not None:
+            stale = self.signature() != self._signature
+        if not stale:
+            return
+        self._saved_during_build = []
+        self._builder = threading.Thread(target=self.refresh, name="duplicate-index-build", daemon=True)
+        self._builder.start()
+
+    def refresh(self) -> None:
+        """Rebuild the index from the source now, swapping it in when done"""
+        buckets: Dict[int, Union[str, List[str]]] = {}
+        size = 0
+        try:
+            signature = self.signature() if self.signature is not None else None
+            # Vendors repeat heavily, so canonicalize each distinct name once
+            canonical: Dict[str, str] = {}
+            for row in self.source():
+                vendor = row.get("vendor") or ""
+                key = canonical.get(vendor)
+                if key is None:
+                    key = canonical[vendor] = sys.intern(canonical_vendor(vendor))
+                size += _insert(buckets, row.get("date"), row.get("amount"), key)
+        except Exception as e:
+            print(f"Error building duplicate index: {e}")
+            buckets = None
+
+        with self._lock:
+            if buckets is not None:
+                for row in self._saved_during_build:
+                    size += _insert(buckets, row.get("date"), row.get("amount"),
+                                    sys.intern(canonical_vendor(row.get("vendor") or "")))
+                self._buckets, self._size = buckets, size
+                self._signature = signature
+            self._saved_during_build = []
+            self._built_at = time.monotonic()
+            if self._builder is threading.current_thread():
+                self._builder = None
+
+    def wait_until_built(self, timeout: Optional[float] = None) -> bool:
+        """Block until a running background build finishes; returns False on timeout"""
+        builder = self._builder
+        if builder is not None:
+            builder.join(timeout)
+        return self._builder is None or not self._builder.is_alive()
+
+    def wait_until_current(self, timeout: Optional[float] = None) -> bool:
+        """Start a build if the index is missing or stale and wait for it; returns False on timeout"""
+        with self._lock:
+            self._ensure_built()
+        return self.wait_until_built(timeout)
+
+    def add(self, rows: Iterable[Dict]) -> None:
+        """Index newly saved expenses (before the first build they only feed the build)"""
+        with self._lock:
+            if self._builder is not None:
+                rows = list(rows)
+                self._saved_during_build.extend(rows)
+            if self._built_at is None:
+                return
+            for row in rows:
+                vendor = sys.intern(canonical_vendor(row.get("vendor") or ""))
+                self._size += _insert(self._buckets, row.get("date"), row.get("amount"), vendor)
+            if self._builder is None and self.signature is not None:
+                # The save moved the signature; the rows are indexed, so don't rebuild for it
+                self._signature = self.signature()
+
+    def _match(self, day: int, cents: int, vendor_key: str) -> Optional[str]:
+        near = False
+        for offset in range(-self.window_days, self.window_days + 1):
+            bucket = self._buckets.get(_key(day + offset, cents))
+            if bucket is None:
+                continue
+            for known in (bucket,) if isinstance(bucket, str) else bucket:
+                if offset == 0 and known == vendor_key:
+                    return "exact"
+                if not near and similar_vendors(known, vendor_key):
+                    near = True
+        return "near" if near else None
+
+    def _find(self, date_value, amount, vendor_key: str) -> Optional[str]:
+        day, cents = _day(date_value), _cents(amount)
+        if day is None or cents is None or not vendor_key:
+            return None
+        self.lookups += 1
+        match = self._match(day, cents, vendor_key)
+        if match == "exact":
+            self.exact_matches += 1
+        elif match == "near":
+            self.near_matches += 1
+        return match
+
+    def find(self, date_value, amount, vendor) -> Optional[str]:
+        """
+        Look up a candidate expense
+
+        Returns:
+            "exact", "near", or None when no stored expense looks like the same receipt
+        """
+        vendor_key = canonical_vendor(vendor) if isinstance(vendor, str) else ""
+        with self._lock:
+            self._ensure_built()
+            return self._find(date_value, amount, vendor_key)
+
+    def matches_mask(self, dates: List, amounts: List, vendors: List) -> np.ndarray:
+        """Boolean mask, True where a candidate has an exact or near duplicate in the index"""
+        canonical = {vendor: canonical_vendor(vendor) for vendor in set(vendors) if isinstance(vendor, str)}
+        with self._lock:
+            self._ensure_built()
+            if not self._buckets:
+                return np.zeros(len(dates), dtype=bool)
+            return np.array([
+                self._find(date_value, amount, canonical.get(vendor, "") if isinstance(vendor, str) else "")
+                is not None
+                for date_value, amount, vendor in zip(dates, amounts, vendors)
+            ], dtype=bool)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "policy": duplicate_policy(),
+                "indexed_expenses": self._size,
+                "building": self._builder is not None,
+                "window_days": self.window_days,
+                "lookups": self.lookups,
+                "exact_matches": self.exact_matches,
+                "near_matches": self.near_matches,
+            }
+
+
+# Process-wide registry so every handler for the same ledger shares one index
+_indexes: Dict[str, DuplicateIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_duplicate_index(data_dir: Path, source: Callable[[], Iterable[Dict]],
+                        signature: Optional[Callable[[], object]] = None) -> DuplicateIndex:
+    """
+    Get or create the shared index for a ledger directory, built from source
+    on first use and rebuilt whenever signature() changes
+    """
+    key = str(Path(data_dir).resolve())
+    with _indexes_lock:
+        index = _indexes.get(key)
+        if index is None:
+            index = DuplicateIndex(source, signature=signature)
+            _indexes[key] = index
+        return index
@@ -0,0 +1,379 @@
+#!/usr/bin/env python3
+"""
+In-memory Expense Store
+Keeps a resident, indexed copy of expenses.csv so reads don't re-parse the file
+"""
+
+import csv
+import threading
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .aggregation import ExpenseColumns
+from .batch_validation import ledger_hashes
+from .pagination import decode_cursor, encode_cursor, project, sort_key
+from .rollups import MonthlyRollup
+from .search_index import ExpenseSearchIndex
+
+
+class ExpenseStore:
+    """Process-wide expense table with a sorted date index and a category hash index.
+
+    The table is loaded lazily from the CSV file and reloaded whenever the file's
+    mtime or size changes (e.g. the file was edited by hand or by another worker).
+    Appends made through ExpenseCSVHandler update the table in place.
+    """
+
+    def __init__(self, expenses_file: Path):
+        self.expenses_file = Path(expenses_file)
+        self.lock = threading.RLock()
+
+        # Rows in file order; a row id is its position in this list
+        self._rows: List[Dict] = []
+
+        # Sorted date index: parallel lists of (date, row id)
+        self._date_keys: List[str] = []
+        self._date_ids: List[int] = []
+
+        # Category hash index: upper-cased category -> row ids in file order
+        self._category_index: Dict[str, List[int]] = {}
+
+        # Columnar copy for vectorized summaries, built on first use
+        self._columns: Optional[ExpenseColumns] = None
+
+        # Full-text index over the searchable fields, built on first search
+        self._search_index: Optional[ExpenseSearchIndex] = None
+
+        # Keyset pagination indexes: sort field -> sorted (value, created_at, row id) keys
+        self._sort_indexes: Dict[str, List[Tuple]] = {}
+
+        # (date, amount, vendor) duplicate hashes of the first len() rows, extended lazily
+        self._duplicate_hashes: Optional[np.ndarray] = None
+
+        # (mtime_ns, size) of the file the table reflects, None when stale
+        self._signature: Optional[Tuple[int, int]] = None
+
+        # Persisted (month, category) rollup, e.g. expenses_rollups.json next to expenses.csv
+        self._rollup = MonthlyRollup(self.expenses_file.with_name(f"{self.expenses_file.stem}_rollups.json"),
+                                     self.expenses_file.with_name(f"{self.expenses_file.name}.lock"))
+        self._rollup_loaded = False
+
+    def file_signature(self) -> Optional[Tuple[int, int]]:
+        """Return the (mtime_ns, size) of the backing file, or None if it is missing"""
+        try:
+            stat = self.expenses_file.stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def refresh(self) -> None:
+        """Reload the table if the backing file changed since it was last read"""
+        with self.lock:
+            signature = self.file_signature()
+            if signature is None:
+                self._reset()
+                self._signature = None
+            elif signature != self._signature:
+                self._load(signature)
+
+    def invalidate(self) -> None:
+        """Forget the loaded table so the next read reloads the file"""
+        with self.lock:
+            self._signature = None
+
+    def _reset(self) -> None:
+        self._rows = []
+        self._date_keys = []
+        self._date_ids = []
+        self._category_index = {}
+        self._columns = None
+        self._search_index = None
+        self._sort_indexes = {}
+        self._duplicate_hashes = None
+
+    def _load(self, signature: Tuple[int, int]) -> None:
+        """Parse the whole CSV file and rebuild every index"""
+        self._reset()
+
+        with open(self.expenses_file, 'r', newline='', encoding='utf-8') as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                self._index_row(self._normalize(row))
+
+        self._signature = signature
+
+    @staticmethod
+    def _normalize(row: Dict) -> Dict:
+        """Convert amount to float, matching what get_all_expenses always returned"""
+        if row.get('amount'):
+            row['amount'] = float(row['amount'])
+        return row
+
+    def _index_row(self, row: Dict) -> None:
+        row_id = len(self._rows)
+        self._rows.append(row)
+
+        date_key = row.get('date') or ''
+        if not self._date_keys or date_key >= self._date_keys[-1]:
+            # Ledgers are mostly appended in date order, keep that path O(1)
+            self._date_keys.append(date_key)
+            self._date_ids.append(row_id)
+        else:
+            position = bisect_right(self._date_keys, date_key)
+            self._date_keys.insert(position, date_key)
+            self._date_ids.insert(position, row_id)
+
+        category_key = (row.get('category') or '').upper()
+        self._category_index.setdefault(category_key, []).append(row_id)
+
+        if self._columns is not None:
+            self._columns.append(row)
+        if self._search_index is not None:
+            self._search_index.add(row)
+        for sort_by, keys in self._sort_indexes.items():
+            key = sort_key(row, sort_by, row_id)
+            if not keys or key >= keys[-1]:
+                keys.append(key)
+            else:
+                keys.insert(bisect_right(keys, key), key)
+
+    def apply_appends(self, csv_records: List[Dict], signature_before: Optional[Tuple[int, int]],
+                      signature_after: Optional[Tuple[int, int]] = None) -> None:
+        """
+        Record rows that were just appended to the CSV file
+
+        Args:
+            csv_records: The records exactly as they were handed to csv.DictWriter
+            signature_before: File signature taken (under self.lock) before the write
+            signature_after: File signature taken right after the write, under
+                the same locks (default: the file's signature now)
+        """
+        with self.lock:
+            # Round-trip through the same text form a CSV read would produce
+            rows = [
+                self._normalize({key: '' if value is None else str(value) for key, value in record.items()})
+                for record in csv_records
+            ]
+            if signature_after is None:
+                signature_after = self.file_signature()
+
+            self._ensure_rollup_loaded()
+            if self._rollup.signature is not None and signature_before == self._rollup.signature:
+                for row in rows:
+                    self._rollup.add(row)
+                self._rollup.signature = signature_after
+                self._save_rollup()
+
+            if self._signature is None or signature_before != self._signature:
+                # Someone else touched the file since we last read it: reload lazily
+                self._signature = None
+                return
+
+            for row in rows:
+                self._index_row(row)
+            self._signature = signature_after
+
+    def _copy(self, row_ids) -> List[Dict]:
+        return [dict(self._rows[row_id]) for row_id in row_ids]
+
+    def __len__(self) -> int:
+        with self.lock:
+            self.refresh()
+            return len(self._rows)
+
+    def all(self) -> List[Dict]:
+        """Return copies of every expense in file order"""
+        with self.lock:
+            self.refresh()
+            return [dict(row) for row in self._rows]
+
+    def by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """Return expenses with start_date <= date <= end_date, in file order"""
+        with self.lock:
+            self.refresh()
+            lo = bisect_left(self._date_keys, start_date)
+            hi = bisect_right(self._date_keys, end_date)
+            return self._copy(sorted(self._date_ids[lo:hi]))
+
+    def by_category(self, category: str) -> List[Dict]:
+        """Return expenses for a category (case-insensitive), in file order"""
+        with self.lock:
+            self.refresh()
+            return self._copy(self._category_index.get(category.upper(), []))
+
+    def _matching_ids(self, start_date: Optional[str], end_date: Optional[str],
+                      category: Optional[str]) -> List[int]:
+        """Row ids (file order) matching optional date bounds and category"""
+        ids = None
+        if start_date or end_date:
+            lo = bisect_left(self._date_keys, start_date) if start_date else 0
+            hi = bisect_right(self._date_keys, end_date) if end_date else len(self._date_keys)
+            ids = sorted(self._date_ids[lo:hi])
+        if category is not None:
+            category_ids = self._category_index.get(category.upper(), [])
+            if ids is None:
+                ids = list(category_ids)
+            else:
+                wanted = set(category_ids)
+                ids = [row_id for row_id in ids if row_id in wanted]
+        return list(range(len(self._rows))) if ids is None else ids
+
+    def iter_rows(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Lazily yield copies of matching expenses in file order
+
+        Only the matching row ids are snapshotted under the lock; rows are
+        copied one at a time as the caller consumes them. Reloads swap in new
+        lists rather than mutating the old ones, so the snapshot stays valid.
+        """
+        with self.lock:
+            self.refresh()
+            rows = self._rows
+            ids = self._matching_ids(start_date, end_date, category)
+        for row_id in ids:
+            yield dict(rows[row_id])
+
+    def _sort_index(self, sort_by: str) -> List[Tuple]:
+        keys = self._sort_indexes.get(sort_by)
+        if keys is None:
+            keys = sorted(sort_key(row, sort_by, row_id) for row_id, row in enumerate(self._rows))
+            self._sort_indexes[sort_by] = keys
+        return keys
+
+    def page(self, sort_by: str = 'date', descending: bool = False, cursor: Optional[str] = None,
+             limit: Optional[int] = None, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             category: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+        """
+        One page of expenses in (sort value, created_at) order, resuming after a cursor
+
+        Walks the sort index from the cursor position and stops once the page is
+        full, so the cost is proportional to the page (plus rows skipped by the
+        category filter) rather than the ledger. Date-sorted pages also start and
+        stop at the date bounds.
+
+        Returns:
+            Dictionary with "expenses" and "next_cursor" (None on the last page)
+        """
+        with self.lock:
+            self.refresh()
+            keys = self._sort_index(sort_by)
+            wanted_category = category.upper() if category is not None else None
+
+            lo, hi = 0, len(keys)
+            if sort_by == 'date':
+                if start_date:
+                    lo = bisect_left(keys, (start_date,))
+                if end_date:
+                    hi = bisect_left(keys, (end_date + '\x00',))
+            if cursor:
+                after = decode_cursor(cursor, sort_by, descending)
+                if descending:
+                    hi = min(hi, bisect_left(keys, after))
+                else:
+                    lo = max(lo, bisect_right(keys, after))
+
+            positions = range(hi - 1, lo - 1, -1) if descending else range(lo, hi)
+            expenses: List[Dict] = []
+            last_key = None
+            has_more = False
+            for position in positions:
+                key = keys[position]
+                row = self._rows[key[-1]]
+                date_key = row.get('date') or ''
+                if (start_date and date_key < start_date) or (end_date and date_key > end_date):
+                    continue
+                if wanted_category is not None and (row.get('category') or '').upper() != wanted_category:
+                    continue
+                if limit is not None and len(expenses) >= limit:
+                    has_more = True
+                    break
+                expenses.append(project(row, fields))
+                last_key = key
+
+            next_cursor = encode_cursor(sort_by, descending, last_key) if has_more else None
+            return {"expenses": expenses, "next_cursor": next_cursor}
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Ranked substring search over vendor, description, business_purpose and notes"""
+        with self.lock:
+            self.refresh()
+            if self._search_index is None:
+                self._search_index = ExpenseSearchIndex()
+                for row in self._rows:
+                    self._search_index.add(row)
+            return self._copy(self._search_index.search(query, limit))
+
+    def duplicate_hashes(self) -> np.ndarray:
+        """(date, amount, vendor) hashes of every expense, for duplicate checks in batch validation"""
+        with self.lock:
+            self.refresh()
+            hashed = 0 if self._duplicate_hashes is None else len(self._duplicate_hashes)
+            if self._duplicate_hashes is None or hashed < len(self._rows):
+                new_hashes = ledger_hashes(self._rows[hashed:])
+                self._duplicate_hashes = new_hashes if self._duplicate_hashes is None else np.concatenate(
+                    [self._duplicate_hashes, new_hashes]
+                )
+            return self._duplicate_hashes
+
+    def _ensure_rollup_loaded(self) -> None:
+        if not self._rollup_loaded:
+            self._rollup.load()
+            self._rollup_loaded = True
+
+    def _save_rollup(self) -> None:
+        try:
+            self._rollup.save()
+        except OSError as e:
+            print(f"Error saving expense rollups: {e}")
+
+    def _current_rollup(self) -> MonthlyRollup:
+        """Return the rollup, rebuilding it from the ledger only if the file changed"""
+        self._ensure_rollup_loaded()
+        signature = self.file_signature()
+        if signature is None or self._rollup.signature != signature:
+            self.refresh()
+            self._rollup.rebuild(self._rows, self._signature)
+            if self._signature is not None:
+                self._save_rollup()
+        return self._rollup
+
+    def category_totals(self, year: Optional[int] = None, month: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Total/count per category for one month, or all-time when year/month are omitted
+
+        Served from the persisted rollup: O(#categories), no ledger scan.
+        """
+        with self.lock:
+            rollup = self._current_rollup()
+            if year and month:
+                return rollup.month(year, month)
+            return rollup.all_time()
+
+    def totals(self, group_by: str = 'category',
+               start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict[str, Dict]:
+        """Vectorized total/count per category, month or vendor (see ExpenseColumns.totals)"""
+        with self.lock:
+            self.refresh()
+            if self._columns is None:
+                self._columns = ExpenseColumns.from_rows(self._rows)
+            return self._columns.totals(group_by, start_date, end_date)
+
+
+# Process-wide registry so every handler for the same file shares one table
+_stores: Dict[str, ExpenseStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_expense_store(expenses_file: Path) -> ExpenseStore:
+    """Get or create the shared ExpenseStore for a CSV file"""
+    key = str(Path(expenses_file).resolve())
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = ExpenseStore(Path(expenses_file))
+            _stores[key] = store
+        return store
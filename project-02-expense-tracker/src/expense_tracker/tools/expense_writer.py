@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Batched Expense Writer
+Single writer queue that coalesces concurrent appends into one buffered write per batch
+"""
+
+import csv
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .expense_store import ExpenseStore
+from .file_lock import FileLock
+
+# When to fsync the expenses file:
+#   batch    - after every coalesced batch (default)
+#   interval - at most once per EXPENSE_FSYNC_INTERVAL seconds
+#   none     - leave it to the OS
+FSYNC_POLICIES = ("batch", "interval", "none")
+
+
+class ExpenseWriter:
+    """
+    Owns all appends to one expenses CSV file in this process
+
+    Callers submit records from any thread (REST handlers, background jobs,
+    WebSocket loops); a single writer thread drains the queue, writes every
+    pending record with one buffered write under a cross-process file lock,
+    applies the configured fsync policy and updates the in-memory store.
+    The thread exits after idle_seconds without work and is restarted by
+    the next submit, so idle ledgers don't each hold a thread.
+    """
+
+    def __init__(self, expenses_file: Path, fieldnames: List[str], store: ExpenseStore,
+                 fsync_policy: Optional[str] = None, fsync_interval: Optional[float] = None,
+                 max_batch: Optional[int] = None, idle_seconds: Optional[float] = None):
+        self.expenses_file = Path(expenses_file)
+        self.fieldnames = list(fieldnames)
+        self.store = store
+        self.lock_file = self.expenses_file.with_name(f"{self.expenses_file.name}.lock")
+
+        self.fsync_policy = (fsync_policy or os.environ.get("EXPENSE_FSYNC_POLICY", "batch")).lower()
+        if self.fsync_policy not in FSYNC_POLICIES:
+            raise ValueError(f"EXPENSE_FSYNC_POLICY must be one of {', '.join(FSYNC_POLICIES)}")
+        self.fsync_interval = fsync_interval or float(os.environ.get("EXPENSE_FSYNC_INTERVAL", "1.0"))
+        self.max_batch = max_batch or int(os.environ.get("EXPENSE_WRITE_BATCH_SIZE", "500"))
+        self.idle_seconds = idle_seconds or float(os.environ.get("EXPENSE_WRITER_IDLE_SECONDS", "60"))
+
+        self._queue: "queue.Queue[Tuple[List[Dict], Future]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+        # Counters for monitoring
+        self.batches_written = 0
+        self.records_written = 0
+
+    def submit(self, records: List[Dict]) -> Future:
+        """Queue records for appending; the future resolves to the number written"""
+        future: Future = Future()
+        if not records:
+            future.set_result(0)
+            return future
+        # Queue and check the thread under one lock, so the thread can't
+        # decide to exit between the two
+        with self._thread_lock:
+            self._queue.put((list(records), future))
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="expense-writer", daemon=True)
+                self._thread.start()
+        return future
+
+    def write(self, records: List[Dict], timeout: Optional[float] = None) -> int:
+        """Queue records and wait until they are on disk"""
+        return self.submit(records).result(timeout=timeout)
+
+    def _run(self) -> None:
+        while True:
+            wait = self.fsync_interval if self._unsynced else self.idle_seconds
+            try:
+                pending = [self._queue.get(timeout=wait)]
+            except queue.Empty:
+                if self._unsynced:
+                    self._fsync_file()
+                    continue
+                with self._thread_lock:
+                    if self._queue.empty():
+                        self._thread = None
+                        return
+                continue
+
+            # Coalesce whatever else is already waiting
+            count = len(pending[0][0])
+            while count < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                pending.append(item)
+                count += len(item[0])
+
+            records = [record for batch, _ in pending for record in batch]
+            try:
+                self._write_batch(records)
+            except Exception as e:
+                for _, future in pending:
+                    future.set_exception(e)
+            else:
+                for batch, future in pending:
+                    future.set_result(len(batch))
+
+    def _write_batch(self, records: List[Dict]) -> None:
+        """
+        Append one batch: the write happens under the locks, the store update
+        and the fsync after them, so readers of the store never wait on the disk
+
+        Raises only if the rows didn't reach the file (or the required fsync
+        failed); a failed store update just makes the store reload the file.
+        """
+        with self.store.lock, FileLock(self.lock_file):
+            signature_before = self.store.file_signature()
+            with open(self.expenses_file, 'a', newline='', encoding='utf-8') as f:
+                writer = csv.DictWriter(f, fieldnames=self.fieldnames)
+                writer.writerows(records)
+                f.flush()
+            signature_after = self.store.file_signature()
+
+        try:
+            self.store.apply_appends(records, signature_before, signature_after)
+        except Exception as e:
+            print(f"Error indexing written expenses, reloading the store: {e}")
+            self.store.invalidate()
+
+        if self.fsync_policy == "batch" or (
+            self.fsync_policy == "interval"
+            and time.monotonic() - self._last_fsync >= self.fsync_interval
+        ):
+            self._sync()
+        else:
+            self._unsynced = self.fsync_policy == "interval"
+
+        self.batches_written += 1
+        self.records_written += len(records)
+
+    def _sync(self) -> None:
+        fd = os.open(self.expenses_file, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        self._last_fsync = time.monotonic()
+        self._unsynced = False
+
+    def _fsync_file(self) -> None:
+        """Flush data left unsynced by the interval policy once the queue goes idle"""
+        try:
+            self._sync()
+        except OSError as e:
+            print(f"Error syncing expenses file: {e}")
+            self._last_fsync = time.monotonic()
+            self._unsynced = False
+
+    def stats(self) -> Dict:
+        return {
+            "fsync_policy": self.fsync_policy,
+            "pending": self._queue.qsize(),
+            "batches_written": self.batches_written,
+            "records_written": self.records_written,
+        }
+
+
+# Process-wide registry: exactly one writer per expenses file
+_writers: Dict[str, ExpenseWriter] = {}
+_writers_lock = threading.Lock()
+
+
+def get_expense_writer(expenses_file: Path, fieldnames: List[str], store: ExpenseStore) -> ExpenseWriter:
+    """Get or create the shared ExpenseWriter for a CSV file"""
+    key = str(Path(expenses_file).resolve())
+    with _writers_lock:
+        writer = _writers.get(key)
+        if writer is None:
+            writer = ExpenseWriter(expenses_file, fieldnames, store)
+            _writers[key] = writer
+        return writer
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Streaming Expense Exporters
+Encode expense rows lazily as JSON, NDJSON, CSV or Parquet chunks, optionally gzip-compressed
+"""
+
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timezone
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List
+
+EXPORT_FIELDS = ["date", "amount", "vendor", "category", "description",
+                 "business_purpose", "notes", "created_at"]
+
+# Media type and file extension for each export format
+EXPORT_FORMATS = {
+    "json": ("application/json", "json"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+    "csv": ("text/csv", "csv"),
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+}
+
+# Rows encoded per yielded chunk (and per Parquet row group)
+EXPORT_BATCH_ROWS = 1000
+
+
+def _batches(rows: Iterable[Dict], size: int = EXPORT_BATCH_ROWS) -> Iterator[List[Dict]]:
+    iterator = iter(rows)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def iter_json(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """
+    Stream the /export/json document: {"data": [...], "export_timestamp": ..., "format": "json"}
+
+    The envelope matches the previous non-streaming response, so clients keep working.
+    """
+    yield b'{"data": ['
+    first = True
+    for batch in _batches(rows):
+        encoded = ", ".join(json.dumps(row, default=str) for row in batch)
+        yield (encoded if first else ", " + encoded).encode("utf-8")
+        first = False
+    timestamp = json.dumps(datetime.now(timezone.utc).isoformat())
+    yield f'], "export_timestamp": {timestamp}, "format": "json"}}'.encode("utf-8")
+
+
+def iter_ndjson(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Stream one JSON object per line"""
+    for batch in _batches(rows):
+        yield "".join(json.dumps(row, default=str) + "\n" for row in batch).encode("utf-8")
+
+
+def iter_csv(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Stream CSV with the standard expense headers"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    for batch in _batches(rows):
+        writer.writerows(batch)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate(0)
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainableSink(io.RawIOBase):
+    """Write-only file object whose contents are handed out and cleared after each row group"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def iter_parquet(rows: Iterable[Dict]) -> Iterator[bytes]:
+    """Stream a Parquet file one row group at a time (requires pyarrow)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([(field, pa.float64() if field == "amount" else pa.string()) for field in EXPORT_FIELDS])
+    sink = _DrainableSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for batch in _batches(rows):
+            columns = {field: [row.get(field) for row in batch] for field in EXPORT_FIELDS}
+            columns["amount"] = [amount if isinstance(amount, (int, float)) else None for amount in columns["amount"]]
+            writer.write_table(pa.Table.from_pydict(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def gzip_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """gzip-compress a byte stream incrementally"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def iter_export(rows: Iterable[Dict], export_format: str, compress: bool = False) -> Iterator[bytes]:
+    """
+    Encode expense rows lazily in the requested format
+
+    Args:
+        rows: Iterable of expense dictionaries (consumed lazily)
+        export_format: One of "json", "ndjson", "csv", "parquet"
+        compress: gzip the output stream
+
+    Returns:
+        Iterator of byte chunks suitable for a StreamingResponse
+    """
+    encoders = {"json": iter_json, "ndjson": iter_ndjson, "csv": iter_csv, "parquet": iter_parquet}
+    if export_format not in encoders:
+        raise ValueError(f"Unsupported export format '{export_format}'. Use one of: {', '.join(encoders)}")
+    chunks = encoders[export_format](rows)
+    return gzip_stream(chunks) if compress else chunks
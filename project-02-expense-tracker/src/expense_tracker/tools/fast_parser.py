@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Rule-based Fast-path Expense Parser
+Handles well-formed inputs like "$12 Spotify subscription" without calling the LLM crew
+"""
+
+import os
+import re
+import threading
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, Optional, Tuple
+
+from .tenants import current_tenant
+from .vendor_index import VendorCategoryIndex, get_vendor_index
+
+_AMOUNT_PATTERN = re.compile(
+    r"\$\s?(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\b"
+    r"|\b(\d{1,3}(?:,\d{3})+|\d+)(\.\d{1,2})?\s?(?:dollars|bucks|usd)\b",
+    re.IGNORECASE,
+)
+_ISO_DATE_PATTERN = re.compile(r"\b(\d{4})-(\d{2})-(\d{2})\b")
+_US_DATE_PATTERN = re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")
+_DAYS_AGO_PATTERN = re.compile(r"\b(\d+|a|one|two|three|four|five|six) days? ago\b", re.IGNORECASE)
+_LAST_WEEKDAY_PATTERN = re.compile(
+    r"\b(?:last|on) (monday|tuesday|wednesday|thursday|friday|saturday|sunday)\b", re.IGNORECASE
+)
+# Date hints the rules don't resolve; their presence sends the input to the crew
+_UNRESOLVED_DATE_PATTERN = re.compile(
+    r"\b(?:last|next|this) (?:week|month|year)\b|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.? \d{1,2}\b"
+    r"|\b\d{1,2}(?:st|nd|rd|th)\b",
+    re.IGNORECASE,
+)
+_VENDOR_PATTERN = re.compile(r"\b(?:at|from|to|with) ([A-Z0-9][\w&'.-]*(?: [A-Z][\w&'.-]*)*)")
+_PURPOSE_PATTERN = re.compile(r"\bfor (?:an? |the )?((?!\$)[^,.;]+)", re.IGNORECASE)
+
+_WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+_NUMBER_WORDS = {"a": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6}
+
+
+class FastExpenseParser:
+    """
+    Deterministic parser for the common, well-formed expense descriptions
+
+    Extracts amount, vendor, date (ISO, US or relative such as "yesterday")
+    and business purpose, and looks the vendor up in the vendor -> category
+    index learned from the ledger. parse() returns a complete expense record
+    when every field was resolved confidently, and None otherwise so the
+    caller can fall back to the LLM crew.
+    """
+
+    def __init__(self, vendor_index: Optional[VendorCategoryIndex] = None,
+                 min_confidence: Optional[float] = None):
+        self.vendor_index = vendor_index or VendorCategoryIndex()
+        self.min_confidence = min_confidence if min_confidence is not None else float(
+            os.environ.get("EXPENSE_FAST_PATH_MIN_CONFIDENCE", "0.85")
+        )
+
+    @staticmethod
+    def extract_amount(text: str) -> Optional[float]:
+        """The single dollar amount in the text (None if missing or ambiguous)"""
+        amounts = set()
+        for match in _AMOUNT_PATTERN.finditer(text):
+            whole, cents = (match.group(1), match.group(2)) if match.group(1) else (match.group(3), match.group(4))
+            amounts.add(float(whole.replace(",", "") + (cents or "")))
+        return amounts.pop() if len(amounts) == 1 else None
+
+    @staticmethod
+    def extract_date(text: str, today: date) -> Tuple[Optional[str], bool]:
+        """
+        Resolve the expense date
+
+        Returns:
+            (YYYY-MM-DD or None, resolved) - resolved is False when the text
+            contains a date hint the rules can't interpret
+        """
+        lowered = text.lower()
+        match = _ISO_DATE_PATTERN.search(text)
+        if match:
+            try:
+                return date(*map(int, match.groups())).isoformat(), True
+            except ValueError:
+                return None, False
+        match = _US_DATE_PATTERN.search(text)
+        if match:
+            month, day, year = match.groups()
+            year = int(year) + (2000 if len(year) == 2 else 0) if year else today.year
+            try:
+                return date(year, int(month), int(day)).isoformat(), True
+            except ValueError:
+                return None, False
+        if "day before yesterday" in lowered:
+            return (today - timedelta(days=2)).isoformat(), True
+        if "yesterday" in lowered:
+            return (today - timedelta(days=1)).isoformat(), True
+        match = _DAYS_AGO_PATTERN.search(text)
+        if match:
+            count = match.group(1).lower()
+            days = int(count) if count.isdigit() else _NUMBER_WORDS[count]
+            return (today - timedelta(days=days)).isoformat(), True
+        match = _LAST_WEEKDAY_PATTERN.search(text)
+        if match:
+            days_back = (today.weekday() - _WEEKDAYS.index(match.group(1).lower())) % 7 or 7
+            return (today - timedelta(days=days_back)).isoformat(), True
+        if _UNRESOLVED_DATE_PATTERN.search(text):
+            return None, False
+        # "today" or no date at all: the crew would infer today as well
+        return today.isoformat(), True
+
+    def extract_vendor(self, text: str) -> Optional[str]:
+        """
+        Vendor named after "at/from/to/with" or, when the text names none, the
+        longest vendor from the ledger's history mentioned anywhere in it
+
+        An explicitly named vendor wins even when it's unknown (the caller then
+        hands the input to the crew): in "zoom lens at Best Buy" the vendor is
+        Best Buy, not the seed vendor Zoom.
+        """
+        named = [match.group(1).rstrip(".") for match in _VENDOR_PATTERN.finditer(text)]
+        for vendor in named:
+            if self.vendor_index.vendor_category(vendor) is not None:
+                return vendor
+        if named:
+            return named[0]
+
+        # Seed vendors are common words, so free text only matches ledger vendors
+        vendor = self.vendor_index.find_vendor(text, seeds=False)
+        if vendor is None:
+            return None
+        position = text.lower().find(vendor)
+        return text[position:position + len(vendor)] if position >= 0 else vendor.title()
+
+    def suggest_category(self, expense_description: str) -> Optional[Dict]:
+        """Ledger category suggestion for a description the fast path couldn't fully parse"""
+        text = " ".join(expense_description.split())
+        return self.vendor_index.suggest(self.extract_vendor(text), text)
+
+    def parse(self, expense_description: str, today: Optional[date] = None) -> Optional[Dict]:
+        """
+        Parse an expense description with rules only
+
+        Args:
+            expense_description: Natural language expense, e.g. "$12 Spotify subscription"
+            today: Reference date for relative dates (default: today, UTC)
+
+        Returns:
+            Expense record dictionary, or None if the crew should handle the input
+        """
+        text = " ".join(expense_description.split())
+        today = today or datetime.now(timezone.utc).date()
+
+        amount = self.extract_amount(text)
+        if amount is None or amount <= 0:
+            return None
+        expense_date, date_resolved = self.extract_date(text, today)
+        if not date_resolved:
+            return None
+
+        vendor = self.extract_vendor(text)
+        if not vendor:
+            return None
+        found = self.vendor_index.vendor_category(vendor)
+        if found is None or found[1] < self.min_confidence:
+            return None
+        category, confidence, _ = found
+
+        purpose = _PURPOSE_PATTERN.search(text)
+        return {
+            "date": expense_date,
+            "amount": amount,
+            "vendor": vendor,
+            "category": category,
+            "description": text,
+            "business_purpose": purpose.group(1).strip() if purpose else "",
+            "notes": "",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "validation_status": "complete",
+            "parsed_by": "fast_path",
+            "confidence": round(confidence, 3),
+        }
+
+
+def fast_path_enabled() -> bool:
+    """EXPENSE_FAST_PATH toggles the rule-based parser (default: on)"""
+    return os.environ.get("EXPENSE_FAST_PATH", "1").lower() not in ("0", "false", "no", "off")
+
+
+_parsers: Dict[Optional[str], FastExpenseParser] = {}
+_parsers_lock = threading.Lock()
+
+
+def get_fast_parser(tenant_id: Optional[str] = None) -> FastExpenseParser:
+    """Get a tenant's parser (default: the current request's tenant), backed by its vendor index"""
+    tenant_id = tenant_id or current_tenant.get()
+    with _parsers_lock:
+        parser = _parsers.get(tenant_id)
+        if parser is None:
+            parser = _parsers[tenant_id] = FastExpenseParser(get_vendor_index(tenant_id))
+        return parser
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Cross-process File Lock
+Advisory lock on a sidecar .lock file so several workers can share one data directory
+"""
+
+import os
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import msvcrt
+except ImportError:  # POSIX
+    msvcrt = None
+
+
+class FileLock:
+    """
+    Exclusive advisory lock held for the duration of a ``with`` block
+
+    Uses fcntl.flock on POSIX and msvcrt.locking on Windows. The lock is
+    per open file description, so it also serializes threads that each
+    enter their own ``with FileLock(...)`` block.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._fd = None
+
+    def __enter__(self) -> "FileLock":
+        self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        elif msvcrt is not None:
+            msvcrt.locking(self._fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            elif msvcrt is not None:
+                os.lseek(self._fd, 0, os.SEEK_SET)
+                msvcrt.locking(self._fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self._fd)
+            self._fd = None
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Keyset Pagination Helpers
+Sort keys and opaque cursors for paging through expenses without offsets
+"""
+
+import base64
+import json
+from typing import Dict, List, Optional, Tuple
+
+SORT_FIELDS = ("date", "amount", "vendor")
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+
+def sort_key(row: Dict, sort_by: str, row_id: int) -> Tuple:
+    """
+    Total order used for paging: (sort value, created_at, row id)
+
+    created_at breaks ties between expenses on the same date/amount/vendor and
+    the row id keeps the key unique even if two records share a timestamp.
+    """
+    if sort_by == "amount":
+        amount = row.get("amount")
+        value = amount if isinstance(amount, (int, float)) else 0.0
+    elif sort_by == "vendor":
+        value = (row.get("vendor") or "").lower()
+    else:
+        value = row.get("date") or ""
+    return (value, row.get("created_at") or "", row_id)
+
+
+def encode_cursor(sort_by: str, descending: bool, key: Tuple) -> str:
+    """Pack the last key of a page into an opaque, URL-safe cursor"""
+    payload = json.dumps([sort_by, descending, list(key)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, descending: bool) -> Tuple:
+    """
+    Unpack a cursor produced by encode_cursor
+
+    Raises:
+        ValueError: If the cursor is malformed or was issued for a different sort
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort, cursor_descending, key = json.loads(base64.urlsafe_b64decode(padded))
+        value, created_at, row_id = key
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if cursor_sort != sort_by or cursor_descending != descending:
+        raise ValueError("Cursor was issued for a different sort order")
+    value_type = (int, float) if sort_by == "amount" else str
+    if not isinstance(value, value_type) or not isinstance(created_at, str) or not isinstance(row_id, int):
+        raise ValueError("Invalid cursor")
+    return (value, created_at, row_id)
+
+
+def validate_page_request(sort_by: str, limit: Optional[int], fields: Optional[List[str]],
+                          known_fields: List[str]) -> None:
+    """Raise ValueError for an unknown sort field, page size or projected field"""
+    if sort_by not in SORT_FIELDS:
+        raise ValueError(f"sort must be one of: {', '.join(SORT_FIELDS)}")
+    if limit is not None and not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    unknown = [field for field in fields or [] if field not in known_fields]
+    if unknown:
+        raise ValueError(f"Unknown expense fields: {', '.join(unknown)}")
+
+
+def project(row: Dict, fields: Optional[List[str]]) -> Dict:
+    """Copy a row, keeping only the requested fields"""
+    if not fields:
+        return dict(row)
+    return {field: row.get(field) for field in fields}
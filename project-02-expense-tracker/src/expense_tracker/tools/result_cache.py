@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Expense Result Cache
+Exact and MinHash-similarity cache in front of ExpenseTrackerCrew.process_expense
+"""
+
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .tenants import current_tenant
+
+# MinHash signature length, split into LSH bands of BAND_ROWS hashes each
+NUM_HASHES = 64
+BAND_ROWS = 4
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_HASH_SEED = 1729
+
+_TOKEN_PATTERN = re.compile(r"\$?\d+(?:[.,/-]\d+)*|[a-z][a-z'&-]*")
+_NUMBER_PATTERN = re.compile(r"\d")
+_WEEKDAYS = r"(?:monday|tuesday|wednesday|thursday|friday|saturday|sunday)"
+_DATE_REFERENCE_PATTERN = re.compile(
+    r"\b\d{4}-\d{2}-\d{2}\b|\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b"
+    r"|\b(?:jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec)[a-z]*\.?\s+\d{1,2}(?:st|nd|rd|th)?\b"
+    r"|\b\d{1,2}(?:st|nd|rd|th)?\s+(?:of\s+)?(?:jan|feb|mar|apr|may|jun|jul|aug|sept?|oct|nov|dec)[a-z]*\b"
+    r"|\b" + _WEEKDAYS + r"\b",
+    re.IGNORECASE,
+)
+_RELATIVE_DATE_PATTERN = re.compile(
+    r"\b(?:today|tonight|yesterday|tomorrow|ago)\b"
+    r"|\b(?:last|this|next|past)\s+(?:" + _WEEKDAYS[3:-1] + r"|week|weekend|month|year)\b",
+    re.IGNORECASE,
+)
+
+# Words that change what the record means, so they must match exactly between a
+# cached description and a similar one (amounts are handled the same way)
+_STRICT_WORDS = {
+    "today", "yesterday", "ago", "last", "next", "week", "month", "year", "before",
+    "monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday",
+    "january", "february", "march", "april", "may", "june", "july", "august",
+    "september", "october", "november", "december",
+    "one", "two", "three", "four", "five", "six", "seven",
+}
+
+# Filler words ignored by the similarity tier
+_STOP_WORDS = {"a", "an", "the", "at", "on", "in", "of", "for", "to", "from", "with", "my", "i", "and",
+               "spent", "paid", "bought", "got"}
+
+
+def normalize_description(text: str) -> str:
+    """Lower-case, tokenize and re-join a description (the exact-tier key)"""
+    return " ".join(_TOKEN_PATTERN.findall(text.lower()))
+
+
+def relative_dates(description: str) -> bool:
+    """
+    True when a description's date depends on the day it was written
+
+    That's the case when it uses a relative date ("yesterday", "last Friday")
+    or names no date at all (the crew assumes today). ISO, numeric,
+    month-name ("Jan 5th") and bare weekday dates are absolute.
+    """
+    return (_RELATIVE_DATE_PATTERN.search(description) is not None
+            or _DATE_REFERENCE_PATTERN.search(description) is None)
+
+
+def _split_tokens(normalized: str) -> Tuple[FrozenSet[str], Set[str]]:
+    """Separate strict tokens (amounts, date words) from the remaining content words"""
+    strict, words = set(), set()
+    for token in normalized.split():
+        if _NUMBER_PATTERN.search(token) or token in _STRICT_WORDS:
+            strict.add(token.lstrip("$"))
+        elif token not in _STOP_WORDS:
+            words.add(token)
+    return frozenset(strict), words
+
+
+def _shingles(words: Set[str]) -> Set[str]:
+    """Character trigrams of each word, so typos and plurals still overlap"""
+    shingles = set()
+    for word in words:
+        padded = f" {word} "
+        shingles.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return shingles
+
+
+class _MinHasher:
+    def __init__(self, num_hashes: int = NUM_HASHES, seed: int = _HASH_SEED):
+        rng = random.Random(seed)
+        self._params = [(rng.randrange(1, _MERSENNE_PRIME), rng.randrange(0, _MERSENNE_PRIME))
+                        for _ in range(num_hashes)]
+
+    def signature(self, shingles: Set[str]) -> Tuple[int, ...]:
+        hashes = [zlib.crc32(shingle.encode("utf-8")) for shingle in shingles] or [0]
+        return tuple(min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in self._params)
+
+
+def _estimated_similarity(left: Tuple[int, ...], right: Tuple[int, ...]) -> float:
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class _Entry:
+    __slots__ = ("record", "stored_at", "reference_date", "adjust_dates", "strict", "signature")
+
+    def __init__(self, record: Dict, reference_date: date, adjust_dates: bool,
+                 strict: FrozenSet[str], signature: Tuple[int, ...]):
+        self.record = record
+        self.stored_at = time.monotonic()
+        self.reference_date = reference_date
+        self.adjust_dates = adjust_dates
+        self.strict = strict
+        self.signature = signature
+
+
+class ExpenseResultCache:
+    """
+    Cache of processed expense records keyed by description
+
+    - exact tier: normalized description -> record
+    - similarity tier: MinHash signatures over the description's words, looked
+      up through LSH bands; a hit needs the same amounts and date words and an
+      estimated Jaccard similarity of at least similarity_threshold
+
+    Records for relative descriptions (see relative_dates()) are shifted by
+    the days since they were cached. Entries expire after ttl_seconds and the
+    least recently used entry is evicted beyond max_entries.
+    """
+
+    def __init__(self, max_entries: Optional[int] = None, ttl_seconds: Optional[float] = None,
+                 similarity_threshold: Optional[float] = None):
+        self.max_entries = max_entries or int(os.environ.get("EXPENSE_CACHE_MAX_ENTRIES", "1000"))
+        self.ttl_seconds = ttl_seconds or float(os.environ.get("EXPENSE_CACHE_TTL_SECONDS", "86400"))
+        self.similarity_threshold = similarity_threshold or float(
+            os.environ.get("EXPENSE_CACHE_SIMILARITY", "0.8")
+        )
+
+        self._entries: "OrderedDict[str, _Entry]" = OrderedDict()
+        self._bands: Dict[Tuple[int, Tuple[int, ...]], Set[str]] = {}
+        self._hasher = _MinHasher()
+        self._lock = threading.Lock()
+
+        # Counters for monitoring
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _band_keys(signature: Tuple[int, ...]) -> List[Tuple[int, Tuple[int, ...]]]:
+        return [(band, signature[start:start + BAND_ROWS])
+                for band, start in enumerate(range(0, len(signature), BAND_ROWS))]
+
+    def _remove(self, key: str) -> None:
+        entry = self._entries.pop(key)
+        for band_key in self._band_keys(entry.signature):
+            bucket = self._bands.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self._bands[band_key]
+
+    def _expired(self, entry: _Entry) -> bool:
+        return time.monotonic() - entry.stored_at > self.ttl_seconds
+
+    def _find_similar(self, strict: FrozenSet[str], signature: Tuple[int, ...]) -> Optional[str]:
+        candidates: Set[str] = set()
+        for band_key in self._band_keys(signature):
+            candidates |= self._bands.get(band_key, set())
+
+        best_key, best_similarity = None, self.similarity_threshold
+        for key in candidates:
+            entry = self._entries[key]
+            if entry.strict != strict or self._expired(entry):
+                continue
+            similarity = _estimated_similarity(signature, entry.signature)
+            if similarity >= best_similarity:
+                best_key, best_similarity = key, similarity
+        return best_key
+
+    @staticmethod
+    def _materialize(entry: _Entry, tier: str, today: date) -> Dict:
+        record = dict(entry.record)
+        if entry.adjust_dates and record.get("date"):
+            try:
+                shift = timedelta(days=(today - entry.reference_date).days)
+                record["date"] = (date.fromisoformat(record["date"]) + shift).isoformat()
+            except ValueError:
+                pass
+        record["created_at"] = datetime.now(timezone.utc).isoformat()
+        record["cache"] = tier
+        return record
+
+    def get(self, description: str, today: Optional[date] = None) -> Optional[Dict]:
+        """
+        Look up a processed record for a description
+
+        Args:
+            description: Natural language expense description
+            today: Reference date for date adjustment (default: today, UTC)
+
+        Returns:
+            Copy of the cached record (dates shifted to today), or None on a miss
+        """
+        today = today or datetime.now(timezone.utc).date()
+        key = normalize_description(description)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._expired(entry):
+                self._remove(key)
+                entry = None
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.exact_hits += 1
+                return self._materialize(entry, "exact", today)
+
+            strict, words = _split_tokens(key)
+            if words:
+                similar_key = self._find_similar(strict, self._hasher.signature(_shingles(words)))
+                if similar_key is not None:
+                    self._entries.move_to_end(similar_key)
+                    self.similar_hits += 1
+                    return self._materialize(self._entries[similar_key], "similar", today)
+
+            self.misses += 1
+            return None
+
+    def put(self, description: str, record: Dict, today: Optional[date] = None) -> None:
+        """Cache a successfully processed record (records carrying an error are ignored)"""
+        if not record or "error" in record:
+            return
+        today = today or datetime.now(timezone.utc).date()
+        key = normalize_description(description)
+        strict, words = _split_tokens(key)
+        entry = _Entry(
+            {k: v for k, v in record.items() if k not in ("created_at", "cache")},
+            reference_date=today,
+            adjust_dates=relative_dates(description),
+            strict=strict,
+            signature=self._hasher.signature(_shingles(words)),
+        )
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            if words:
+                for band_key in self._band_keys(entry.signature):
+                    self._bands.setdefault(band_key, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bands.clear()
+
+    def stats(self) -> Dict:
+        lookups = self.exact_hits + self.similar_hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round((self.exact_hits + self.similar_hits) / lookups, 3) if lookups else 0.0,
+        }
+
+
+def result_cache_enabled() -> bool:
+    """EXPENSE_CACHE toggles the result cache (default: on)"""
+    return os.environ.get("EXPENSE_CACHE", "1").lower() not in ("0", "false", "no", "off")
+
+
+# One cache per tenant (None = the shared ledger): a record carries its tenant's categories
+_caches: Dict[Optional[str], ExpenseResultCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_result_cache(tenant_id: Optional[str] = None) -> ExpenseResultCache:
+    """Get a tenant's result cache (default: the current request's tenant)"""
+    tenant_id = tenant_id or current_tenant.get()
+    with _caches_lock:
+        cache = _caches.get(tenant_id)
+        if cache is None:
+            cache = _caches[tenant_id] = ExpenseResultCache()
+        return cache
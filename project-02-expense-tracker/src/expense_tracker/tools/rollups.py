@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Monthly Rollup Table for Expense Tracker
+Persisted (year, month, category) -> total/count table, updated on every append
+"""
+
+import json
+import os
+import tempfile
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from .file_lock import FileLock
+
+UNDATED_MONTH = "undated"
+
+
+def month_key(date_str: Optional[str]) -> str:
+    """Return the YYYY-MM rollup key for a date string (UNDATED_MONTH if invalid)"""
+    try:
+        return date.fromisoformat(date_str or "").strftime("%Y-%m")
+    except ValueError:
+        return UNDATED_MONTH
+
+
+def _category_of(row: Dict) -> str:
+    category = row.get("category", "OTHER")
+    return "OTHER" if category is None else category
+
+
+def _to_amount(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+class MonthlyRollup:
+    """
+    Rollup of expense totals keyed by month and category
+
+    The table is saved as JSON together with the (mtime_ns, size) signature of
+    the ledger it describes, so a restarted process can answer summaries
+    without re-reading the ledger as long as the file hasn't changed.
+    lock_file is the ledger's cross-process lock, taken to swap a new table in.
+    """
+
+    def __init__(self, path: Path, lock_file: Optional[Path] = None):
+        self.path = Path(path)
+        self.lock_file = Path(lock_file) if lock_file is not None else None
+        self.signature: Optional[Tuple[int, int]] = None
+        self._months: Dict[str, Dict[str, Dict]] = {}
+        self._all_time: Dict[str, Dict] = {}
+
+    def load(self) -> bool:
+        """Load the persisted table; returns False if it is missing or unreadable"""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self._months = data["months"]
+            self.signature = tuple(data["source_signature"]) if data.get("source_signature") else None
+        except (FileNotFoundError, ValueError, KeyError, TypeError):
+            self._months = {}
+            self.signature = None
+            return False
+
+        self._all_time = {}
+        for categories in self._months.values():
+            for category, totals in categories.items():
+                self._accumulate(self._all_time, category, totals["total"], totals["count"])
+        return True
+
+    def save(self) -> None:
+        """Atomically write the table next to the ledger (via a temp file of this writer's own)"""
+        fd, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=f"{self.path.stem}-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"source_signature": list(self.signature) if self.signature else None,
+                           "months": self._months}, f)
+            if self.lock_file is None:
+                os.replace(temp_path, self.path)
+            else:
+                with FileLock(self.lock_file):
+                    os.replace(temp_path, self.path)
+        except BaseException:
+            try:
+                os.unlink(temp_path)
+            except OSError:
+                pass
+            raise
+
+    def rebuild(self, rows: Iterable[Dict], signature: Optional[Tuple[int, int]]) -> None:
+        """Recompute the whole table from ledger rows"""
+        self._months = {}
+        self._all_time = {}
+        for row in rows:
+            self.add(row)
+        self.signature = signature
+
+    @staticmethod
+    def _accumulate(table: Dict[str, Dict], category: str, amount: float, count: int = 1) -> None:
+        totals = table.setdefault(category, {"total": 0.0, "count": 0})
+        totals["total"] += amount
+        totals["count"] += count
+
+    def add(self, row: Dict) -> None:
+        """Add one expense to its (month, category) cell"""
+        category = _category_of(row)
+        amount = _to_amount(row.get("amount"))
+        self._accumulate(self._months.setdefault(month_key(row.get("date")), {}), category, amount)
+        self._accumulate(self._all_time, category, amount)
+
+    def month(self, year: int, month: int) -> Dict[str, Dict]:
+        """Category totals for one month"""
+        categories = self._months.get(f"{year:04d}-{month:02d}", {})
+        return {category: dict(totals) for category, totals in categories.items()}
+
+    def all_time(self) -> Dict[str, Dict]:
+        """Category totals across the whole ledger"""
+        return {category: dict(totals) for category, totals in self._all_time.items()}
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Full-text Search Index for Expense Tracker
+Inverted token index plus a trigram layer so substring and prefix queries stay fast
+"""
+
+import re
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+# Searchable fields and their ranking weights
+SEARCH_FIELDS = ("vendor", "description", "business_purpose", "notes")
+FIELD_WEIGHTS = {"vendor": 3.0, "description": 2.0, "business_purpose": 1.0, "notes": 1.0}
+
+# Match-quality multipliers: whole token > token prefix > plain substring
+EXACT_TOKEN_SCORE = 3.0
+PREFIX_TOKEN_SCORE = 2.0
+SUBSTRING_SCORE = 1.0
+
+GRAM_SIZE = 3
+
+_TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split lower-cased text into word tokens"""
+    return _TOKEN_PATTERN.findall(text.lower())
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + GRAM_SIZE] for i in range(len(text) - GRAM_SIZE + 1)}
+
+
+def _field_texts(row: Dict) -> Tuple[str, ...]:
+    return tuple((row.get(field) or "").lower() for field in SEARCH_FIELDS)
+
+
+def score_texts(texts: Tuple[str, ...], query_lower: str) -> float:
+    """
+    Score a record's lower-cased search fields against a query
+
+    A record matches when the query is a substring of any field (the original
+    search semantics); the score rewards vendor hits and whole-word matches.
+    """
+    query_tokens = tokenize(query_lower)
+    score = 0.0
+    for field, text in zip(SEARCH_FIELDS, texts):
+        if query_lower not in text:
+            continue
+        quality = SUBSTRING_SCORE
+        if query_tokens:
+            field_tokens = tokenize(text)
+            if all(token in field_tokens for token in query_tokens):
+                quality = EXACT_TOKEN_SCORE
+            elif any(t.startswith(query_tokens[0]) for t in field_tokens):
+                quality = PREFIX_TOKEN_SCORE
+        score += FIELD_WEIGHTS[field] * quality
+    return score
+
+
+def _rank(scored: Iterable[Tuple[float, int]], limit: Optional[int]) -> List[int]:
+    """Order (score, id) pairs by score, then by ledger position"""
+    ranked = sorted(((s, i) for s, i in scored if s > 0), key=lambda item: (-item[0], item[1]))
+    if limit is not None:
+        ranked = ranked[:limit]
+    return [i for _, i in ranked]
+
+
+def rank_matches(rows: List[Dict], query: str, limit: Optional[int] = None) -> List[Dict]:
+    """Linear-scan search with the same matching and ranking as ExpenseSearchIndex"""
+    query_lower = query.lower()
+    scored = ((score_texts(_field_texts(row), query_lower), i) for i, row in enumerate(rows))
+    return [rows[i] for i in _rank(scored, limit)]
+
+
+class ExpenseSearchIndex:
+    """
+    Incrementally maintained search index over vendor, description,
+    business_purpose and notes
+
+    - token index: word token -> doc ids (exact and prefix lookups)
+    - trigram index: 3-character gram -> doc ids (substring candidates)
+
+    Candidates are verified against the stored lower-cased text, so results
+    match a plain substring search exactly.
+    """
+
+    def __init__(self):
+        self._texts: List[Tuple[str, ...]] = []
+        self._tokens: Dict[str, Set[int]] = {}
+        self._grams: Dict[str, Set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def add(self, row: Dict) -> int:
+        """Index a record; doc ids are assigned in insertion (ledger) order"""
+        doc_id = len(self._texts)
+        texts = _field_texts(row)
+        self._texts.append(texts)
+
+        for text in texts:
+            for token in tokenize(text):
+                self._tokens.setdefault(token, set()).add(doc_id)
+            for gram in _grams(text):
+                self._grams.setdefault(gram, set()).add(doc_id)
+        return doc_id
+
+    def _candidates(self, query_lower: str) -> Iterable[int]:
+        if len(query_lower) < GRAM_SIZE:
+            if not query_lower.isalnum():
+                # Too short for the gram layer and may span tokens: verify every record
+                return range(len(self._texts))
+            # A short alphanumeric substring always lies inside a single token
+            matches: Set[int] = set()
+            for token, doc_ids in self._tokens.items():
+                if query_lower in token:
+                    matches |= doc_ids
+            return matches
+
+        postings = []
+        for gram in _grams(query_lower):
+            doc_ids = self._grams.get(gram)
+            if not doc_ids:
+                return ()
+            postings.append(doc_ids)
+
+        postings.sort(key=len)
+        candidates = set(postings[0])
+        for doc_ids in postings[1:]:
+            candidates &= doc_ids
+            if not candidates:
+                break
+        return candidates
+
+    def search(self, query: str, limit: Optional[int] = None) -> List[int]:
+        """
+        Find records containing the query in any searchable field
+
+        Args:
+            query: Search text (case-insensitive substring)
+            limit: Optional maximum number of results
+
+        Returns:
+            Doc ids ordered by relevance, then ledger order
+        """
+        query_lower = query.lower()
+        scored = ((score_texts(self._texts[i], query_lower), i) for i in self._candidates(query_lower))
+        return _rank(scored, limit)
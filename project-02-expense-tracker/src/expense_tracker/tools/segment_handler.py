@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Segment-backed Expense Handler
+Same interface as ExpenseCSVHandler, storing expenses in binary segments (see segment_store.py)
+"""
+
+import calendar
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+from .aggregation import ExpenseColumns
+from .batch_validation import ledger_hashes
+from .csv_handler import DEFAULT_DATA_DIR, ExpenseCSVHandler
+from .file_lock import FileLock
+from .pagination import decode_cursor, encode_cursor, project, validate_page_request
+from .search_index import rank_matches
+from .segment_store import get_segment_store
+
+
+class ExpenseSegmentHandler(ExpenseCSVHandler):
+    """Handles expense storage in append-only binary segments with CSV import/export"""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, tenant_id: Optional[str] = None):
+        super().__init__(data_dir, tenant_id)
+        self.segments_dir = self.data_dir / "segments"
+        self.segments = get_segment_store(self.segments_dir)
+
+        # One-shot import of the existing CSV ledger into segments; the lock
+        # stops two workers starting at once from importing it twice
+        marker = self.segments_dir / ".csv_imported"
+        if not marker.exists():
+            with FileLock(self.segments_dir / "import.lock"):
+                if not marker.exists():
+                    self.segments.import_csv(self.expenses_file)
+                    marker.touch()
+
+    def add_expense(self, expense_record: Dict) -> bool:
+        """
+        Add a new expense record to the active write-ahead segment
+
+        Args:
+            expense_record: Dictionary containing expense data
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            csv_record = self._build_csv_record(expense_record)
+            self.segments.append(csv_record)
+            self._record_saved([csv_record])
+            return True
+        except Exception as e:
+            print(f"Error adding expense to segments: {e}")
+            return False
+
+    def add_expenses(self, expense_records: List[Dict]) -> int:
+        """Add several expense records with a single write-ahead append"""
+        csv_records = [self._build_csv_record(record) for record in expense_records]
+        written = self.segments.append_many(csv_records)
+        self._record_saved(csv_records[:written])
+        return written
+
+    def get_all_expenses(self, columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve all expense records in date order
+
+        Args:
+            columns: Optional list of columns to return
+
+        Returns:
+            List of expense dictionaries
+        """
+        if columns:
+            return self.scan_expenses(columns=columns)
+
+        try:
+            return self.segments.scan()
+        except Exception as e:
+            print(f"Error reading expenses from segments: {e}")
+            return []
+
+    def scan_expenses(self, columns: Optional[List[str]] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Dict]:
+        """Scan the segments in range, returning only the requested columns"""
+        unknown = [column for column in columns or [] if column not in self.expense_headers]
+        if unknown:
+            raise ValueError(f"Unknown expense columns: {', '.join(unknown)}")
+
+        expenses = self.segments.scan(start_date=start_date, end_date=end_date, category=category)
+        if not columns:
+            return expenses
+        return [{column: expense[column] for column in columns} for expense in expenses]
+
+    def iter_expenses(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate over expenses in date order, decoding one partition in range at a time"""
+        return self.segments.iter_scan(start_date=start_date, end_date=end_date, category=category)
+
+    def get_expenses_page(self, sort_by: str = "date", descending: bool = False,
+                          cursor: Optional[str] = None, limit: Optional[int] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None,
+                          category: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+        """One keyset-paginated page, seeking past the cursor in the segment store's sort index"""
+        validate_page_request(sort_by, limit, fields, self.expense_headers)
+        after = decode_cursor(cursor, sort_by, descending) if cursor else None
+        keyed = self.segments.page(sort_by, descending, after, limit,
+                                   start_date=start_date, end_date=end_date, category=category)
+
+        has_more = limit is not None and len(keyed) > limit
+        page = keyed[:limit] if limit is not None else keyed
+        return {
+            "expenses": [project(expense, fields) for _, expense in page],
+            "next_cursor": encode_cursor(sort_by, descending, page[-1][0]) if has_more else None,
+        }
+
+    def get_expenses_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """Get expenses within a date range, scanning only the partitions it covers"""
+        try:
+            return self.segments.scan(start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"Error reading expenses from segments: {e}")
+            return []
+
+    def get_expenses_by_category(self, category: str) -> List[Dict]:
+        """Get all expenses for a specific category"""
+        try:
+            return self.segments.scan(category=category)
+        except Exception as e:
+            print(f"Error reading expenses from segments: {e}")
+            return []
+
+    def get_expense_totals(self, group_by: str = "category",
+                           start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict:
+        """Get expense totals grouped by category, month or vendor"""
+        expenses = self.segments.scan(start_date=start_date, end_date=end_date)
+        return ExpenseColumns.from_rows(expenses).totals(group_by)
+
+    def get_category_totals(self, year: Optional[int] = None, month: Optional[int] = None) -> Dict:
+        """Get total and count per category, scanning only the month's partition"""
+        if year and month:
+            start_date = f"{year}-{month:02d}-01"
+            end_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+            return self.get_expense_totals("category", start_date, end_date)
+        return self.get_expense_totals("category")
+
+    def ledger_signature(self):
+        """Changes whenever any process appends to (or compacts) the segments"""
+        return self.segments.signature()
+
+    def ledger_duplicate_hashes(self):
+        """(date, amount, vendor) hashes of the stored expenses, from a column scan"""
+        return ledger_hashes(self.scan_expenses(columns=["date", "amount", "vendor"]))
+
+    def search_expenses(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """Search expenses by vendor, description, business purpose, or notes"""
+        return rank_matches(self.get_all_expenses(), query, limit)
+
+    def import_from_csv(self, csv_file: str) -> int:
+        """
+        Import expenses from a CSV file with the standard expense headers
+
+        Returns:
+            Number of imported records
+        """
+        return self.segments.import_csv(Path(csv_file))
+
+    def export_to_csv(self, output_file: str) -> str:
+        """Export all expenses to a CSV file in date order"""
+        count = self.segments.export_csv(Path(output_file))
+        return f"{count} expenses exported to {output_file}"
+
+    def get_file_stats(self) -> Dict:
+        """
+        Get statistics about the segment storage
+
+        Returns:
+            Dictionary with storage statistics
+        """
+        stats = self.segments.stats()
+        return {
+            "exists": True,
+            "backend": "segments",
+            "file_path": stats["directory"],
+            "file_size_bytes": stats["size_bytes"],
+            "total_records": self.segments.count(),
+            "partitions": stats["partitions"],
+            "write_ahead_segments": stats["write_ahead_segments"]
+        }
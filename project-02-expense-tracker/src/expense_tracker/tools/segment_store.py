@@ -0,0 +1,641 @@
+#!/usr/bin/env python3
+"""
+Append-only Binary Segment Storage for Expense Tracker
+Appends go to a write-ahead segment; compaction merges them into sorted, month-partitioned files
+"""
+
+import csv
+import mmap
+import os
+import struct
+import threading
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .file_lock import FileLock
+from .pagination import sort_key
+
+# Text fields stored in each record payload, in order
+TEXT_FIELDS = ("date", "vendor", "category", "description", "business_purpose", "notes", "created_at")
+
+# Column order of the dictionaries returned to callers (same as the CSV schema)
+EXPENSE_FIELDS = ("date", "amount", "vendor", "category", "description",
+                  "business_purpose", "notes", "created_at")
+
+# Segment file header: magic + generation of the newest write-ahead segment merged into it
+SEGMENT_MAGIC = b"EXPSEG01"
+FILE_HEADER = struct.Struct("<8sQ")
+
+# Fixed-width record header: date ordinal (0 = undated), amount, byte length of each text field
+RECORD_HEADER = struct.Struct("<id" + "I" * len(TEXT_FIELDS))
+
+UNDATED_PARTITION = "undated"
+
+# Sidecar lock files: LOCK_FILENAME guards the segment set (appends, sealing,
+# swapping in compacted partitions, reads); COMPACTION_LOCK_FILENAME lets one
+# process at a time merge sealed segments without blocking appends meanwhile
+LOCK_FILENAME = "segments.lock"
+COMPACTION_LOCK_FILENAME = "compaction.lock"
+
+
+def _date_ordinal(date_str: str) -> int:
+    try:
+        return date.fromisoformat(date_str).toordinal()
+    except (TypeError, ValueError):
+        return 0
+
+
+def _partition_of(ordinal: int) -> str:
+    return date.fromordinal(ordinal).strftime("%Y-%m") if ordinal else UNDATED_PARTITION
+
+
+def _to_amount(value) -> float:
+    try:
+        return float(value) if value not in (None, "") else 0.0
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def encode_record(record: Dict) -> Tuple[int, bytes]:
+    """Encode an expense dictionary as (date ordinal, binary record)"""
+    payloads = [("" if record.get(field) is None else str(record.get(field))).encode("utf-8")
+                for field in TEXT_FIELDS]
+    ordinal = _date_ordinal(record.get("date") or "")
+    header = RECORD_HEADER.pack(ordinal, _to_amount(record.get("amount")), *(len(p) for p in payloads))
+    return ordinal, header + b"".join(payloads)
+
+
+def _decode_payload(buffer, offset: int, amount: float, lengths) -> Dict:
+    values = {}
+    for field, length in zip(TEXT_FIELDS, lengths):
+        values[field] = bytes(buffer[offset:offset + length]).decode("utf-8")
+        offset += length
+    values["amount"] = amount
+    return {field: values[field] for field in EXPENSE_FIELDS}
+
+
+def read_generation(path: Path) -> int:
+    """Return the generation stamped in a segment file header (-1 if missing/invalid)"""
+    try:
+        with open(path, "rb") as f:
+            magic, generation = FILE_HEADER.unpack(f.read(FILE_HEADER.size))
+    except (FileNotFoundError, struct.error):
+        return -1
+    return generation if magic == SEGMENT_MAGIC else -1
+
+
+def read_segment(path: Path, lo: Optional[int] = None, hi: Optional[int] = None,
+                 category: Optional[str] = None, start: int = FILE_HEADER.size) -> List[Tuple[int, Dict]]:
+    """
+    Memory-map a segment file and decode the records that match
+
+    Records outside [lo, hi] (date ordinals) are skipped from their fixed-width
+    header alone; the category filter decodes only the category field. start
+    is the byte offset of the first record to read (default: the first one).
+
+    Returns:
+        List of (date ordinal, expense dictionary) in file order
+    """
+    matches: List[Tuple[int, Dict]] = []
+    category_index = TEXT_FIELDS.index("category")
+    category_upper = category.upper() if category is not None else None
+
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= FILE_HEADER.size:
+            return matches
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offset = max(start, FILE_HEADER.size)
+            while offset + RECORD_HEADER.size <= size:
+                ordinal, amount, *lengths = RECORD_HEADER.unpack_from(buffer, offset)
+                body = offset + RECORD_HEADER.size
+                end = body + sum(lengths)
+                if end > size:
+                    break  # torn tail from an interrupted append
+
+                in_range = (lo is None or ordinal >= lo) and (hi is None or ordinal <= hi)
+                if in_range and category_upper is not None:
+                    start = body + sum(lengths[:category_index])
+                    value = bytes(buffer[start:start + lengths[category_index]]).decode("utf-8")
+                    in_range = value.upper() == category_upper
+                if in_range:
+                    matches.append((ordinal, _decode_payload(buffer, body, amount, lengths)))
+                offset = end
+
+    return matches
+
+
+def _valid_length(path: Path, start: int = FILE_HEADER.size) -> int:
+    """Byte length of the well-formed prefix of a segment file (start: a record boundary known to be valid)"""
+    size = path.stat().st_size
+    offset = max(start, FILE_HEADER.size)
+    with open(path, "rb") as f:
+        f.seek(offset)
+        while offset + RECORD_HEADER.size <= size:
+            header = f.read(RECORD_HEADER.size)
+            _, _, *lengths = RECORD_HEADER.unpack(header)
+            end = offset + RECORD_HEADER.size + sum(lengths)
+            if end > size:
+                break
+            f.seek(end)
+            offset = end
+    return min(offset, size)
+
+
+def read_ordinals(path: Path) -> List[int]:
+    """Date ordinal of every record in a segment, read from the fixed-width headers only"""
+    ordinals: List[int] = []
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size <= FILE_HEADER.size:
+            return ordinals
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            offset = FILE_HEADER.size
+            while offset + RECORD_HEADER.size <= size:
+                ordinal, _, *lengths = RECORD_HEADER.unpack_from(buffer, offset)
+                offset += RECORD_HEADER.size + sum(lengths)
+                if offset > size:
+                    break
+                ordinals.append(ordinal)
+    return ordinals
+
+
+def _sort_key(item: Tuple[int, Dict]):
+    return (item[0], item[1].get("created_at") or "")
+
+
+def _partition_in_range(name: str, start_date: Optional[str], end_date: Optional[str]) -> bool:
+    if name == UNDATED_PARTITION:
+        return not (start_date or end_date)
+    return not ((start_date and name < start_date[:7]) or (end_date and name > end_date[:7]))
+
+
+class SegmentStore:
+    """
+    Expense storage made of binary segment files in one directory
+
+    - wal-<generation>.seg: write-ahead segments; the highest generation receives appends
+    - part-YYYY-MM.seg / part-undated.seg: date-sorted partitions produced by compaction
+
+    A partition's header records the newest write-ahead generation merged into it,
+    so readers (and crash recovery) skip write-ahead records that a partition
+    already contains.
+
+    Several processes can share a directory: every change to the set of
+    segment files happens under a cross-process FileLock, and the active
+    generation is re-read from disk under it, so an append never lands in a
+    segment that another process has sealed or compacted away.
+    """
+
+    def __init__(self, directory: Path, compact_threshold: Optional[int] = None):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.compact_threshold = compact_threshold or int(
+            os.environ.get("EXPENSE_SEGMENT_COMPACT_RECORDS", "1000")
+        )
+
+        self._lock = threading.RLock()
+        self._compaction_lock = threading.Lock()
+        self._lock_file = self.directory / LOCK_FILENAME
+        self._compaction_lock_file = self.directory / COMPACTION_LOCK_FILENAME
+        self._compaction_thread: Optional[threading.Thread] = None
+
+        self._active_generation = 0
+        self._active_records = 0
+        # Bytes of the active segment known to be whole records (checked up to here)
+        self._active_valid = FILE_HEADER.size
+
+        # Paging snapshot: decoded records with their date ordinals, sort indexes
+        # over them built on demand, and the (size, mtime_ns) of every segment
+        # file they reflect (None until first used)
+        self._rows: List[Dict] = []
+        self._row_ordinals: List[int] = []
+        self._sort_indexes: Dict[str, List[Tuple]] = {}
+        self._snapshot: Optional[Dict[str, Tuple[int, int]]] = None
+
+        self._recover()
+
+    # ---- file layout helpers -------------------------------------------------
+
+    def _wal_path(self, generation: int) -> Path:
+        return self.directory / f"wal-{generation:08d}.seg"
+
+    def _partition_path(self, partition: str) -> Path:
+        return self.directory / f"part-{partition}.seg"
+
+    def _wal_generations(self) -> List[int]:
+        generations = []
+        for path in self.directory.glob("wal-*.seg"):
+            try:
+                generations.append(int(path.stem.split("-", 1)[1]))
+            except ValueError:
+                continue
+        return sorted(generations)
+
+    def _partitions(self) -> Dict[str, Path]:
+        return {path.stem.split("-", 1)[1]: path for path in self.directory.glob("part-*.seg")}
+
+    def _create_segment(self, path: Path, generation: int) -> None:
+        with open(path, "wb") as f:
+            f.write(FILE_HEADER.pack(SEGMENT_MAGIC, generation))
+
+    def _recover(self) -> None:
+        """Open (or create) the active write-ahead segment, trimming any torn tail"""
+        with self._lock, FileLock(self._lock_file):
+            generations = self._wal_generations()
+            if not generations:
+                self._active_generation = 1
+                self._create_segment(self._wal_path(1), 1)
+                self._active_records = 0
+                self._active_valid = FILE_HEADER.size
+                return
+
+            self._active_generation = generations[-1]
+            active = self._wal_path(self._active_generation)
+            valid = _valid_length(active)
+            if valid < active.stat().st_size:
+                with open(active, "r+b") as f:
+                    f.truncate(valid)
+            self._active_records = len(read_ordinals(active))
+            self._active_valid = valid
+
+        if len(generations) > 1:
+            # Sealed segments left by an interrupted compaction
+            self._schedule_compaction()
+
+    def _sync_active(self) -> Path:
+        """
+        Path of the active write-ahead segment as it is on disk (call with the file lock held)
+
+        Another process may have sealed our active segment since the last
+        write; then the newest generation takes the appends instead. Bytes
+        appended by other processes since our last write are checked record by
+        record, and a torn tail left by one that crashed mid-append is trimmed
+        (as on open) so the next record doesn't land behind garbage.
+        """
+        generations = self._wal_generations()
+        if not generations:
+            # Everything was compacted and no process has opened a new segment yet
+            generation = self._active_generation + 1
+            self._create_segment(self._wal_path(generation), generation)
+            generations = [generation]
+        if generations[-1] != self._active_generation:
+            self._active_generation = generations[-1]
+            self._active_valid = FILE_HEADER.size
+
+        active = self._wal_path(self._active_generation)
+        size = active.stat().st_size
+        if size != self._active_valid:
+            valid = _valid_length(active, self._active_valid)
+            if valid < size:
+                with open(active, "r+b") as f:
+                    f.truncate(valid)
+            self._active_records = len(read_ordinals(active))
+            self._active_valid = valid
+        return active
+
+    # ---- writes --------------------------------------------------------------
+
+    def append_many(self, records: List[Dict]) -> int:
+        """Append records to the active write-ahead segment in one buffered write"""
+        if not records:
+            return 0
+
+        data = b"".join(encode_record(record)[1] for record in records)
+        with self._lock, FileLock(self._lock_file):
+            with open(self._sync_active(), "ab") as f:
+                f.write(data)
+            self._active_records += len(records)
+            self._active_valid += len(data)
+            compact = self._active_records >= self.compact_threshold
+        if compact:
+            self._schedule_compaction()
+        return len(records)
+
+    def append(self, record: Dict) -> None:
+        self.append_many([record])
+
+    # ---- reads ---------------------------------------------------------------
+
+    def scan(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+             category: Optional[str] = None) -> List[Dict]:
+        """
+        Return expenses sorted by date, reading only the partitions in range
+
+        Args:
+            start_date: Optional inclusive start date (YYYY-MM-DD)
+            end_date: Optional inclusive end date (YYYY-MM-DD)
+            category: Optional category filter (case-insensitive)
+        """
+        with self._lock, FileLock(self._lock_file):
+            matches = self._scan(start_date, end_date, category)
+        return [record for _, record in matches]
+
+    def _scan(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+              category: Optional[str] = None) -> List[Tuple[int, Dict]]:
+        """(date ordinal, expense) pairs sorted by date (call with the file lock held)"""
+        lo = date.fromisoformat(start_date).toordinal() if start_date else None
+        hi = date.fromisoformat(end_date).toordinal() if end_date else None
+        dated_only = lo is not None or hi is not None
+
+        partitions = self._partitions()
+        partition_generations = {name: read_generation(path) for name, path in partitions.items()}
+
+        matches: List[Tuple[int, Dict]] = []
+        for name, path in partitions.items():
+            if _partition_in_range(name, start_date, end_date):
+                matches.extend(read_segment(path, lo, hi, category))
+
+        for generation in self._wal_generations():
+            for ordinal, record in read_segment(self._wal_path(generation), lo, hi, category):
+                if dated_only and not ordinal:
+                    continue
+                if partition_generations.get(_partition_of(ordinal), -1) < generation:
+                    matches.append((ordinal, record))
+
+        matches.sort(key=_sort_key)
+        return matches
+
+    def iter_scan(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                  category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Yield the expenses scan() returns, decoding one partition at a time
+
+        Only one partition and the not yet compacted write-ahead records are
+        held in memory. The file lock is taken per partition rather than for
+        the whole iteration; write-ahead records that a compaction merges into
+        a partition meanwhile are read from the partition instead.
+        """
+        lo = date.fromisoformat(start_date).toordinal() if start_date else None
+        hi = date.fromisoformat(end_date).toordinal() if end_date else None
+        dated_only = lo is not None or hi is not None
+
+        # Partition name -> (write-ahead generation, date ordinal, expense) not merged into it yet
+        pending: Dict[str, List[Tuple[int, int, Dict]]] = {}
+        with self._lock, FileLock(self._lock_file):
+            partitions = self._partitions()
+            names = {name for name in partitions if _partition_in_range(name, start_date, end_date)}
+            partition_generations = {name: read_generation(path) for name, path in partitions.items()}
+            for generation in self._wal_generations():
+                for ordinal, record in read_segment(self._wal_path(generation), lo, hi, category):
+                    if dated_only and not ordinal:
+                        continue
+                    name = _partition_of(ordinal)
+                    if partition_generations.get(name, -1) < generation:
+                        pending.setdefault(name, []).append((generation, ordinal, record))
+
+        # The undated partition (ordinal 0) sorts first, then months in order
+        for name in sorted(names | set(pending), key=lambda name: (name != UNDATED_PARTITION, name)):
+            with self._lock, FileLock(self._lock_file):
+                path = self._partition_path(name)
+                merged = read_generation(path)
+                matches = read_segment(path, lo, hi, category) if merged >= 0 else []
+            matches.extend((ordinal, record) for generation, ordinal, record in pending.pop(name, [])
+                           if generation > merged)
+            matches.sort(key=_sort_key)
+            for _, record in matches:
+                yield record
+
+    # ---- keyset paging -------------------------------------------------------
+
+    def _file_snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        for path in list(self.directory.glob("part-*.seg")) + list(self.directory.glob("wal-*.seg")):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            snapshot[path.name] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    def signature(self) -> Tuple:
+        """(name, size, mtime_ns) of every segment; changes with any append or compaction"""
+        return tuple(sorted((name, size, mtime) for name, (size, mtime) in self._file_snapshot().items()))
+
+    def _refresh_rows(self) -> None:
+        """
+        Bring the paging snapshot up to date (call with the file lock held)
+
+        When only the active write-ahead segment grew, just its new records
+        are decoded and inserted into the sort indexes; after a compaction or
+        a new generation the snapshot is rebuilt from a full scan.
+        """
+        snapshot = self._file_snapshot()
+        if snapshot == self._snapshot:
+            return
+
+        previous = self._snapshot
+        generations = self._wal_generations()
+        active = self._wal_path(generations[-1]).name if generations else None
+        appended_only = (
+            previous is not None and active is not None and snapshot.keys() == previous.keys()
+            and all(snapshot[name] == previous[name] for name in snapshot if name != active)
+            and snapshot[active][0] >= previous[active][0]
+        )
+        if appended_only:
+            for ordinal, record in read_segment(self.directory / active, start=previous[active][0]):
+                row_id = len(self._rows)
+                self._rows.append(record)
+                self._row_ordinals.append(ordinal)
+                for sort_by, keys in self._sort_indexes.items():
+                    insort(keys, sort_key(record, sort_by, row_id))
+        else:
+            matches = self._scan()
+            self._rows = [record for _, record in matches]
+            self._row_ordinals = [ordinal for ordinal, _ in matches]
+            self._sort_indexes = {}
+        self._snapshot = snapshot
+
+    def _sort_index(self, sort_by: str) -> List[Tuple]:
+        keys = self._sort_indexes.get(sort_by)
+        if keys is None:
+            keys = sorted(sort_key(row, sort_by, row_id) for row_id, row in enumerate(self._rows))
+            self._sort_indexes[sort_by] = keys
+        return keys
+
+    def page(self, sort_by: str, descending: bool, after: Optional[Tuple], limit: Optional[int],
+             start_date: Optional[str] = None, end_date: Optional[str] = None,
+             category: Optional[str] = None) -> List[Tuple[Tuple, Dict]]:
+        """
+        One keyset page as (sort key, expense) pairs, fetching limit + 1 rows
+        so the caller can tell whether another page follows
+
+        Seeks into a sort index over the stored expenses (kept in memory and
+        extended as records are appended) and walks it from the cursor until the
+        page is full, so a page doesn't cost a full scan and sort. Date-sorted
+        pages also start and stop at the date bounds.
+        """
+        lo = date.fromisoformat(start_date).toordinal() if start_date else None
+        hi = date.fromisoformat(end_date).toordinal() if end_date else None
+        wanted_category = category.upper() if category is not None else None
+
+        with self._lock, FileLock(self._lock_file):
+            self._refresh_rows()
+            keys = self._sort_index(sort_by)
+
+            first, last = 0, len(keys)
+            if sort_by == "date":
+                if start_date:
+                    first = bisect_left(keys, (start_date,))
+                if end_date:
+                    last = bisect_left(keys, (end_date + "\x00",))
+            if after is not None:
+                if descending:
+                    last = min(last, bisect_left(keys, after))
+                else:
+                    first = max(first, bisect_right(keys, after))
+
+            positions = range(last - 1, first - 1, -1) if descending else range(first, last)
+            page: List[Tuple[Tuple, Dict]] = []
+            for position in positions:
+                key = keys[position]
+                row_id = key[-1]
+                ordinal = self._row_ordinals[row_id]
+                if (lo is not None or hi is not None) and (
+                        not ordinal or (lo is not None and ordinal < lo) or (hi is not None and ordinal > hi)):
+                    continue
+                row = self._rows[row_id]
+                if wanted_category is not None and (row.get("category") or "").upper() != wanted_category:
+                    continue
+                page.append((key, dict(row)))
+                if limit is not None and len(page) > limit:
+                    break
+            return page
+
+    def count(self) -> int:
+        """Number of stored expenses, counted from record headers without decoding"""
+        with self._lock, FileLock(self._lock_file):
+            partitions = self._partitions()
+            partition_generations = {name: read_generation(path) for name, path in partitions.items()}
+            total = sum(len(read_ordinals(path)) for path in partitions.values())
+            for generation in self._wal_generations():
+                total += sum(
+                    1 for ordinal in read_ordinals(self._wal_path(generation))
+                    if partition_generations.get(_partition_of(ordinal), -1) < generation
+                )
+            return total
+
+    def stats(self) -> Dict:
+        with self._lock:
+            partitions = self._partitions()
+            wal_paths = [self._wal_path(g) for g in self._wal_generations()]
+            return {
+                "directory": str(self.directory),
+                "partitions": len(partitions),
+                "write_ahead_segments": len(wal_paths),
+                "active_segment_records": self._active_records,
+                "size_bytes": sum(p.stat().st_size for p in list(partitions.values()) + wal_paths),
+            }
+
+    # ---- compaction ----------------------------------------------------------
+
+    def _schedule_compaction(self) -> None:
+        with self._lock:
+            if self._compaction_thread is not None and self._compaction_thread.is_alive():
+                return
+            self._compaction_thread = threading.Thread(target=self.compact, daemon=True)
+            self._compaction_thread.start()
+
+    def _seal_active(self) -> List[int]:
+        """Start a new active segment and return the generations ready to compact"""
+        with self._lock, FileLock(self._lock_file):
+            active = self._sync_active()
+            if len(read_ordinals(active)):
+                self._active_generation += 1
+                self._create_segment(self._wal_path(self._active_generation), self._active_generation)
+                self._active_records = 0
+                self._active_valid = FILE_HEADER.size
+            return [g for g in self._wal_generations() if g < self._active_generation]
+
+    def compact(self) -> int:
+        """
+        Merge sealed write-ahead segments into sorted partitions
+
+        Returns:
+            Number of write-ahead segments compacted
+        """
+        with self._compaction_lock, FileLock(self._compaction_lock_file):
+            sealed = self._seal_active()
+            compacted = 0
+            for generation in sealed:
+                compacted += self._compact_generation(generation)
+            return compacted
+
+    def _compact_generation(self, generation: int) -> int:
+        wal_path = self._wal_path(generation)
+        if not wal_path.exists():
+            return 0  # compacted by another process
+        by_partition: Dict[str, List[Tuple[int, Dict]]] = {}
+        for ordinal, record in read_segment(wal_path):
+            by_partition.setdefault(_partition_of(ordinal), []).append((ordinal, record))
+
+        replacements: List[Tuple[Path, Path]] = []
+        for partition, items in by_partition.items():
+            partition_path = self._partition_path(partition)
+            if read_generation(partition_path) >= generation:
+                continue  # merged before an interrupted compaction stopped
+
+            if partition_path.exists():
+                items = read_segment(partition_path) + items
+            items.sort(key=_sort_key)
+
+            temp_path = partition_path.with_suffix(".tmp")
+            with open(temp_path, "wb") as f:
+                f.write(FILE_HEADER.pack(SEGMENT_MAGIC, generation))
+                f.write(b"".join(encode_record(record)[1] for _, record in items))
+                f.flush()
+                os.fsync(f.fileno())
+            replacements.append((temp_path, partition_path))
+
+        with self._lock, FileLock(self._lock_file):
+            for temp_path, partition_path in replacements:
+                os.replace(temp_path, partition_path)
+            wal_path.unlink()
+        return 1
+
+    # ---- CSV import / export -------------------------------------------------
+
+    def import_csv(self, csv_path: Path, batch_size: int = 5000) -> int:
+        """Append every row of an expenses CSV file, then compact"""
+        imported = 0
+        batch: List[Dict] = []
+        with open(csv_path, "r", newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                batch.append(row)
+                if len(batch) >= batch_size:
+                    imported += self.append_many(batch)
+                    batch = []
+        imported += self.append_many(batch)
+        self.compact()
+        return imported
+
+    def export_csv(self, csv_path: Path) -> int:
+        """Write every stored expense to a CSV file in date order"""
+        written = 0
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=list(EXPENSE_FIELDS))
+            writer.writeheader()
+            for expense in self.iter_scan():
+                writer.writerow(expense)
+                written += 1
+        return written
+
+
+# Process-wide registry so every handler for the same directory shares one store
+_segment_stores: Dict[str, SegmentStore] = {}
+_segment_stores_lock = threading.Lock()
+
+
+def get_segment_store(directory: Path) -> SegmentStore:
+    """Get or create the shared SegmentStore for a directory"""
+    key = str(Path(directory).resolve())
+    with _segment_stores_lock:
+        store = _segment_stores.get(key)
+        if store is None:
+            store = SegmentStore(Path(directory))
+            _segment_stores[key] = store
+        return store
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+SQLite-backed Expense Handler
+Same interface as ExpenseCSVHandler, storing expenses in SQLite (see sqlite_store.py)
+"""
+
+import calendar
+from typing import Dict, Iterator, List, Optional
+
+from .aggregation import GROUP_BY_FIELDS
+from .batch_validation import ledger_hashes
+from .csv_handler import DEFAULT_DATA_DIR, ExpenseCSVHandler
+from .pagination import decode_cursor, encode_cursor, project, validate_page_request
+from .search_index import rank_matches
+from .sqlite_store import get_sqlite_store
+
+DATABASE_FILENAME = "expenses.sqlite3"
+
+
+class ExpenseSQLiteHandler(ExpenseCSVHandler):
+    """Handles expense storage in a SQLite database, with filters, totals and search run as SQL"""
+
+    def __init__(self, data_dir: str = DEFAULT_DATA_DIR, tenant_id: Optional[str] = None):
+        super().__init__(data_dir, tenant_id)
+        self.database_file = self.data_dir / DATABASE_FILENAME
+        self.sqlite = get_sqlite_store(self.database_file)
+
+        # One-shot import of the existing CSV ledger into the database
+        self.sqlite.migrate_csv(self.expenses_file)
+
+    def add_expense(self, expense_record: Dict) -> bool:
+        """
+        Add a new expense record to the database
+
+        Args:
+            expense_record: Dictionary containing expense data
+
+        Returns:
+            bool: True if successful, False otherwise
+        """
+        try:
+            csv_record = self._build_csv_record(expense_record)
+            self.sqlite.insert_many([csv_record])
+            self._record_saved([csv_record])
+            return True
+        except Exception as e:
+            print(f"Error adding expense to SQLite: {e}")
+            return False
+
+    def add_expenses(self, expense_records: List[Dict]) -> int:
+        """Add several expense records in a single transaction"""
+        csv_records = [self._build_csv_record(record) for record in expense_records]
+        written = self.sqlite.insert_many(csv_records)
+        self._record_saved(csv_records[:written])
+        return written
+
+    def get_all_expenses(self, columns: Optional[List[str]] = None) -> List[Dict]:
+        """
+        Retrieve all expense records in insertion order
+
+        Args:
+            columns: Optional list of columns to return
+
+        Returns:
+            List of expense dictionaries
+        """
+        if columns:
+            return self.scan_expenses(columns=columns)
+
+        try:
+            return self.sqlite.select()
+        except Exception as e:
+            print(f"Error reading expenses from SQLite: {e}")
+            return []
+
+    def scan_expenses(self, columns: Optional[List[str]] = None,
+                      start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> List[Dict]:
+        """Select the expenses in range, reading only the requested columns"""
+        unknown = [column for column in columns or [] if column not in self.expense_headers]
+        if unknown:
+            raise ValueError(f"Unknown expense columns: {', '.join(unknown)}")
+        return self.sqlite.select(columns, start_date=start_date, end_date=end_date, category=category)
+
+    def iter_expenses(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                      category: Optional[str] = None) -> Iterator[Dict]:
+        """Iterate over expenses in insertion order, fetching them in batches"""
+        return self.sqlite.stream(start_date=start_date, end_date=end_date, category=category)
+
+    def get_expenses_page(self, sort_by: str = "date", descending: bool = False,
+                          cursor: Optional[str] = None, limit: Optional[int] = None,
+                          start_date: Optional[str] = None, end_date: Optional[str] = None,
+                          category: Optional[str] = None, fields: Optional[List[str]] = None) -> Dict:
+        """One keyset-paginated page, seeking past the cursor with an indexed row-value comparison"""
+        validate_page_request(sort_by, limit, fields, self.expense_headers)
+        after = decode_cursor(cursor, sort_by, descending) if cursor else None
+        keyed = self.sqlite.page(sort_by, descending, after, limit,
+                                 start_date=start_date, end_date=end_date, category=category)
+
+        has_more = limit is not None and len(keyed) > limit
+        page = keyed[:limit] if limit is not None else keyed
+        return {
+            "expenses": [project(expense, fields) for _, expense in page],
+            "next_cursor": encode_cursor(sort_by, descending, page[-1][0]) if has_more else None,
+        }
+
+    def get_expenses_by_date_range(self, start_date: str, end_date: str) -> List[Dict]:
+        """Get expenses within a date range from the date index, in insertion order"""
+        try:
+            return self.sqlite.select(start_date=start_date, end_date=end_date)
+        except Exception as e:
+            print(f"Error reading expenses from SQLite: {e}")
+            return []
+
+    def get_expenses_by_category(self, category: str) -> List[Dict]:
+        """Get all expenses for a specific category (case-insensitive)"""
+        try:
+            return self.sqlite.select(category=category)
+        except Exception as e:
+            print(f"Error reading expenses from SQLite: {e}")
+            return []
+
+    def get_expense_totals(self, group_by: str = "category",
+                           start_date: Optional[str] = None, end_date: Optional[str] = None) -> Dict:
+        """Get expense totals grouped by category, month or vendor with a SQL GROUP BY"""
+        if group_by not in GROUP_BY_FIELDS:
+            raise ValueError(f"group_by must be one of {', '.join(GROUP_BY_FIELDS)}")
+        return self.sqlite.totals(group_by, start_date, end_date)
+
+    def get_category_totals(self, year: Optional[int] = None, month: Optional[int] = None) -> Dict:
+        """Get total and count per category, for one month or all-time"""
+        if year and month:
+            start_date = f"{year}-{month:02d}-01"
+            end_date = f"{year}-{month:02d}-{calendar.monthrange(year, month)[1]:02d}"
+            return self.get_expense_totals("category", start_date, end_date)
+        return self.get_expense_totals("category")
+
+    def search_expenses(self, query: str, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Search expenses by vendor, description, business purpose, or notes
+
+        Matches come from the FTS5 table; only they are ranked in Python, with
+        the same scoring as the in-memory search index.
+        """
+        try:
+            return rank_matches(self.sqlite.search_candidates(query), query, limit)
+        except Exception as e:
+            print(f"Error searching expenses: {e}")
+            return []
+
+    def ledger_signature(self):
+        """Changes whenever any process inserts an expense"""
+        return self.sqlite.signature()
+
+    def ledger_duplicate_hashes(self):
+        """(date, amount, vendor) hashes of the stored expenses, from a column select"""
+        return ledger_hashes(self.scan_expenses(columns=["date", "amount", "vendor"]))
+
+    def get_file_stats(self) -> Dict:
+        """
+        Get statistics about the SQLite database
+
+        Returns:
+            Dictionary with storage statistics
+        """
+        stats = self.sqlite.stats()
+        return {
+            "exists": True,
+            "backend": "sqlite",
+            "file_path": stats["path"],
+            "file_size_bytes": stats["size_bytes"],
+            "total_records": self.sqlite.count(),
+            "full_text_search": stats["fts_enabled"]
+        }
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+SQLite Expense Store
+Expenses table in WAL mode with covering date/category indexes and an FTS5 search table
+"""
+
+import csv
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+EXPENSE_FIELDS = (
+    "date", "amount", "vendor", "category", "description",
+    "business_purpose", "notes", "created_at",
+)
+SEARCH_FIELDS = ("vendor", "description", "business_purpose", "notes")
+
+# Prepared statements kept per connection; every query below is built from a
+# fixed set of templates, so repeated calls reuse the compiled statement
+STATEMENT_CACHE_SIZE = 256
+
+# Rows fetched per query when streaming
+STREAM_BATCH_SIZE = 1000
+
+# Shortest query the trigram FTS table can answer (shorter ones fall back to LIKE)
+MIN_FTS_QUERY_LENGTH = 3
+
+_COLUMNS = ", ".join(EXPENSE_FIELDS)
+_ISO_DATE_GLOB = "[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]"
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS expenses (
+    id INTEGER PRIMARY KEY,
+    date TEXT NOT NULL DEFAULT '',
+    amount REAL,
+    vendor TEXT NOT NULL DEFAULT '',
+    category TEXT NOT NULL DEFAULT '',
+    description TEXT NOT NULL DEFAULT '',
+    business_purpose TEXT NOT NULL DEFAULT '',
+    notes TEXT NOT NULL DEFAULT '',
+    created_at TEXT NOT NULL DEFAULT ''
+);
+-- Covering indexes: date-range totals, monthly rollups and date-sorted pages
+-- (and the same per category) are answered from the index alone
+CREATE INDEX IF NOT EXISTS expenses_date ON expenses (date, created_at, category, amount);
+CREATE INDEX IF NOT EXISTS expenses_category_date
+    ON expenses (category COLLATE NOCASE, date, created_at, amount);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+"""
+
+_FTS_SCHEMA = f"""
+CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+    {", ".join(SEARCH_FIELDS)}, content='expenses', content_rowid='id', tokenize='trigram'
+);
+CREATE TRIGGER IF NOT EXISTS expenses_fts_insert AFTER INSERT ON expenses BEGIN
+    INSERT INTO expenses_fts (rowid, {", ".join(SEARCH_FIELDS)})
+    VALUES (new.id, {", ".join(f"new.{field}" for field in SEARCH_FIELDS)});
+END;
+CREATE TRIGGER IF NOT EXISTS expenses_fts_delete AFTER DELETE ON expenses BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, {", ".join(SEARCH_FIELDS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{field}" for field in SEARCH_FIELDS)});
+END;
+CREATE TRIGGER IF NOT EXISTS expenses_fts_update AFTER UPDATE ON expenses BEGIN
+    INSERT INTO expenses_fts (expenses_fts, rowid, {", ".join(SEARCH_FIELDS)})
+    VALUES ('delete', old.id, {", ".join(f"old.{field}" for field in SEARCH_FIELDS)});
+    INSERT INTO expenses_fts (rowid, {", ".join(SEARCH_FIELDS)})
+    VALUES (new.id, {", ".join(f"new.{field}" for field in SEARCH_FIELDS)});
+END;
+"""
+
+_INSERT = f"INSERT INTO expenses ({_COLUMNS}) VALUES ({', '.join('?' for _ in EXPENSE_FIELDS)})"
+_COUNT = "SELECT COUNT(*) FROM expenses"
+_LAST_ID = "SELECT MAX(id) FROM expenses"
+_GET_META = "SELECT value FROM meta WHERE key = ?"
+_SET_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+
+# Sort value of each keyset-paginated order (see pagination.sort_key)
+_SORT_EXPRESSIONS = {
+    "date": "date",
+    "amount": "CASE WHEN typeof(amount) IN ('real', 'integer') THEN amount ELSE 0.0 END",
+    "vendor": "lower(vendor)",
+}
+_GROUP_EXPRESSIONS = {"category": "category", "vendor": "vendor", "month": "substr(date, 1, 7)"}
+
+
+def _to_amount(value):
+    """Store amounts as REAL where they parse, keeping the raw text otherwise"""
+    if value in (None, ""):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return value
+
+
+def _row_values(row: Dict) -> Tuple:
+    values = tuple("" if row.get(field) is None else row.get(field) for field in EXPENSE_FIELDS)
+    return (values[0], _to_amount(values[1])) + values[2:]
+
+
+def _filters(start_date: Optional[str], end_date: Optional[str],
+             category: Optional[str]) -> Tuple[List[str], List]:
+    clauses, params = [], []
+    if start_date:
+        clauses.append("date >= ?")
+        params.append(start_date)
+    if end_date:
+        clauses.append("date <= ?")
+        params.append(end_date)
+    if category is not None:
+        clauses.append("category = ? COLLATE NOCASE")
+        params.append(category)
+    return clauses, params
+
+
+def _where(clauses: List[str]) -> str:
+    return f" WHERE {' AND '.join(clauses)}" if clauses else ""
+
+
+def _escape_like(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+class SQLiteExpenseStore:
+    """
+    Expense table in a single SQLite database
+
+    - WAL journal, so readers never block the writer (or each other)
+    - one connection per thread, each with its own prepared-statement cache
+    - covering indexes on (date, ...) and (category, date, ...) so range
+      scans, totals and date-sorted pages don't touch the table rows
+    - an external-content FTS5 trigram table, kept in sync by triggers, for
+      substring search (LIKE scans when FTS5 is unavailable)
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._local = threading.local()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+
+        conn = self._connection()
+        conn.executescript(_SCHEMA)
+        try:
+            conn.executescript(_FTS_SCHEMA)
+            self.fts_enabled = True
+        except sqlite3.OperationalError as e:
+            print(f"FTS5 unavailable, expense search will scan with LIKE: {e}")
+            self.fts_enabled = False
+        self._migrated = False
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, timeout=30,
+                                   cached_statements=STATEMENT_CACHE_SIZE)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def migrate_csv(self, csv_path: Path) -> int:
+        """
+        One-shot import of a CSV ledger, recorded in the meta table so it
+        happens once per database even with several workers starting at once
+
+        Returns:
+            Number of imported records (0 if the ledger was already migrated)
+        """
+        if self._migrated:
+            return 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if conn.execute(_GET_META, ("csv_migrated",)).fetchone() is not None:
+                conn.execute("COMMIT")
+                self._migrated = True
+                return 0
+            imported = 0
+            if Path(csv_path).exists():
+                with open(csv_path, "r", newline="", encoding="utf-8") as f:
+                    rows = (_row_values(row) for row in csv.DictReader(f))
+                    imported = conn.executemany(_INSERT, rows).rowcount
+            conn.execute(_SET_META, ("csv_migrated", str(csv_path)))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        self._migrated = True
+        return imported
+
+    def insert_many(self, rows: List[Dict]) -> int:
+        """Insert expenses in one transaction; returns the number written"""
+        if not rows:
+            return 0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_INSERT, [_row_values(row) for row in rows])
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def count(self) -> int:
+        return self._connection().execute(_COUNT).fetchone()[0]
+
+    def signature(self) -> Optional[int]:
+        """Id of the newest expense; changes with every insert, from any process"""
+        return self._connection().execute(_LAST_ID).fetchone()[0]
+
+    def select(self, columns: Optional[List[str]] = None, start_date: Optional[str] = None,
+               end_date: Optional[str] = None, category: Optional[str] = None) -> List[Dict]:
+        """Expenses matching optional date bounds and category, in insertion order"""
+        clauses, params = _filters(start_date, end_date, category)
+        sql = f"SELECT {', '.join(columns or EXPENSE_FIELDS)} FROM expenses{_where(clauses)} ORDER BY id"
+        return [dict(row) for row in self._connection().execute(sql, params)]
+
+    def stream(self, start_date: Optional[str] = None, end_date: Optional[str] = None,
+               category: Optional[str] = None) -> Iterator[Dict]:
+        """
+        Iterate over matching expenses in insertion order, one batch per query
+
+        Each batch runs on the calling thread's connection, so the iterator can
+        be consumed from a thread pool (as streaming responses do).
+        """
+        clauses, params = _filters(start_date, end_date, category)
+        sql = (f"SELECT id, {_COLUMNS} FROM expenses{_where(clauses + ['id > ?'])} "
+               f"ORDER BY id LIMIT {STREAM_BATCH_SIZE}")
+        last_id = 0
+        while True:
+            rows = self._connection().execute(sql, params + [last_id]).fetchall()
+            for row in rows:
+                expense = dict(row)
+                last_id = expense.pop("id")
+                yield expense
+            if len(rows) < STREAM_BATCH_SIZE:
+                return
+
+    def page(self, sort_by: str, descending: bool, after: Optional[Tuple], limit: Optional[int],
+             start_date: Optional[str] = None, end_date: Optional[str] = None,
+             category: Optional[str] = None) -> List[Tuple[Tuple, Dict]]:
+        """
+        One keyset page as (sort key, expense) pairs, fetching limit + 1 rows
+        so the caller can tell whether another page follows
+
+        The key is (sort value, created_at, row id), compared as a row value.
+        """
+        expression = _SORT_EXPRESSIONS[sort_by]
+        clauses, params = _filters(start_date, end_date, category)
+        if after is not None:
+            clauses.append(f"({expression}, created_at, id) {'<' if descending else '>'} (?, ?, ?)")
+            params.extend(after)
+        direction = "DESC" if descending else "ASC"
+        sql = (f"SELECT {expression} AS sort_value, id, {_COLUMNS} FROM expenses{_where(clauses)} "
+               f"ORDER BY sort_value {direction}, created_at {direction}, id {direction}")
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+
+        page = []
+        for row in self._connection().execute(sql, params):
+            expense = dict(row)
+            key = (expense.pop("sort_value"), expense["created_at"], expense.pop("id"))
+            page.append((key, expense))
+        return page
+
+    def totals(self, group_by: str, start_date: Optional[str] = None,
+               end_date: Optional[str] = None) -> Dict[str, Dict]:
+        """Total and count per category, vendor or month (YYYY-MM), grouped in SQL"""
+        expression = _GROUP_EXPRESSIONS[group_by]
+        clauses, params = _filters(start_date, end_date, None)
+        if group_by == "month":
+            clauses.append(f"date GLOB '{_ISO_DATE_GLOB}'")
+        sql = (f"SELECT {expression} AS name, TOTAL(amount) AS total, COUNT(*) AS count "
+               f"FROM expenses{_where(clauses)} GROUP BY name")
+        return {row["name"]: {"total": row["total"], "count": row["count"]}
+                for row in self._connection().execute(sql, params)}
+
+    def search_candidates(self, query: str) -> List[Dict]:
+        """
+        Expenses whose searchable fields contain the query (case-insensitive),
+        in insertion order, via the FTS5 table when the query is long enough
+        """
+        conn = self._connection()
+        if self.fts_enabled and len(query) >= MIN_FTS_QUERY_LENGTH:
+            phrase = '"' + query.replace('"', '""') + '"'
+            sql = (f"SELECT {_COLUMNS} FROM expenses WHERE id IN "
+                   f"(SELECT rowid FROM expenses_fts WHERE expenses_fts MATCH ?) ORDER BY id")
+            return [dict(row) for row in conn.execute(sql, (phrase,))]
+
+        pattern = f"%{_escape_like(query)}%"
+        conditions = " OR ".join(f"{field} LIKE ? ESCAPE '\\'" for field in SEARCH_FIELDS)
+        sql = f"SELECT {_COLUMNS} FROM expenses WHERE {conditions} ORDER BY id"
+        return [dict(row) for row in conn.execute(sql, [pattern] * len(SEARCH_FIELDS))]
+
+    def stats(self) -> Dict:
+        size = sum(path.stat().st_size for path in
+                   (self.path, self.path.with_name(f"{self.path.name}-wal")) if path.exists())
+        return {"path": str(self.path), "size_bytes": size, "fts_enabled": self.fts_enabled}
+
+
+# Process-wide registry so every handler for the same database shares one store
+_sqlite_stores: Dict[str, SQLiteExpenseStore] = {}
+_sqlite_stores_lock = threading.Lock()
+
+
+def get_sqlite_store(path: Path) -> SQLiteExpenseStore:
+    """Get or create the shared SQLiteExpenseStore for a database file"""
+    key = str(Path(path).resolve())
+    with _sqlite_stores_lock:
+        store = _sqlite_stores.get(key)
+        if store is None:
+            store = SQLiteExpenseStore(Path(path))
+            _sqlite_stores[key] = store
+        return store
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Tenant Shards for Expense Tracker
+Per-tenant ledger directories under the data directory, listed in a catalog.json
+"""
+
+import json
+import os
+import re
+import threading
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, Optional
+
+from .file_lock import FileLock
+
+TENANTS_DIRNAME = "tenants"
+CATALOG_FILENAME = "catalog.json"
+
+_TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$")
+
+# Tenant of the current request (None = the shared, untenanted ledger)
+current_tenant: ContextVar[Optional[str]] = ContextVar("expense_tenant", default=None)
+
+
+class UnknownTenantError(LookupError):
+    """Raised for a tenant id that isn't registered in the catalog"""
+
+
+def auto_register_tenants() -> bool:
+    """
+    EXPENSE_TENANT_AUTO_REGISTER: create a shard for any new tenant id on
+    first use (default off, since every shard holds per-process stores,
+    indexes and a writer thread for as long as the process lives)
+    """
+    return os.environ.get("EXPENSE_TENANT_AUTO_REGISTER", "false").lower() in ("1", "true", "yes")
+
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """Return the tenant id if it is safe to use as a directory name, else raise ValueError"""
+    if not _TENANT_ID_PATTERN.match(tenant_id or "") or tenant_id in (".", ".."):
+        raise ValueError("Tenant id must be 1-64 letters, digits, '.', '_' or '-' and start with a letter or digit")
+    return tenant_id
+
+
+class TenantCatalog:
+    """
+    Directory-level catalog of tenant shards
+
+    Each tenant gets its own directory, data_dir/tenants/<tenant_id>/, holding a
+    complete ledger (expenses.csv, date-partitioned segments with
+    EXPENSE_STORAGE_BACKEND=segments or an SQLite database with
+    EXPENSE_STORAGE_BACKEND=sqlite) with its own indexes. A request
+    only opens its tenant's shard, so its cost doesn't grow with the number of
+    tenants. catalog.json records every shard and when it was created; tenants
+    are added with register() (or on first use under
+    EXPENSE_TENANT_AUTO_REGISTER).
+    """
+
+    def __init__(self, data_dir: Path):
+        self.data_dir = Path(data_dir)
+        self.path = self.data_dir / CATALOG_FILENAME
+        self._lock = threading.Lock()
+        self._tenants: Optional[Dict[str, Dict]] = None
+
+    def _read(self) -> Dict[str, Dict]:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f).get("tenants", {})
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Error reading tenant catalog: {e}")
+            return {}
+
+    def _write(self, tenants: Dict[str, Dict]) -> None:
+        temp_path = self.path.with_suffix(".tmp")
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"tenants": tenants}, f, indent=2, sort_keys=True)
+        os.replace(temp_path, self.path)
+
+    def is_registered(self, tenant_id: str) -> bool:
+        """True if the tenant has a shard (re-reads the catalog for ids not seen yet)"""
+        with self._lock:
+            if self._tenants is None or tenant_id not in self._tenants:
+                # Another worker may have registered it since the last read
+                self._tenants = self._read()
+            return tenant_id in self._tenants
+
+    def shard_dir(self, tenant_id: str) -> Path:
+        """
+        Data directory of a registered tenant's shard
+
+        Raises:
+            ValueError: If the tenant id is not a valid directory name
+            UnknownTenantError: If the tenant isn't registered (and
+                EXPENSE_TENANT_AUTO_REGISTER is off)
+        """
+        validate_tenant_id(tenant_id)
+        if auto_register_tenants():
+            return self.register(tenant_id)
+        if not self.is_registered(tenant_id):
+            raise UnknownTenantError(f"Unknown tenant: {tenant_id}")
+        with self._lock:
+            shard = self.data_dir / self._tenants[tenant_id]["path"]
+        shard.mkdir(parents=True, exist_ok=True)
+        return shard
+
+    def register(self, tenant_id: str) -> Path:
+        """
+        Add a tenant to the catalog if it isn't there yet and return its shard directory
+
+        Raises:
+            ValueError: If the tenant id is not a valid directory name
+        """
+        validate_tenant_id(tenant_id)
+        with self._lock:
+            if self._tenants is None or tenant_id not in self._tenants:
+                self.data_dir.mkdir(parents=True, exist_ok=True)
+                # Another worker may have registered tenants since the last read
+                with FileLock(self.path.with_name(f"{CATALOG_FILENAME}.lock")):
+                    tenants = self._read()
+                    if tenant_id not in tenants:
+                        tenants[tenant_id] = {
+                            "path": f"{TENANTS_DIRNAME}/{tenant_id}",
+                            "backend": os.environ.get("EXPENSE_STORAGE_BACKEND", "csv").lower(),
+                            "created_at": datetime.now(timezone.utc).isoformat(),
+                        }
+                        self._write(tenants)
+                    self._tenants = tenants
+            shard = self.data_dir / self._tenants[tenant_id]["path"]
+        shard.mkdir(parents=True, exist_ok=True)
+        return shard
+
+    def tenants(self) -> Dict[str, Dict]:
+        """Catalog entries of every registered tenant"""
+        with self._lock:
+            self._tenants = self._read()
+            return dict(self._tenants)
+
+
+_catalogs: Dict[str, TenantCatalog] = {}
+_catalogs_lock = threading.Lock()
+
+
+def get_tenant_catalog(data_dir: Path) -> TenantCatalog:
+    """Get or create the shared catalog for a data directory"""
+    key = str(Path(data_dir).resolve())
+    with _catalogs_lock:
+        catalog = _catalogs.get(key)
+        if catalog is None:
+            catalog = TenantCatalog(Path(data_dir))
+            _catalogs[key] = catalog
+        return catalog
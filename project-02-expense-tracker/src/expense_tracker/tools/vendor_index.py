@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+"""
+Vendor -> Category Index
+Category frequencies learned from the ledger, by fuzzy-normalized vendor and by description keyword
+"""
+
+import difflib
+import os
+import re
+import threading
+import time
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from .tenants import current_tenant
+
+# Well-known vendors -> IRS category; the ledger's own history takes precedence
+SEED_VENDOR_CATEGORIES = {
+    "starbucks": "MEALS", "dunkin": "MEALS", "chipotle": "MEALS", "mcdonalds": "MEALS",
+    "doordash": "MEALS", "grubhub": "MEALS", "ubereats": "MEALS", "panera": "MEALS",
+    "shell": "CAR_TRUCK", "chevron": "CAR_TRUCK", "exxon": "CAR_TRUCK", "bp": "CAR_TRUCK",
+    "jiffy lube": "CAR_TRUCK",
+    "staples": "OFFICE_EXPENSE", "office depot": "OFFICE_EXPENSE", "officemax": "OFFICE_EXPENSE",
+    "spotify": "SOFTWARE", "github": "SOFTWARE", "adobe": "SOFTWARE", "notion": "SOFTWARE",
+    "slack": "SOFTWARE", "zoom": "SOFTWARE", "dropbox": "SOFTWARE", "figma": "SOFTWARE",
+    "openai": "SOFTWARE", "microsoft": "SOFTWARE", "aws": "SOFTWARE",
+    "uber": "TRAVEL", "lyft": "TRAVEL", "delta": "TRAVEL", "united airlines": "TRAVEL",
+    "southwest": "TRAVEL", "marriott": "TRAVEL", "hilton": "TRAVEL", "airbnb": "TRAVEL",
+    "facebook ads": "ADVERTISING", "google ads": "ADVERTISING", "mailchimp": "ADVERTISING",
+    "comcast": "UTILITIES", "verizon": "UTILITIES", "at&t": "UTILITIES", "t-mobile": "UTILITIES",
+}
+
+# Confidence assigned to a seed-dictionary category (ledger matches use their own share)
+SEED_CATEGORY_CONFIDENCE = 0.9
+
+# Ledger vendors and keywords need this many expenses before their category is trusted
+MIN_LEDGER_OCCURRENCES = 2
+
+# Minimum difflib ratio for a misspelled vendor to resolve to a known one
+FUZZY_VENDOR_CUTOFF = 0.88
+
+# Longest vendor name, in words, looked for inside free text
+MAX_VENDOR_WORDS = 3
+
+_CORPORATE_SUFFIXES = {"inc", "llc", "ltd", "co", "corp", "corporation", "company", "com"}
+_KEYWORD_PATTERN = re.compile(r"[a-z][a-z'-]{2,}")
+_KEYWORD_STOP_WORDS = {
+    "the", "and", "for", "with", "from", "at", "our", "my", "was", "were", "this", "that",
+    "spent", "paid", "bought", "got", "today", "yesterday", "last", "ago", "week", "month",
+    "dollars", "bucks", "usd", "expense", "purchase", "business",
+}
+
+
+def normalize_vendor(vendor: str) -> str:
+    """Lower-case a vendor name and drop punctuation and store numbers"""
+    name = re.sub(r"[^\w&\s-]", "", vendor.lower())
+    name = re.sub(r"\s#?\d+$", "", name)
+    return " ".join(name.split())
+
+
+def canonical_vendor(vendor: str) -> str:
+    """
+    Index key for a vendor: normalized, without a leading "the", corporate
+    suffixes or separators, so "The Home Depot #123", "Home-Depot" and
+    "HomeDepot Inc." share one key
+    """
+    words = re.sub(r"[-_./]", " ", normalize_vendor(vendor)).split()
+    if len(words) > 1 and words[0] == "the":
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _CORPORATE_SUFFIXES:
+        words = words[:-1]
+    return "".join(words)
+
+
+def description_keywords(text: str) -> List[str]:
+    """Content words of a description that carry category signal"""
+    return [word for word in _KEYWORD_PATTERN.findall(text.lower()) if word not in _KEYWORD_STOP_WORDS]
+
+
+def _best(counts: Counter) -> Tuple[str, float, int]:
+    total = sum(counts.values())
+    category, count = counts.most_common(1)[0]
+    return category, count / total, total
+
+
+class VendorCategoryIndex:
+    """
+    Category frequencies learned from historical expenses
+
+    - vendor tier: canonical vendor -> category counts; misspelled vendors
+      resolve to a known one by fuzzy match (results memoized)
+    - keyword tier: description keyword -> category counts, used when the
+      vendor is unknown
+
+    Built from the ledger on first use, kept current by add() as expenses are
+    saved, and rebuilt every refresh_seconds to pick up edits made elsewhere.
+    Confidence is the share of the vendor's (or keywords') expenses filed
+    under the most common category.
+    """
+
+    def __init__(self, source: Optional[Callable[[], Iterable[Dict]]] = None,
+                 refresh_seconds: Optional[float] = None):
+        self.source = source
+        self.refresh_seconds = refresh_seconds if refresh_seconds is not None else float(
+            os.environ.get("EXPENSE_CATEGORY_INDEX_REFRESH_SECONDS", "3600")
+        )
+        self._vendors: Dict[str, Counter] = {}
+        self._keywords: Dict[str, Counter] = {}
+        self._aliases: Dict[str, Optional[str]] = {}
+        self._built_at: Optional[float] = None
+        self._lock = threading.RLock()
+
+        # Counters for monitoring
+        self.vendor_hits = 0
+        self.keyword_hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self.prefilled = 0
+
+    def _ensure_built(self) -> None:
+        stale = self._built_at is None or time.monotonic() - self._built_at >= self.refresh_seconds
+        if self.source is None or not stale:
+            return
+        vendors, keywords = self._vendors, self._keywords
+        self._vendors, self._keywords, self._aliases = {}, {}, {}
+        try:
+            for row in self.source():
+                self._add(row)
+        except Exception as e:
+            print(f"Error building vendor category index: {e}")
+            self._vendors, self._keywords = vendors, keywords
+        self._built_at = time.monotonic()
+
+    def _add(self, row: Dict) -> None:
+        category = (row.get("category") or "").upper()
+        if not category:
+            return
+        vendor = canonical_vendor(row.get("vendor") or "")
+        if vendor:
+            if vendor not in self._vendors:
+                # A new vendor may be the better match for earlier fuzzy lookups
+                self._aliases.clear()
+            self._vendors.setdefault(vendor, Counter())[category] += 1
+        for keyword in set(description_keywords(row.get("description") or "")):
+            self._keywords.setdefault(keyword, Counter())[category] += 1
+
+    def add(self, rows: Iterable[Dict]) -> None:
+        """Count newly saved expenses (ignored until the index has been built)"""
+        with self._lock:
+            if self._built_at is None:
+                return
+            for row in rows:
+                self._add(row)
+
+    def _resolve(self, key: str) -> Optional[str]:
+        """Known ledger or seed key for a canonical vendor, exact or fuzzy"""
+        if key in self._vendors or key in _SEED_KEYS:
+            return key
+        if key not in self._aliases:
+            candidates = [known for known in (*self._vendors, *_SEED_KEYS) if known[:1] == key[:1]]
+            matches = difflib.get_close_matches(key, candidates, n=1, cutoff=FUZZY_VENDOR_CUTOFF)
+            self._aliases[key] = matches[0] if matches else None
+        return self._aliases[key]
+
+    def _vendor_category(self, vendor: str, fuzzy: bool = True,
+                         seeds: bool = True) -> Optional[Tuple[str, float, int]]:
+        key = canonical_vendor(vendor)
+        if not key:
+            return None
+        known = self._resolve(key) if fuzzy else key
+        if known is None:
+            return None
+        if known in self._vendors:
+            category, confidence, support = _best(self._vendors[known])
+            if support >= MIN_LEDGER_OCCURRENCES:
+                return category, confidence, support
+        seed = _SEED_KEYS.get(known) if seeds else None
+        if seed is not None:
+            return seed, SEED_CATEGORY_CONFIDENCE, MIN_LEDGER_OCCURRENCES
+        return None
+
+    def vendor_category(self, vendor: str, fuzzy: bool = True,
+                        seeds: bool = True) -> Optional[Tuple[str, float, int]]:
+        """
+        Category for a vendor
+
+        Args:
+            seeds: Fall back to the seed dictionary when the ledger doesn't know the vendor
+
+        Returns:
+            (category, confidence, supporting expenses), or None for an unknown vendor
+        """
+        with self._lock:
+            self._ensure_built()
+            return self._vendor_category(vendor, fuzzy, seeds)
+
+    def find_vendor(self, text: str, seeds: bool = True) -> Optional[str]:
+        """
+        Longest run of words in the text that is a known vendor (exact key match)
+
+        Args:
+            seeds: Also match seed-dictionary vendors; off for free text, where
+                seed names are often ordinary words ("zoom lens", "shell script")
+        """
+        words = normalize_vendor(text).split()
+        with self._lock:
+            self._ensure_built()
+            for size in range(min(MAX_VENDOR_WORDS, len(words)), 0, -1):
+                for start in range(len(words) - size + 1):
+                    candidate = " ".join(words[start:start + size])
+                    if self._vendor_category(candidate, fuzzy=False, seeds=seeds) is not None:
+                        return candidate
+        return None
+
+    def suggest(self, vendor: Optional[str], description: str) -> Optional[Dict]:
+        """
+        Suggest a category from the vendor's history, or from the description's
+        keywords when the vendor is unknown
+
+        Returns:
+            {"category", "confidence", "support", "source"} or None when the
+            ledger has no usable signal
+        """
+        with self._lock:
+            self._ensure_built()
+            found = self._vendor_category(vendor) if vendor else None
+            if found is not None:
+                self.vendor_hits += 1
+                category, confidence, support = found
+                return {"category": category, "confidence": round(confidence, 3),
+                        "support": support, "source": "vendor"}
+
+            votes: Counter = Counter()
+            for keyword in set(description_keywords(description)):
+                counts = self._keywords.get(keyword)
+                if counts and sum(counts.values()) >= MIN_LEDGER_OCCURRENCES:
+                    votes.update(counts)
+            if votes:
+                self.keyword_hits += 1
+                category, confidence, support = _best(votes)
+                return {"category": category, "confidence": round(confidence, 3),
+                        "support": support, "source": "keywords"}
+
+            self.misses += 1
+            return None
+
+    def record_use(self, skipped: bool) -> None:
+        """Count a suggestion that skipped (or only pre-filled) the categorization task"""
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+            else:
+                self.prefilled += 1
+
+    def stats(self) -> Dict:
+        with self._lock:
+            lookups = self.vendor_hits + self.keyword_hits + self.misses
+            return {
+                "vendors": len(self._vendors),
+                "keywords": len(self._keywords),
+                "vendor_hits": self.vendor_hits,
+                "keyword_hits": self.keyword_hits,
+                "misses": self.misses,
+                "hit_rate": round((self.vendor_hits + self.keyword_hits) / lookups, 3) if lookups else 0.0,
+                "categorizations_skipped": self.skipped,
+                "categorizations_prefilled": self.prefilled,
+            }
+
+
+_SEED_KEYS = {canonical_vendor(vendor): category for vendor, category in SEED_VENDOR_CATEGORIES.items()}
+
+
+def category_index_enabled() -> bool:
+    """EXPENSE_CATEGORY_INDEX toggles ledger category hints for the crew (default: on)"""
+    return os.environ.get("EXPENSE_CATEGORY_INDEX", "1").lower() not in ("0", "false", "no", "off")
+
+
+# One index per tenant (None = the shared ledger), so tenants never see each other's vendors
+_indexes: Dict[Optional[str], VendorCategoryIndex] = {}
+_indexes_lock = threading.Lock()
+
+
+def get_vendor_index(tenant_id: Optional[str] = None) -> VendorCategoryIndex:
+    """Get the index of a tenant's ledger (default: the current request's tenant)"""
+    from .csv_handler import get_csv_handler
+
+    tenant_id = tenant_id or current_tenant.get()
+    with _indexes_lock:
+        index = _indexes.get(tenant_id)
+        if index is None:
+            handler = get_csv_handler(tenant_id)
+            index = VendorCategoryIndex(
+                lambda: handler.get_all_expenses(columns=["vendor", "category", "description"])
+            )
+            _indexes[tenant_id] = index
+        return index
+
+
+def observe_expenses(records: Iterable[Dict], tenant_id: Optional[str] = None) -> None:
+    """Feed expenses saved to a tenant's ledger to its index, if it is in use"""
+    index = _indexes.get(tenant_id)
+    if index is not None:
+        index.add(records)
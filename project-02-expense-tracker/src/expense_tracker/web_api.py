@@ -4,25 +4,59 @@ FastAPI Web Layer for Expense Tracker
 Provides REST API and WebSocket endpoints for the CrewAI expense processing system
 """
 
-from fastapi import FastAPI, WebSocket, HTTPException, BackgroundTasks, Query
+from fastapi import FastAPI, Depends, Header, WebSocket, WebSocketDisconnect, HTTPException, Query, UploadFile, File
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import Dict, List, Optional
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+from typing import Dict, List, Literal, Optional
 import asyncio
-import uuid
+import importlib.util
 import json
 from datetime import datetime, timezone
 import os
+import tempfile
 from pathlib import Path
 
-from expense_tracker.crew import ExpenseTrackerCrew
-from expense_tracker.tools import get_csv_handler, add_expense_to_csv
+from expense_tracker.crew import BatchExpenseCrew
+from expense_tracker.crew_executor import CrewExecutorSaturated, CrewTimeout, get_crew_executor
+from expense_tracker.crew_pool import get_crew_pool
+from expense_tracker.jobs import ACTIVE_STATUSES, JobWorkerPool, PermanentJobError, get_job_backend
+from expense_tracker.tools import get_csv_handler
+from expense_tracker.tools.bulk_import import detect_format, import_expenses
+from expense_tracker.tools.csv_handler import tenant_catalog
+from expense_tracker.tools.exporters import EXPORT_FORMATS, iter_export
+from expense_tracker.tools.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from expense_tracker.tools.result_cache import get_result_cache
+from expense_tracker.tools.tenants import auto_register_tenants, current_tenant, validate_tenant_id
+from expense_tracker.tools.vendor_index import get_vendor_index
+
+async def bind_tenant(
+    x_tenant_id: Optional[str] = Header(None, description="Tenant whose ledger shard to use"),
+    tenant: Optional[str] = Query(None, description="Tenant id (alternative to the X-Tenant-ID header)")
+):
+    """
+    Select the request's tenant shard (no tenant = the shared ledger)
+    
+    get_csv_handler() picks the tenant up from the request context. Only
+    tenants registered in the catalog are accepted, so arbitrary ids can't
+    make the process open new shards, caches and writer threads.
+    """
+    tenant_id = x_tenant_id or tenant
+    if tenant_id:
+        try:
+            validate_tenant_id(tenant_id)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        if not auto_register_tenants() and not tenant_catalog().is_registered(tenant_id):
+            raise HTTPException(status_code=404, detail=f"Unknown tenant: {tenant_id}")
+    current_tenant.set(tenant_id or None)
 
 # Initialize FastAPI app
 app = FastAPI(
     title="Expense Tracker API",
     description="AI-powered expense tracking with natural language processing using CrewAI",
-    version="1.0.0"
+    version="1.0.0",
+    dependencies=[Depends(bind_tenant)]
 )
 
 # Enable CORS for frontend integration
@@ -34,44 +68,80 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# In-memory storage for job status and results
-processing_jobs: Dict[str, Dict] = {}
+# Jobs live in the durable job backend (see expense_tracker.jobs)
 active_connections: Dict[str, WebSocket] = {}
+_job_workers: Optional[JobWorkerPool] = None
 
-# Performance optimization: Singleton crew instance to avoid re-initialization
-_expense_crew_instance: Optional[ExpenseTrackerCrew] = None
+def get_expense_crew(pipeline: Optional[str] = None):
+    """
+    Get the calling thread's pre-built crew for a pipeline
+    
+    pipeline is "sequential" (three agents) or "fused" (one structured-output
+    call); EXPENSE_PIPELINE sets the default. Crews are built once per worker
+    thread and reused, so requests don't pay for YAML loading or Crew setup.
+    """
+    return get_crew_pool().get(pipeline)
 
-def get_expense_crew() -> ExpenseTrackerCrew:
-    """Get or create singleton expense crew instance for better performance"""
-    global _expense_crew_instance
-    if _expense_crew_instance is None:
-        _expense_crew_instance = ExpenseTrackerCrew()
-    return _expense_crew_instance
+def _process_description(description: str, pipeline: Optional[str]) -> dict:
+    """Runs on a crew worker thread with that thread's pooled crew"""
+    return get_expense_crew(pipeline).process_expense(description)
+
+async def run_expense_crew(description: str, pipeline: Optional[str] = None) -> dict:
+    """
+    Process a description on the bounded crew executor without blocking the event loop
+    
+    Raises CrewExecutorSaturated when all workers and queue slots are taken,
+    and CrewTimeout when the run exceeds EXPENSE_CREW_TIMEOUT_SECONDS.
+    """
+    return await get_crew_executor().run(_process_description, description, pipeline)
+
+_batch_crew_instance: Optional[BatchExpenseCrew] = None
+
+def get_batch_crew() -> BatchExpenseCrew:
+    """Get or create singleton batch crew instance"""
+    global _batch_crew_instance
+    if _batch_crew_instance is None:
+        _batch_crew_instance = BatchExpenseCrew()
+    return _batch_crew_instance
 
 class ExpenseRequest(BaseModel):
     description: str
     user_notes: Optional[str] = None
+    pipeline: Optional[Literal["sequential", "fused"]] = None
+    priority: int = 0  # process-async only: higher runs first
+
+class BatchExpenseRequest(BaseModel):
+    descriptions: List[str] = Field(..., min_length=1, max_length=1000)
+    user_notes: Optional[str] = None
 
 class ExpenseResponse(BaseModel):
     success: bool
     expense_record: Optional[Dict] = None
     error_message: Optional[str] = None
+    warnings: List[str] = []
     processing_time: Optional[float] = None
 
 class JobStatus(BaseModel):
     job_id: str
+    job_type: Optional[str] = None
     status: str  # pending, running, completed, error
+    priority: int = 0
+    attempts: int = 0
     created_at: datetime
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
     result: Optional[Dict] = None
     error: Optional[str] = None
+    progress: Optional[Dict] = None
 
 class ExpenseSummary(BaseModel):
     total_amount: float
     total_expenses: int
     categories: Dict
     date_range: Optional[str] = None
+    expenses: Optional[List[Dict]] = None
+    offset: Optional[int] = None
+    limit: Optional[int] = None
 
 @app.get("/")
 async def root():
@@ -88,7 +158,13 @@ async def health_check():
         "status": "healthy",
         "timestamp": datetime.now(timezone.utc).isoformat(),
         "data_storage": file_stats,
-        "active_jobs": len(processing_jobs)
+        "active_jobs": get_job_backend().count(ACTIVE_STATUSES),
+        "result_cache": get_result_cache().stats(),
+        "category_index": get_vendor_index().stats(),
+        "duplicate_index": csv_handler.duplicates.stats(),
+        "tenant": current_tenant.get(),
+        "crew_pool": get_crew_pool().stats(),
+        "crew_executor": get_crew_executor().stats()
     }
 
 @app.post("/expenses", response_model=ExpenseResponse)
@@ -104,11 +180,8 @@ async def add_expense(request: ExpenseRequest):
     start_time = datetime.now()
     
     try:
-        # Get singleton expense crew instance for better performance
-        expense_crew = get_expense_crew()
-        
-        # Process the expense through AI agents
-        processed_record = expense_crew.process_expense(request.description)
+        # Process the expense through AI agents on a crew worker thread
+        processed_record = await run_expense_crew(request.description, request.pipeline)
         
         # Add user notes if provided
         if request.user_notes:
@@ -119,7 +192,7 @@ async def add_expense(request: ExpenseRequest):
         validation_result = csv_handler.validate_expense_record(processed_record)
         
         if validation_result["valid"]:
-            success = csv_handler.add_expense(validation_result["cleaned_record"])
+            success = await asyncio.to_thread(csv_handler.add_expense, validation_result["cleaned_record"])
             
             if success:
                 processing_time = (datetime.now() - start_time).total_seconds()
@@ -127,6 +200,7 @@ async def add_expense(request: ExpenseRequest):
                 return ExpenseResponse(
                     success=True,
                     expense_record=validation_result["cleaned_record"],
+                    warnings=validation_result["warnings"],
                     processing_time=processing_time
                 )
             else:
@@ -136,7 +210,11 @@ async def add_expense(request: ExpenseRequest):
                 success=False,
                 error_message=f"Validation errors: {', '.join(validation_result['errors'])}"
             )
-            
+    
+    except CrewExecutorSaturated as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except CrewTimeout as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         processing_time = (datetime.now() - start_time).total_seconds()
         
@@ -148,53 +226,65 @@ async def add_expense(request: ExpenseRequest):
 
 @app.get("/expenses")
 async def get_expenses(
-    limit: Optional[int] = Query(None, description="Maximum number of expenses to return"),
+    limit: Optional[int] = Query(None, description=f"Page size (at most {MAX_PAGE_SIZE}; default every matching expense, or {DEFAULT_PAGE_SIZE} when paging with a cursor)"),
     category: Optional[str] = Query(None, description="Filter by expense category"),
     start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
-    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    sort: str = Query("date", description="Sort by date, amount or vendor (ties broken by created_at)"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="asc or desc"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. date,amount,vendor")
 ):
     """
-    Retrieve expenses with optional filtering
+    Retrieve expenses with optional filtering, sorting and keyset pagination
+    
+    Pass the returned next_cursor back as ?cursor= to fetch the following page.
+    Without limit or cursor every matching expense is returned, as clients
+    that predate pagination expect.
     """
+    if limit is None and cursor:
+        limit = DEFAULT_PAGE_SIZE
+    field_list = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
     try:
         csv_handler = get_csv_handler()
-        
-        # Apply filters based on query parameters
-        if start_date and end_date:
-            filtered_expenses = csv_handler.get_expenses_by_date_range(start_date, end_date)
-        elif category:
-            filtered_expenses = csv_handler.get_expenses_by_category(category)
-        else:
-            filtered_expenses = csv_handler.get_all_expenses()
-        
-        # Apply limit if specified
-        if limit:
-            filtered_expenses = filtered_expenses[:limit]
-        
-        return {
-            "expenses": filtered_expenses,
-            "count": len(filtered_expenses),
-            "filters_applied": {
-                "category": category,
-                "date_range": f"{start_date} to {end_date}" if start_date and end_date else None,
-                "limit": limit
-            }
-        }
-        
+        page = csv_handler.get_expenses_page(
+            sort_by=sort, descending=order == "desc", cursor=cursor, limit=limit,
+            start_date=start_date, end_date=end_date, category=category, fields=field_list
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "expenses": page["expenses"],
+        "count": len(page["expenses"]),
+        "next_cursor": page["next_cursor"],
+        "filters_applied": {
+            "category": category,
+            "date_range": f"{start_date or '...'} to {end_date or '...'}" if start_date or end_date else None,
+            "limit": limit,
+            "sort": sort,
+            "order": order,
+            "fields": field_list
+        }
+    }
 
 @app.get("/expenses/search")
-async def search_expenses(q: str = Query(..., description="Search query for vendor, description, or purpose")):
+async def search_expenses(
+    q: str = Query(..., description="Search query for vendor, description, or purpose"),
+    limit: Optional[int] = Query(None, ge=1, description="Maximum number of results (best matches first)")
+):
     """
     Search expenses by vendor, description, business purpose, or notes
     """
     try:
         csv_handler = get_csv_handler()
-        search_results = csv_handler.search_expenses(q)
+        search_results = csv_handler.search_expenses(q, limit=limit)
         
         return {
             "query": q,
+            "limit": limit,
             "results": search_results,
             "count": len(search_results)
         }
@@ -205,7 +295,10 @@ async def search_expenses(q: str = Query(..., description="Search query for vend
 @app.get("/expenses/summary", response_model=ExpenseSummary)  
 async def get_expense_summary(
     year: Optional[int] = Query(None, description="Year for monthly summary"),
-    month: Optional[int] = Query(None, description="Month for summary (1-12)")
+    month: Optional[int] = Query(None, ge=1, le=12, description="Month for summary (1-12)"),
+    include_expenses: bool = Query(False, description="Include the month's individual expenses"),
+    offset: int = Query(0, ge=0, description="Expenses to skip when include_expenses is set"),
+    limit: Optional[int] = Query(100, ge=1, description="Maximum expenses to return when include_expenses is set")
 ):
     """
     Get expense summary with category breakdowns
@@ -214,29 +307,17 @@ async def get_expense_summary(
         csv_handler = get_csv_handler()
         
         if year and month:
-            summary_data = csv_handler.get_monthly_summary(year, month)
+            summary_data = csv_handler.get_monthly_summary(
+                year, month, include_expenses=include_expenses, offset=offset, limit=limit
+            )
             date_range = f"{year}-{month:02d}"
         else:
-            # Get all-time summary
-            all_expenses = csv_handler.get_all_expenses()
-            
-            category_totals = {}
-            total_amount = 0.0
-            
-            for expense in all_expenses:
-                category = expense.get('category', 'OTHER')
-                amount = float(expense.get('amount', 0))
-                
-                if category not in category_totals:
-                    category_totals[category] = {'total': 0.0, 'count': 0}
-                
-                category_totals[category]['total'] += amount
-                category_totals[category]['count'] += 1
-                total_amount += amount
+            # Get all-time summary from the monthly rollup
+            category_totals = csv_handler.get_category_totals()
             
             summary_data = {
-                'total_amount': total_amount,
-                'total_expenses': len(all_expenses),
+                'total_amount': sum(totals['total'] for totals in category_totals.values()),
+                'total_expenses': sum(totals['count'] for totals in category_totals.values()),
                 'categories': category_totals
             }
             date_range = "all-time"
@@ -245,7 +326,10 @@ async def get_expense_summary(
             total_amount=summary_data['total_amount'],
             total_expenses=summary_data['total_expenses'],
             categories=summary_data['categories'],
-            date_range=date_range
+            date_range=date_range,
+            expenses=summary_data.get('expenses'),
+            offset=summary_data.get('offset'),
+            limit=summary_data.get('limit')
         )
         
     except Exception as e:
@@ -258,12 +342,8 @@ async def get_categories():
     """
     try:
         csv_handler = get_csv_handler()
-        all_expenses = csv_handler.get_all_expenses()
-        
-        category_counts = {}
-        for expense in all_expenses:
-            category = expense.get('category', 'OTHER')
-            category_counts[category] = category_counts.get(category, 0) + 1
+        category_totals = csv_handler.get_category_totals()
+        category_counts = {category: totals['count'] for category, totals in category_totals.items()}
         
         return {
             "categories": category_counts,
@@ -273,147 +353,399 @@ async def get_categories():
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/expenses/totals")
+async def get_expense_totals(
+    group_by: str = Query("category", description="Group totals by category, month or vendor"),
+    start_date: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="End date (YYYY-MM-DD)")
+):
+    """
+    Get expense totals and counts grouped by category, month or vendor
+    """
+    try:
+        csv_handler = get_csv_handler()
+        totals = csv_handler.get_expense_totals(group_by, start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return {
+        "group_by": group_by,
+        "totals": totals,
+        "total_amount": sum(group['total'] for group in totals.values()),
+        "total_expenses": sum(group['count'] for group in totals.values()),
+        "date_range": f"{start_date or 'start'} to {end_date or 'end'}" if start_date or end_date else "all-time"
+    }
+
 @app.post("/expenses/process-async")
-async def process_expense_async(request: ExpenseRequest, background_tasks: BackgroundTasks):
+async def process_expense_async(request: ExpenseRequest):
     """
     Process expense asynchronously and return job ID for status tracking
+    
+    The job is stored in the durable job backend and picked up by the worker
+    pool of any API process; higher priority jobs run first.
     """
-    job_id = str(uuid.uuid4())
+    job = await asyncio.to_thread(
+        get_job_backend().enqueue, "process_expense", dict(request.dict(), tenant_id=current_tenant.get()),
+        request.priority, JOB_MAX_ATTEMPTS
+    )
+    if _job_workers is not None:
+        _job_workers.notify()
     
-    processing_jobs[job_id] = {
-        "job_id": job_id,
-        "status": "pending", 
-        "created_at": datetime.now(timezone.utc),
-        "request": request.dict()
-    }
+    return {"job_id": job["job_id"], "status": "pending"}
+
+@app.post("/expenses/batch")
+async def process_expense_batch(request: BatchExpenseRequest):
+    """
+    Process many expense descriptions at once (e.g. a month-end receipt dump)
+    
+    Descriptions are packed several to a prompt and the prompts run with
+    bounded concurrency. Results stream back as NDJSON, one line per
+    description as soon as it is saved, followed by a summary line.
+    Answers 503 up front when the crew executor has no free slot.
+    """
+    if get_crew_executor().saturated():
+        raise HTTPException(status_code=503, detail="All crew workers are busy, retry shortly",
+                            headers={"Retry-After": "5"})
+    batch_crew = get_batch_crew()
+    csv_handler = get_csv_handler()
+    
+    async def stream_results():
+        start_time = datetime.now()
+        saved = 0
+        async for index, processed_record in batch_crew.process_batch(request.descriptions):
+            item = {"index": index, "description": request.descriptions[index]}
+            if "error" in processed_record:
+                item.update(success=False, error_message=processed_record["error"])
+            else:
+                if request.user_notes:
+                    processed_record["notes"] = request.user_notes
+                validation_result = csv_handler.validate_expense_record(processed_record)
+                if not validation_result["valid"]:
+                    item.update(success=False, error_message=f"Validation errors: {', '.join(validation_result['errors'])}")
+                elif await asyncio.to_thread(csv_handler.add_expense, validation_result["cleaned_record"]):
+                    item.update(success=True, expense_record=validation_result["cleaned_record"],
+                                warnings=validation_result["warnings"])
+                    saved += 1
+                else:
+                    item.update(success=False, error_message="Failed to save expense to storage")
+            yield json.dumps(item, default=str) + "\n"
+        
+        yield json.dumps({"summary": {
+            "total": len(request.descriptions),
+            "saved": saved,
+            "failed": len(request.descriptions) - saved,
+            "processing_time": (datetime.now() - start_time).total_seconds()
+        }}) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+# Uploads are spooled to disk in chunks of this size so memory stays bounded
+IMPORT_UPLOAD_CHUNK_BYTES = 1024 * 1024
+
+@app.post("/expenses/import")
+async def import_expenses_file(
+    file: UploadFile = File(..., description="CSV or JSONL file of expenses (e.g. a bank export)"),
+    format: Optional[str] = Query(None, description="csv or jsonl (default: from the file extension)")
+):
+    """
+    Bulk-import expenses from an uploaded CSV or JSONL file
+    
+    Returns a job ID; poll /jobs/{job_id} for progress and the import report.
+    """
+    try:
+        import_format = detect_format(file.filename, format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     
-    # Add background task
-    background_tasks.add_task(process_expense_background, job_id, request)
+    fd, temp_path = tempfile.mkstemp(prefix="expense-import-", suffix=f".{import_format}")
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while chunk := await file.read(IMPORT_UPLOAD_CHUNK_BYTES):
+                spool.write(chunk)
+    except Exception as e:
+        os.unlink(temp_path)
+        raise HTTPException(status_code=500, detail=f"Failed to receive upload: {e}")
+    
+    try:
+        job = await asyncio.to_thread(
+            get_job_backend().enqueue,
+            "import_expenses",
+            {"filename": file.filename, "format": import_format, "temp_path": temp_path,
+             "tenant_id": current_tenant.get()},
+            0,
+            1,  # Not retried: a partially applied import must not be replayed
+            {"rows_processed": 0, "rows_imported": 0, "rows_rejected": 0}
+        )
+    except Exception as e:
+        os.unlink(temp_path)
+        raise HTTPException(status_code=500, detail=f"Failed to queue import: {e}")
+    if _job_workers is not None:
+        _job_workers.notify()
     
-    return {"job_id": job_id, "status": "pending"}
+    return {"job_id": job["job_id"], "status": "pending"}
+
+async def import_expenses_job(job: Dict, report_progress) -> Dict:
+    """
+    Job handler that streams an uploaded file into expense storage
+    """
+    request = job["request"]
+    try:
+        csv_handler = get_csv_handler(request.get("tenant_id"))
+        return await asyncio.to_thread(
+            import_expenses, csv_handler, Path(request["temp_path"]), request["format"], progress=report_progress
+        )
+    finally:
+        if os.path.exists(request["temp_path"]):
+            os.unlink(request["temp_path"])
 
 @app.get("/jobs/{job_id}")
 async def get_job_status(job_id: str):
     """
     Get status of an async expense processing job
     """
-    if job_id not in processing_jobs:
+    job_data = await asyncio.to_thread(get_job_backend().get, job_id)
+    # Jobs are only visible to the tenant that created them
+    if job_data is None or (job_data["request"] or {}).get("tenant_id") != current_tenant.get():
         raise HTTPException(status_code=404, detail="Job not found")
     
-    job_data = processing_jobs[job_id]
     return JobStatus(**job_data)
 
-async def process_expense_background(job_id: str, request: ExpenseRequest):
+# Attempts per process-async job before it is marked as failed
+JOB_MAX_ATTEMPTS = int(os.environ.get("EXPENSE_JOB_MAX_ATTEMPTS", "3"))
+
+async def process_expense_job(job: Dict, report_progress) -> Dict:
     """
-    Background task for processing expenses asynchronously
+    Job handler for processing expenses asynchronously
+    
+    Crew errors, timeouts and a saturated executor are retried with backoff;
+    records that fail validation are not.
     """
-    try:
-        # Update job status
-        processing_jobs[job_id]["status"] = "running"
-        processing_jobs[job_id]["started_at"] = datetime.now(timezone.utc)
-        
-        # Process expense
-        expense_crew = get_expense_crew()
-        processed_record = expense_crew.process_expense(request.description)
-        
-        # Add user notes
-        if request.user_notes:
-            processed_record["notes"] = request.user_notes
+    request = ExpenseRequest(**job["request"])
+    # Workers run outside any request, so bind the job's tenant for its cache and indexes
+    current_tenant.set(job["request"].get("tenant_id"))
+    
+    # Process expense on a crew worker thread
+    processed_record = await run_expense_crew(request.description, request.pipeline)
+    
+    # Add user notes
+    if request.user_notes:
+        processed_record["notes"] = request.user_notes
+    
+    # Save to the tenant's ledger
+    csv_handler = get_csv_handler(job["request"].get("tenant_id"))
+    validation_result = csv_handler.validate_expense_record(processed_record)
+    if not validation_result["valid"]:
+        raise PermanentJobError(f"Validation failed: {validation_result['errors']}")
+    
+    success = await asyncio.to_thread(csv_handler.add_expense, validation_result["cleaned_record"])
+    if not success:
+        raise RuntimeError("Failed to save expense")
+    return validation_result["cleaned_record"]
+
+@app.on_event("startup")
+async def start_job_workers():
+    """Start this process's job workers (every API worker claims from the shared backend)"""
+    global _job_workers
+    backend = await asyncio.to_thread(get_job_backend)
+    _job_workers = JobWorkerPool(backend, {
+        "process_expense": process_expense_job,
+        "import_expenses": import_expenses_job,
+    })
+    await _job_workers.start()
+
+@app.on_event("shutdown")
+async def stop_job_workers():
+    if _job_workers is not None:
+        await _job_workers.stop()
+
+# Requests one WebSocket client may have in flight at once
+WS_MAX_IN_FLIGHT = int(os.environ.get("EXPENSE_WS_MAX_IN_FLIGHT", "4"))
+# How often a paused reader re-checks a saturated crew executor
+WS_BACKPRESSURE_POLL_SECONDS = 0.1
+
+class ExpenseChannel:
+    """
+    One client's multiplexed expense channel
+    
+    Each message carries a request_id that is echoed on every reply, so up to
+    max_in_flight descriptions run concurrently and finish in any order.
+    Backpressure: the reader stops taking messages while the client is at its
+    cap or the crew executor is saturated, letting the socket buffers fill.
+    """
+    
+    def __init__(self, websocket: WebSocket, max_in_flight: int = WS_MAX_IN_FLIGHT):
+        self.websocket = websocket
+        self.slots = asyncio.Semaphore(max_in_flight)
+        self.send_lock = asyncio.Lock()
+        self.in_flight: Dict[str, asyncio.Task] = {}
+        self._next_id = 0
+    
+    async def send(self, message: Dict):
+        # Replies from concurrent requests must not interleave on the socket
+        async with self.send_lock:
+            await self.websocket.send_text(json.dumps(message))
+    
+    async def wait_for_capacity(self):
+        await self.slots.acquire()
+        executor = get_crew_executor()
+        while executor.saturated():
+            await asyncio.sleep(WS_BACKPRESSURE_POLL_SECONDS)
+    
+    async def submit(self, data: str):
+        """Parse one message and start processing it (the caller holds a slot)"""
+        try:
+            expense_data = json.loads(data)
+            request_id = str(expense_data.get("request_id") or "")
+            description = expense_data["description"]
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.slots.release()
+            await self.send({"status": "error", "message": f"Invalid message: {e}"})
+            return
         
-        # Save to CSV
-        csv_handler = get_csv_handler()
-        validation_result = csv_handler.validate_expense_record(processed_record)
+        if not request_id:
+            # Clients that don't tag requests get a server-assigned id
+            self._next_id += 1
+            request_id = f"auto-{self._next_id}"
+        if request_id in self.in_flight:
+            self.slots.release()
+            await self.send({"request_id": request_id, "status": "error",
+                             "message": "A request with this request_id is already in flight"})
+            return
         
-        if validation_result["valid"]:
-            success = csv_handler.add_expense(validation_result["cleaned_record"])
+        task = asyncio.create_task(self.process(request_id, description, expense_data.get("pipeline")))
+        self.in_flight[request_id] = task
+    
+    async def process(self, request_id: str, description: str, pipeline: Optional[str]):
+        try:
+            await self.send({
+                "request_id": request_id,
+                "status": "processing",
+                "message": "Processing your expense with AI agents..."
+            })
+            
+            # Process expense on a crew worker thread
+            processed_record = await run_expense_crew(description, pipeline)
+            
+            # Validate (including the duplicate check) and save, as the REST endpoint does
+            csv_handler = get_csv_handler()
+            validation_result = csv_handler.validate_expense_record(processed_record)
+            if not validation_result["valid"]:
+                await self.send({
+                    "request_id": request_id,
+                    "status": "error",
+                    "message": f"Validation errors: {', '.join(validation_result['errors'])}"
+                })
+                return
+            
+            success = await asyncio.to_thread(csv_handler.add_expense, validation_result["cleaned_record"])
             
             if success:
-                processing_jobs[job_id]["status"] = "completed"
-                processing_jobs[job_id]["result"] = validation_result["cleaned_record"]
+                await self.send({
+                    "request_id": request_id,
+                    "status": "completed",
+                    "message": "Expense processed and saved successfully!",
+                    "expense_record": validation_result["cleaned_record"],
+                    "warnings": validation_result["warnings"]
+                })
             else:
-                processing_jobs[job_id]["status"] = "error"
-                processing_jobs[job_id]["error"] = "Failed to save expense"
-        else:
-            processing_jobs[job_id]["status"] = "error"
-            processing_jobs[job_id]["error"] = f"Validation failed: {validation_result['errors']}"
+                await self.send({
+                    "request_id": request_id,
+                    "status": "error",
+                    "message": "Failed to save expense to storage"
+                })
         
-    except Exception as e:
-        processing_jobs[job_id]["status"] = "error"
-        processing_jobs[job_id]["error"] = str(e)
+        except CrewExecutorSaturated as e:
+            await self.send({"request_id": request_id, "status": "busy", "message": str(e), "retry_after": 5})
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            try:
+                await self.send({
+                    "request_id": request_id,
+                    "status": "error",
+                    "message": f"Processing error: {str(e)}"
+                })
+            except Exception:
+                pass  # Client already gone
+        finally:
+            self.in_flight.pop(request_id, None)
+            self.slots.release()
     
-    finally:
-        processing_jobs[job_id]["completed_at"] = datetime.now(timezone.utc)
+    async def close(self):
+        for task in list(self.in_flight.values()):
+            task.cancel()
+        await asyncio.gather(*self.in_flight.values(), return_exceptions=True)
 
 @app.websocket("/ws/{client_id}")
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     """
     WebSocket endpoint for real-time expense processing updates
+    
+    Send {"request_id": "...", "description": "...", "pipeline": optional};
+    replies carry the same request_id and may arrive out of order. Up to
+    EXPENSE_WS_MAX_IN_FLIGHT requests per client are processed concurrently.
     """
     await websocket.accept()
     active_connections[client_id] = websocket
+    channel = ExpenseChannel(websocket)
     
     try:
         while True:
-            # Receive expense description from client
-            data = await websocket.receive_text()
-            expense_data = json.loads(data)
-            
-            # Send processing status updates
-            await websocket.send_text(json.dumps({
-                "status": "processing",
-                "message": "Processing your expense with AI agents..."
-            }))
-            
+            # Don't read the next message until there is room to process it
+            await channel.wait_for_capacity()
             try:
-                # Process expense
-                expense_crew = get_expense_crew()
-                processed_record = expense_crew.process_expense(expense_data["description"])
-                
-                # Save to CSV
-                success = add_expense_to_csv(processed_record)
-                
-                if success:
-                    await websocket.send_text(json.dumps({
-                        "status": "completed",
-                        "message": "Expense processed and saved successfully!",
-                        "expense_record": processed_record
-                    }))
-                else:
-                    await websocket.send_text(json.dumps({
-                        "status": "error", 
-                        "message": "Failed to save expense to storage"
-                    }))
-                    
-            except Exception as e:
-                await websocket.send_text(json.dumps({
-                    "status": "error",
-                    "message": f"Processing error: {str(e)}"
-                }))
-                
+                data = await websocket.receive_text()
+            except BaseException:
+                channel.slots.release()
+                raise
+            await channel.submit(data)
+    
+    except WebSocketDisconnect:
+        pass
     except Exception as e:
         print(f"WebSocket error: {e}")
     finally:
-        if client_id in active_connections:
+        await channel.close()
+        if active_connections.get(client_id) is websocket:
             del active_connections[client_id]
 
 # Export data endpoints
-@app.get("/export/json")
-async def export_expenses_json():
+@app.get("/export/{export_format}")
+async def export_expenses(
+    export_format: str,
+    start_date: Optional[str] = Query(None, description="Inclusive start date (YYYY-MM-DD)"),
+    end_date: Optional[str] = Query(None, description="Inclusive end date (YYYY-MM-DD)"),
+    category: Optional[str] = Query(None, description="Only export this category"),
+    gzip: bool = Query(False, description="gzip-compress the response body")
+):
     """
-    Export all expenses as JSON for external accounting software
+    Stream expenses for external accounting software
+    
+    Formats: json (same document as before), ndjson, csv and parquet. Rows are
+    encoded lazily as the response is sent, so memory use doesn't grow with
+    the ledger.
     """
+    if export_format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=404, detail=f"Unsupported export format '{export_format}'. Use one of: {', '.join(EXPORT_FORMATS)}")
+    if export_format == "parquet" and importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(status_code=501, detail="Parquet export requires pyarrow to be installed")
+    
     try:
         csv_handler = get_csv_handler()
-        json_data = csv_handler.export_to_json()
-        
-        return {
-            "data": json.loads(json_data),
-            "export_timestamp": datetime.now(timezone.utc).isoformat(),
-            "format": "json"
-        }
-        
+        rows = csv_handler.iter_expenses(start_date=start_date, end_date=end_date, category=category)
+        body = iter_export(rows, export_format, compress=gzip)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+    
+    media_type, extension = EXPORT_FORMATS[export_format]
+    headers = {"Content-Disposition": f'attachment; filename="expenses.{extension}{".gz" if gzip else ""}"'}
+    if gzip:
+        headers["Content-Encoding"] = "gzip"
+    return StreamingResponse(body, media_type=media_type, headers=headers)
 
 if __name__ == "__main__":
     import uvicorn
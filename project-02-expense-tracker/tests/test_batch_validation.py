@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from expense_tracker.tools.batch_validation import (
+    coerce_amounts, duplicate_hashes, ledger_hashes, parse_iso_dates, validate_frame,
+)
+
+
+def test_coerce_amounts():
+    amounts = coerce_amounts(pd.Series(["12.50", "$1,234.00", "(5.00)", "abc", None]))
+    assert amounts.tolist()[:3] == [12.5, 1234.0, -5.0]
+    assert amounts.iloc[3:].isna().all()
+
+
+def test_parse_iso_dates_is_strict():
+    dates = parse_iso_dates(pd.Series(["2024-01-15", " 2024-01-16 ", "2024-1-5", "2024-02-30", "15/01/2024", None]))
+    assert dates.iloc[0] == pd.Timestamp("2024-01-15")
+    assert dates.iloc[1] == pd.Timestamp("2024-01-16")
+    assert dates.iloc[2:].isna().all()
+
+
+def test_parse_iso_dates_rejects_numeric_columns():
+    assert parse_iso_dates(pd.Series([20240115, 20240116])).isna().all()
+    assert parse_iso_dates(pd.Series([20240115.0, None])).isna().all()
+
+
+def test_numeric_dates_are_rejected_not_fatal():
+    frame = pd.DataFrame({"date": [20240115, 20240116], "amount": [10, 20], "vendor": ["Uber", "Lyft"]})
+    results = validate_frame(frame).to_results()
+    assert [result["valid"] for result in results] == [False, False]
+    assert results[0]["errors"] == ["Date must be a valid YYYY-MM-DD date"]
+
+
+def test_required_fields_and_warnings():
+    frame = pd.DataFrame({
+        "date": ["2024-01-15", "", "2024-01-15"],
+        "amount": ["10", "5", "-3"],
+        "vendor": ["Uber", "Lyft", None],
+    })
+    results = validate_frame(frame).to_results()
+    assert results[0] == {"valid": True, "errors": [], "warnings": [],
+                          "cleaned_record": {"date": "2024-01-15", "amount": 10.0, "vendor": "Uber"}}
+    assert results[1]["errors"] == ["Missing required field: date"]
+    assert results[2]["errors"] == ["Missing required field: vendor"]
+    assert results[2]["warnings"] == ["Amount should be greater than 0"]
+
+
+def test_duplicates_in_ledger_and_batch():
+    ledger = ledger_hashes([{"date": "2024-01-15", "amount": "10.00", "vendor": "Uber"}])
+    frame = pd.DataFrame({
+        "date": ["2024-01-15", "2024-01-16", "2024-01-16"],
+        "amount": [10, 7, 7],
+        "vendor": [" uber ", "Lyft", "lyft"],
+    })
+    result = validate_frame(frame, ledger)
+    assert result.masks["duplicate_in_ledger"].tolist() == [True, False, False]
+    assert result.masks["duplicate_in_batch"].tolist() == [False, False, True]
+    assert result.valid.all()
+
+    rejected = validate_frame(frame, ledger, duplicate_policy="reject")
+    assert rejected.valid.tolist() == [False, True, False]
+
+
+def test_near_duplicates_only_checks_complete_rows():
+    seen = []
+
+    def near(dates, amounts, vendors):
+        seen.append(vendors)
+        return np.array([vendor == "Amazon Marketplace" for vendor in vendors])
+
+    frame = pd.DataFrame({
+        "date": ["2024-01-15", "bad", "2024-01-15"],
+        "amount": [10, 10, 20],
+        "vendor": ["Amazon Marketplace", "Amazon", "Target"],
+    })
+    result = validate_frame(frame, near_duplicates=near)
+    assert seen == [["Amazon Marketplace", "Target"]]
+    assert result.masks["near_duplicate_in_ledger"].tolist() == [True, False, False]
+
+
+def test_duplicate_hashes_normalize_vendor():
+    dates = pd.Series(["2024-01-15", "2024-01-15"])
+    amounts = pd.Series([10.0, 10.0])
+    hashes = duplicate_hashes(dates, amounts, pd.Series(["Uber  Eats", "uber eats"]))
+    assert hashes[0] == hashes[1]
+
+
+def test_duplicate_hashes_use_the_duplicate_index_vendor_key():
+    dates = pd.Series(["2024-01-15", "2024-01-15"])
+    amounts = pd.Series([10.0, 10.0])
+    hashes = duplicate_hashes(dates, amounts, pd.Series(["The Home Depot #123", "Home-Depot Inc."]))
+    assert hashes[0] == hashes[1]
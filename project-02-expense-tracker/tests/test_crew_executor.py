@@ -0,0 +1,65 @@
+import asyncio
+import time
+
+import pytest
+
+from expense_tracker.crew_executor import CrewExecutor, CrewExecutorSaturated, CrewTimeout
+
+
+def settle(executor, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        stats = executor.stats()
+        if stats["running"] == 0 and stats["queued"] == 0:
+            return stats
+        time.sleep(0.02)
+    return executor.stats()
+
+
+def test_runs_and_counts():
+    executor = CrewExecutor(max_workers=2, max_queue=1, timeout=5)
+    assert asyncio.run(executor.run(lambda x: x * 2, 21)) == 42
+    assert executor.stats()["completed"] == 1
+
+
+def test_rejects_when_saturated():
+    executor = CrewExecutor(max_workers=1, max_queue=0, timeout=5)
+
+    async def main():
+        first = asyncio.ensure_future(executor.run(time.sleep, 0.2))
+        await asyncio.sleep(0.05)
+        with pytest.raises(CrewExecutorSaturated):
+            await executor.run(time.sleep, 0)
+        await first
+
+    asyncio.run(main())
+
+
+def test_timed_out_queued_runs_release_their_slots():
+    executor = CrewExecutor(max_workers=1, max_queue=2, timeout=0.2)
+
+    async def main():
+        results = await asyncio.gather(*(executor.run(time.sleep, 0.5) for _ in range(3)),
+                                       return_exceptions=True)
+        assert all(isinstance(result, CrewTimeout) for result in results)
+
+    asyncio.run(main())
+    stats = settle(executor)
+    assert stats["queued"] == 0 and stats["running"] == 0
+    assert stats["timed_out"] == 3
+
+
+def test_cancelled_queued_runs_release_their_slots():
+    executor = CrewExecutor(max_workers=1, max_queue=2, timeout=5)
+
+    async def main():
+        tasks = [asyncio.ensure_future(executor.run(time.sleep, 0.3)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    asyncio.run(main())
+    stats = settle(executor)
+    assert stats["queued"] == 0 and stats["running"] == 0
+    assert not executor.saturated()
@@ -0,0 +1,63 @@
+import csv
+
+import pytest
+
+from expense_tracker.tools.csv_scanner import scan_expenses
+
+HEADERS = ["date", "amount", "vendor", "category", "description"]
+
+
+def write_csv(path, rows, newline="\n"):
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f, lineterminator=newline)
+        writer.writerow(HEADERS)
+        writer.writerows(rows)
+    return path
+
+
+ROWS = [
+    ["2024-01-05", "12.5", "Cafe", "MEALS", "lunch"],
+    ["2024-02-10", "40", "Shell", "CAR_TRUCK", "fuel"],
+    ["2024-03-01", "9.99", "Spotify", "software", "plan"],
+]
+
+
+@pytest.mark.parametrize("newline", ["\n", "\r\n"])
+def test_unquoted_file(tmp_path, newline):
+    path = write_csv(tmp_path / "expenses.csv", ROWS, newline)
+    assert [row["vendor"] for row in scan_expenses(path)] == ["Cafe", "Shell", "Spotify"]
+    assert scan_expenses(path, columns=["amount"]) == [{"amount": 12.5}, {"amount": 40.0}, {"amount": 9.99}]
+    assert [row["vendor"] for row in scan_expenses(path, start_date="2024-02-01")] == ["Shell", "Spotify"]
+    assert [row["vendor"] for row in scan_expenses(path, category="Software")] == ["Spotify"]
+
+
+def test_quoted_fields_with_commas_and_newlines(tmp_path):
+    rows = ROWS + [["2024-03-05", "7", "Joe's, Inc", "MEALS", "two\nlines"]]
+    path = write_csv(tmp_path / "expenses.csv", rows)
+    scanned = scan_expenses(path, start_date="2024-03-01", end_date="2024-03-31")
+    assert [(row["vendor"], row["description"]) for row in scanned] == [("Spotify", "plan"),
+                                                                          ("Joe's, Inc", "two\nlines")]
+
+
+def test_missing_trailing_newline_and_blank_lines(tmp_path):
+    path = tmp_path / "expenses.csv"
+    path.write_text(",".join(HEADERS) + "\n2024-01-05,1,A,MEALS,x\n\n2024-01-06,2,B,MEALS,y", encoding="utf-8")
+    assert [row["vendor"] for row in scan_expenses(path)] == ["A", "B"]
+
+
+def test_unknown_column(tmp_path):
+    path = write_csv(tmp_path / "expenses.csv", ROWS)
+    with pytest.raises(ValueError):
+        scan_expenses(path, columns=["nope"])
+
+
+def test_short_rows_with_a_date_filter(tmp_path):
+    path = tmp_path / "expenses.csv"
+    path.write_text("amount,vendor,date\n1,A\n2,B,2024-01-05\n", encoding="utf-8")
+    assert scan_expenses(path, start_date="2024-01-01") == [{"amount": 2.0, "vendor": "B", "date": "2024-01-05"}]
+    assert [row["vendor"] for row in scan_expenses(path)] == ["A", "B"]
+
+
+def test_non_numeric_amount_does_not_fail_the_scan(tmp_path):
+    path = write_csv(tmp_path / "expenses.csv", ROWS[:1] + [["2024-01-06", "n/a", "Shell", "CAR_TRUCK", "fuel"]])
+    assert scan_expenses(path, columns=["amount"]) == [{"amount": 12.5}, {"amount": "n/a"}]
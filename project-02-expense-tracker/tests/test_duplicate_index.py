@@ -0,0 +1,116 @@
+import threading
+
+import numpy as np
+
+from expense_tracker.tools.duplicate_index import DuplicateIndex, similar_vendors
+
+LEDGER = [
+    {"date": "2024-03-14", "amount": "42.50", "vendor": "Amazon"},
+    {"date": "2024-03-10", "amount": "9.99", "vendor": "Netflix"},
+    {"date": "2024-03-10", "amount": "12.00", "vendor": "Chipotle"},
+]
+
+
+def built_index(rows=LEDGER, **kwargs):
+    index = DuplicateIndex(lambda: list(rows), window_days=1, refresh_seconds=3600, **kwargs)
+    index.find("2024-01-01", 1, "warmup")
+    assert index.wait_until_built(5)
+    return index
+
+
+def test_similar_vendors():
+    assert similar_vendors("amazon", "amazon")
+    assert similar_vendors("amazon", "amazon marketplace")
+    assert similar_vendors("starbucks", "starbuck")
+    assert not similar_vendors("amazon", "netflix")
+
+
+def test_exact_and_near_matches():
+    index = built_index()
+    assert index.find("2024-03-14", 42.5, "AMAZON") == "exact"
+    assert index.find("2024-03-15", "42.50", "Amazon Marketplace") == "near"
+    assert index.find("2024-03-16", 42.5, "Amazon") is None
+    assert index.find("2024-03-14", 42.51, "Amazon") is None
+    assert index.find("2024-03-14", 42.5, "Target") is None
+    assert index.find("not a date", 42.5, "Amazon") is None
+    stats = index.stats()
+    assert stats["exact_matches"] == 1
+    assert stats["near_matches"] == 1
+    assert stats["indexed_expenses"] == 3
+
+
+def test_add_indexes_new_expenses():
+    index = built_index()
+    index.add([{"date": "2024-03-20", "amount": 5, "vendor": "Uber"}])
+    assert index.find("2024-03-20", 5, "uber") == "exact"
+
+
+def test_matches_mask():
+    index = built_index()
+    mask = index.matches_mask(["2024-03-14", "2024-03-11", "2024-03-01"],
+                              [42.5, 9.99, 1.0],
+                              ["Amazon", "Netflix Inc", None])
+    assert mask.tolist() == [True, True, False]
+    assert mask.dtype == np.bool_
+
+
+def test_lookups_do_not_wait_for_the_build():
+    release = threading.Event()
+
+    def slow_source():
+        release.wait(5)
+        return LEDGER
+
+    index = DuplicateIndex(slow_source, window_days=1, refresh_seconds=3600)
+    # No index yet: the check is skipped rather than blocking on the scan
+    assert index.find("2024-03-14", 42.5, "Amazon") is None
+    assert index.stats()["building"]
+
+    index.add([{"date": "2024-03-20", "amount": 5, "vendor": "Uber"}])
+    release.set()
+    assert index.wait_until_built(5)
+    assert index.find("2024-03-14", 42.5, "Amazon") == "exact"
+    # Saved while the scan ran, so replayed into the new index
+    assert index.find("2024-03-20", 5, "Uber") == "exact"
+
+
+def test_rebuild_serves_previous_index():
+    rows = list(LEDGER)
+    index = built_index(rows)
+    rows.append({"date": "2024-04-01", "amount": 3, "vendor": "Lyft"})
+    index.refresh_seconds = 0
+
+    assert index.find("2024-03-14", 42.5, "Amazon") == "exact"
+    assert index.wait_until_built(5)
+    assert index.find("2024-04-01", 3, "Lyft") == "exact"
+
+
+def test_writes_from_other_processes_trigger_a_rebuild():
+    rows = list(LEDGER)
+    index = DuplicateIndex(lambda: list(rows), window_days=1, refresh_seconds=3600, signature=lambda: len(rows))
+    assert index.wait_until_current(5)
+
+    # Another process appended a row: the signature moved, so the next lookup rebuilds
+    rows.append({"date": "2024-04-01", "amount": 3, "vendor": "Lyft"})
+    assert index.wait_until_current(5)
+    assert index.find("2024-04-01", 3, "Lyft") == "exact"
+
+    # Our own saves are indexed directly and don't force a rebuild
+    rows.append({"date": "2024-04-02", "amount": 4, "vendor": "Uber"})
+    index.add(rows[-1:])
+    index.find("2024-04-02", 4, "Uber")
+    assert not index.stats()["building"]
+
+
+def test_wait_until_current_blocks_for_the_first_build():
+    release = threading.Event()
+
+    def slow_source():
+        release.wait(5)
+        return LEDGER
+
+    index = DuplicateIndex(slow_source, window_days=1, refresh_seconds=3600)
+    assert not index.wait_until_current(0.05)
+    release.set()
+    assert index.wait_until_current(5)
+    assert index.find("2024-03-14", 42.5, "Amazon") == "exact"
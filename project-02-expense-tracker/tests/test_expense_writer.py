@@ -0,0 +1,35 @@
+from expense_tracker.tools.expense_store import ExpenseStore
+from expense_tracker.tools.expense_writer import ExpenseWriter
+
+FIELDS = ["date", "amount", "vendor", "category", "description", "business_purpose", "notes", "created_at"]
+
+
+def make_writer(tmp_path, **kwargs):
+    expenses_file = tmp_path / "expenses.csv"
+    expenses_file.write_text(",".join(FIELDS) + "\n", encoding="utf-8")
+    store = ExpenseStore(expenses_file)
+    return ExpenseWriter(expenses_file, FIELDS, store, **kwargs), store
+
+
+def expense(vendor: str) -> dict:
+    return {"date": "2024-01-05", "amount": 12.5, "vendor": vendor, "category": "MEALS",
+            "description": "", "business_purpose": "", "notes": "", "created_at": vendor}
+
+
+def test_writes_reach_the_store(tmp_path):
+    writer, store = make_writer(tmp_path, fsync_policy="batch")
+    assert writer.write([expense("a"), expense("b")], timeout=5) == 2
+    assert [row["vendor"] for row in store.all()] == ["a", "b"]
+
+
+def test_store_update_failure_does_not_fail_the_write(tmp_path, monkeypatch):
+    writer, store = make_writer(tmp_path, fsync_policy="none")
+    store.all()
+
+    def broken(*args, **kwargs):
+        raise RuntimeError("index update failed")
+
+    monkeypatch.setattr(store, "apply_appends", broken)
+    assert writer.write([expense("a")], timeout=5) == 1
+    # The store reloads the file instead of serving the rows it missed
+    assert [row["vendor"] for row in store.all()] == ["a"]
@@ -0,0 +1,67 @@
+from datetime import date
+
+import pytest
+
+from expense_tracker.tools.fast_parser import FastExpenseParser
+from expense_tracker.tools.vendor_index import VendorCategoryIndex
+
+TODAY = date(2024, 3, 15)
+
+LEDGER = [
+    {"vendor": "Spotify", "category": "SOFTWARE", "description": "monthly plan"},
+    {"vendor": "Spotify", "category": "SOFTWARE", "description": "monthly plan"},
+    {"vendor": "Chipotle", "category": "MEALS", "description": "team lunch"},
+    {"vendor": "Chipotle", "category": "MEALS", "description": "team lunch"},
+]
+
+
+@pytest.fixture
+def parser():
+    return FastExpenseParser(VendorCategoryIndex(lambda: LEDGER), min_confidence=0.85)
+
+
+@pytest.fixture
+def seed_only_parser():
+    return FastExpenseParser(VendorCategoryIndex(lambda: []), min_confidence=0.85)
+
+
+def test_parses_ledger_vendor_mentioned_anywhere(parser):
+    record = parser.parse("$12 Spotify subscription", today=TODAY)
+    assert record["vendor"] == "Spotify"
+    assert record["category"] == "SOFTWARE"
+    assert record["amount"] == 12.0
+    assert record["date"] == "2024-03-15"
+
+
+def test_parses_seed_vendor_in_vendor_position(seed_only_parser):
+    record = seed_only_parser.parse("Coffee at Starbucks yesterday for $5.50", today=TODAY)
+    assert record["vendor"] == "Starbucks"
+    assert record["category"] == "MEALS"
+    assert record["date"] == "2024-03-14"
+
+
+@pytest.mark.parametrize("description", [
+    "Bought a zoom lens at Best Buy for $300",
+    "Shell scripting book at Barnes for $40",
+    "Delta faucet from Home Depot $120",
+])
+def test_unknown_named_vendor_goes_to_crew(parser, seed_only_parser, description):
+    assert parser.parse(description, today=TODAY) is None
+    assert seed_only_parser.parse(description, today=TODAY) is None
+
+
+def test_seed_word_in_free_text_is_not_a_vendor(seed_only_parser):
+    assert seed_only_parser.extract_vendor("zoom lens $300") is None
+    assert seed_only_parser.parse("zoom lens $300", today=TODAY) is None
+
+
+def test_explicit_vendor_wins_over_known_word(parser):
+    assert parser.extract_vendor("Spotify gift card at Target") == "Target"
+
+
+def test_ambiguous_amount_goes_to_crew(parser):
+    assert parser.parse("$12 Spotify and $15 Chipotle", today=TODAY) is None
+
+
+def test_unresolved_date_goes_to_crew(parser):
+    assert parser.parse("$12 Spotify subscription last month", today=TODAY) is None
@@ -0,0 +1,130 @@
+import asyncio
+import time
+
+import pytest
+
+from expense_tracker.jobs import (
+    COMPLETED, ERROR, PENDING, RUNNING, WORKER_LOST,
+    InMemoryJobBackend, JobWorkerPool, PermanentJobError, SQLiteJobBackend,
+)
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return InMemoryJobBackend()
+    return SQLiteJobBackend(tmp_path / "jobs.sqlite3")
+
+
+def test_claim_order_is_priority_then_age(backend):
+    low = backend.enqueue("process", {"n": 1})
+    high = backend.enqueue("process", {"n": 2}, priority=5)
+    backend.enqueue("import", {"n": 3}, priority=9)
+
+    claimed = backend.claim(["process"])
+    assert claimed["job_id"] == high["job_id"]
+    assert claimed["status"] == RUNNING
+    assert claimed["attempts"] == 1
+    assert backend.claim(["process"])["job_id"] == low["job_id"]
+    assert backend.claim(["process"]) is None
+
+
+def test_complete_and_fail(backend):
+    done = backend.enqueue("process", {})
+    failed = backend.enqueue("process", {})
+    backend.claim(["process"])
+    backend.claim(["process"])
+    backend.complete(done["job_id"], {"ok": True})
+    backend.fail(failed["job_id"], "boom")
+
+    assert backend.get(done["job_id"])["status"] == COMPLETED
+    assert backend.get(done["job_id"])["result"] == {"ok": True}
+    assert backend.get(failed["job_id"])["status"] == ERROR
+    assert backend.count((ERROR,)) == 1
+
+
+def test_retry_waits_for_backoff(backend):
+    job = backend.enqueue("process", {})
+    backend.claim(["process"])
+    backend.fail(job["job_id"], "flaky", retry_in=60)
+    assert backend.get(job["job_id"])["status"] == PENDING
+    assert backend.claim(["process"]) is None
+
+
+def test_recover_stale_requeues_jobs_with_attempts_left(backend):
+    job = backend.enqueue("process", {}, max_attempts=3)
+    backend.claim(["process"])
+    time.sleep(0.02)
+
+    assert backend.recover_stale(0.01) == 1
+    assert backend.get(job["job_id"])["status"] == PENDING
+
+
+def test_recover_stale_fails_jobs_on_their_last_attempt(backend):
+    job = backend.enqueue("import", {}, max_attempts=1)
+    backend.claim(["import"])
+    time.sleep(0.02)
+
+    assert backend.recover_stale(0.01) == 1
+    recovered = backend.get(job["job_id"])
+    assert recovered["status"] == ERROR
+    assert recovered["error"] == WORKER_LOST
+    assert backend.claim(["import"]) is None
+
+
+def test_recover_stale_keeps_live_leases(backend):
+    job = backend.enqueue("process", {})
+    backend.claim(["process"])
+    assert backend.recover_stale(60) == 0
+    assert backend.get(job["job_id"])["status"] == RUNNING
+
+
+def test_cleanup_removes_old_finished_jobs(backend):
+    job = backend.enqueue("process", {})
+    backend.claim(["process"])
+    backend.complete(job["job_id"], {})
+    time.sleep(0.02)
+    assert backend.cleanup(0.01) == 1
+    assert backend.get(job["job_id"]) is None
+
+
+def run_pool(backend, handlers, until):
+    async def main():
+        pool = JobWorkerPool(backend, handlers, workers=2, poll_interval=0.01, retry_backoff=0.01)
+        await pool.start()
+        try:
+            for _ in range(500):
+                if until():
+                    return
+                await asyncio.sleep(0.01)
+            raise AssertionError("jobs didn't finish")
+        finally:
+            await pool.stop()
+
+    asyncio.run(main())
+
+
+def test_pool_retries_until_success(backend):
+    calls = []
+
+    async def flaky(job, report_progress):
+        calls.append(job["attempts"])
+        report_progress({"attempt": job["attempts"]})
+        if job["attempts"] < 2:
+            raise RuntimeError("flaky")
+        return {"attempts": job["attempts"]}
+
+    job = backend.enqueue("process", {}, max_attempts=3)
+    run_pool(backend, {"process": flaky}, lambda: backend.get(job["job_id"])["status"] == COMPLETED)
+    assert calls == [1, 2]
+    assert backend.get(job["job_id"])["result"] == {"attempts": 2}
+
+
+def test_pool_does_not_retry_permanent_errors(backend):
+    async def broken(job, report_progress):
+        raise PermanentJobError("bad input")
+
+    job = backend.enqueue("process", {}, max_attempts=3)
+    run_pool(backend, {"process": broken}, lambda: backend.get(job["job_id"])["status"] == ERROR)
+    assert backend.get(job["job_id"])["attempts"] == 1
+    assert backend.get(job["job_id"])["error"] == "bad input"
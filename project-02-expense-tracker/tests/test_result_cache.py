@@ -0,0 +1,92 @@
+from datetime import date
+
+import pytest
+
+from expense_tracker.tools.result_cache import (
+    ExpenseResultCache, get_result_cache, normalize_description, relative_dates,
+)
+from expense_tracker.tools.tenants import current_tenant
+
+CACHED_ON = date(2024, 3, 15)
+LATER = date(2024, 3, 20)
+
+
+def record(day: str) -> dict:
+    return {"date": day, "amount": 5.5, "vendor": "Starbucks", "category": "MEALS", "created_at": "x"}
+
+
+@pytest.fixture
+def cache():
+    return ExpenseResultCache(max_entries=10, ttl_seconds=3600, similarity_threshold=0.8)
+
+
+@pytest.mark.parametrize("description", [
+    "Coffee at Starbucks yesterday $5.50",
+    "Coffee at Starbucks last Friday $5.50",
+    "Coffee at Starbucks 3 days ago $5.50",
+    "Coffee at Starbucks $5.50",
+])
+def test_relative_descriptions(description):
+    assert relative_dates(description)
+
+
+@pytest.mark.parametrize("description", [
+    "Coffee at Starbucks on 2024-03-14 $5.50",
+    "Coffee at Starbucks 3/14 $5.50",
+    "Coffee at Starbucks January 5 $5.50",
+    "Coffee at Starbucks Jan 5th $5.50",
+    "Coffee at Starbucks 5th of March $5.50",
+    "Coffee at Starbucks on Friday $5.50",
+])
+def test_absolute_descriptions(description):
+    assert not relative_dates(description)
+
+
+def test_relative_record_is_shifted(cache):
+    cache.put("Coffee at Starbucks yesterday $5.50", record("2024-03-14"), today=CACHED_ON)
+    hit = cache.get("Coffee at Starbucks yesterday $5.50", today=LATER)
+    assert hit["date"] == "2024-03-19"
+    assert hit["cache"] == "exact"
+
+
+def test_month_name_record_is_not_shifted(cache):
+    cache.put("Coffee at Starbucks Jan 5th $5.50", record("2024-01-05"), today=CACHED_ON)
+    assert cache.get("Coffee at Starbucks Jan 5th $5.50", today=LATER)["date"] == "2024-01-05"
+
+
+def test_similar_description_hits(cache):
+    cache.put("Coffee at Starbucks downtown $5.50", record("2024-03-15"), today=CACHED_ON)
+    hit = cache.get("coffee at starbucks downtown $5.50!", today=CACHED_ON)
+    assert hit is not None
+    assert "created_at" in hit and hit["created_at"] != "x"
+
+
+def test_different_amount_misses(cache):
+    cache.put("Coffee at Starbucks downtown $5.50", record("2024-03-15"), today=CACHED_ON)
+    assert cache.get("Coffee at Starbucks downtown $6.50", today=CACHED_ON) is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_error_records_are_not_cached(cache):
+    cache.put("Coffee $5", {"error": "boom"})
+    assert cache.stats()["entries"] == 0
+
+
+def test_lru_eviction():
+    cache = ExpenseResultCache(max_entries=2, ttl_seconds=3600, similarity_threshold=0.8)
+    for amount in (1, 2, 3):
+        cache.put(f"Taxi ride ${amount}", record("2024-03-15"), today=CACHED_ON)
+    assert cache.stats()["entries"] == 2
+    assert cache.stats()["evictions"] == 1
+    assert normalize_description("Taxi ride $1") not in cache._entries
+
+
+def test_caches_are_per_tenant():
+    shared = get_result_cache()
+    token = current_tenant.set("acme")
+    try:
+        assert get_result_cache() is get_result_cache("acme")
+        assert get_result_cache() is not get_result_cache("globex")
+        assert get_result_cache() is not shared
+    finally:
+        current_tenant.reset(token)
@@ -0,0 +1,45 @@
+import threading
+
+from expense_tracker.tools.rollups import MonthlyRollup
+
+ROWS = [
+    {"date": "2024-01-05", "amount": "12.5", "category": "MEALS"},
+    {"date": "2024-01-20", "amount": "7.5", "category": "MEALS"},
+    {"date": "", "amount": "3", "category": "OTHER"},
+]
+
+
+def test_save_and_load(tmp_path):
+    rollup = MonthlyRollup(tmp_path / "expenses_rollups.json", tmp_path / "expenses.csv.lock")
+    rollup.rebuild(ROWS, (1, 2))
+    rollup.save()
+
+    loaded = MonthlyRollup(tmp_path / "expenses_rollups.json")
+    assert loaded.load()
+    assert loaded.signature == (1, 2)
+    assert loaded.month(2024, 1)["MEALS"]["count"] == 2
+    assert loaded.all_time()["OTHER"]["total"] == 3.0
+
+
+def test_concurrent_saves_use_their_own_temp_files(tmp_path):
+    rollups = [MonthlyRollup(tmp_path / "expenses_rollups.json", tmp_path / "expenses.csv.lock") for _ in range(4)]
+    for signature, rollup in enumerate(rollups):
+        rollup.rebuild(ROWS, (signature, 0))
+    errors = []
+
+    def save(rollup):
+        try:
+            for _ in range(20):
+                rollup.save()
+        except OSError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=save, args=(rollup,)) for rollup in rollups]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not errors
+    assert MonthlyRollup(tmp_path / "expenses_rollups.json").load()
+    assert not list(tmp_path.glob("*.tmp"))
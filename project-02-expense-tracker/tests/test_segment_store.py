@@ -0,0 +1,141 @@
+import multiprocessing
+
+from expense_tracker.tools.segment_store import SegmentStore, read_generation
+
+
+def expense(day: str, amount: float, created_at: str, category: str = "MEALS") -> dict:
+    return {"date": day, "amount": amount, "vendor": "Cafe", "category": category, "created_at": created_at}
+
+
+def test_scan_filters_and_sorts(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append_many([
+        expense("2024-02-03", 3, "c"),
+        expense("2024-01-15", 1, "a", category="TRAVEL"),
+        expense("", 9, "z"),
+        expense("2024-01-20", 2, "b"),
+    ])
+    assert [row["created_at"] for row in store.scan()] == ["z", "a", "b", "c"]
+    assert [row["created_at"] for row in store.scan("2024-01-01", "2024-01-31")] == ["a", "b"]
+    assert [row["created_at"] for row in store.scan(category="travel")] == ["a"]
+    assert store.count() == 4
+
+
+def test_iter_scan_matches_scan(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append_many([expense(f"2024-0{1 + i % 3}-1{i % 9}", i, f"r{i:02d}") for i in range(12)])
+    store.compact()
+    store.append_many([expense("2024-02-01", 1, "late"), expense("", 2, "undated")])
+
+    created = [row["created_at"] for row in store.iter_scan()]
+    assert created == [row["created_at"] for row in store.scan()]
+    assert [row["created_at"] for row in store.iter_scan("2024-02-01", "2024-02-29")] == \
+        [row["created_at"] for row in store.scan("2024-02-01", "2024-02-29")]
+
+    # A compaction partway through neither drops nor repeats write-ahead records
+    rows = store.iter_scan()
+    first = next(rows)
+    store.compact()
+    assert [first["created_at"]] + [row["created_at"] for row in rows] == created
+
+
+def test_compaction_keeps_every_record(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append_many([expense("2024-01-15", 1, "a"), expense("2024-02-01", 2, "b")])
+    assert store.compact() == 1
+    store.append(expense("2024-01-10", 3, "c"))
+
+    assert [row["created_at"] for row in store.scan()] == ["c", "a", "b"]
+    assert read_generation(tmp_path / "part-2024-01.seg") == 1
+    assert store.stats()["partitions"] == 2
+
+
+def test_reopen_recovers_torn_tail(tmp_path):
+    SegmentStore(tmp_path, compact_threshold=1000).append(expense("2024-01-15", 1, "a"))
+    wal = next(tmp_path.glob("wal-*.seg"))
+    with open(wal, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append(expense("2024-01-16", 2, "b"))
+    assert [row["created_at"] for row in store.scan()] == ["a", "b"]
+
+
+def test_append_trims_a_torn_tail_left_by_another_process(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append(expense("2024-01-15", 1, "a"))
+    # Another process appended, then crashed halfway through its next record
+    other = SegmentStore(tmp_path, compact_threshold=1000)
+    other.append(expense("2024-01-16", 2, "b"))
+    wal = next(tmp_path.glob("wal-*.seg"))
+    with open(wal, "ab") as f:
+        f.write(b"\x01\x02\x03")
+
+    store.append(expense("2024-01-17", 3, "c"))
+    assert [row["created_at"] for row in SegmentStore(tmp_path, compact_threshold=1000).scan()] == ["a", "b", "c"]
+    assert store.stats()["active_segment_records"] == 3
+
+
+def _append_from_process(directory: str, worker: int) -> None:
+    store = SegmentStore(directory, compact_threshold=25)
+    for i in range(100):
+        store.append(expense(f"2024-0{1 + i % 3}-1{worker}", i, f"{worker}-{i:03d}"))
+    store.compact()
+
+
+def test_processes_sharing_a_directory_lose_nothing(tmp_path):
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=_append_from_process, args=(str(tmp_path), worker)) for worker in range(3)]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    store = SegmentStore(tmp_path)
+    store.compact()
+    created = [row["created_at"] for row in store.scan()]
+    assert len(created) == len(set(created)) == 300
+    assert store.count() == 300
+
+
+def read_pages(store, sort_by, descending=False, limit=3, **filters):
+    keys, after = [], None
+    while True:
+        page = store.page(sort_by, descending, after, limit, **filters)
+        keys.extend(record["created_at"] for _, record in page[:limit])
+        if len(page) <= limit:
+            return keys
+        after = page[limit - 1][0]
+
+
+def test_pages_seek_through_every_sort(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append_many([expense(f"2024-0{1 + i % 3}-{10 + i % 7}", (i * 7) % 11, f"r{i:02d}",
+                               category="TRAVEL" if i % 4 == 0 else "MEALS") for i in range(20)])
+    store.compact()
+    store.append_many([expense("2024-02-01", 3, "late"), expense("", 1, "undated")])
+
+    rows = store.scan()
+    by_date = [row["created_at"] for row in sorted(rows, key=lambda row: (row["date"], row["created_at"]))]
+    assert read_pages(store, "date") == by_date
+    assert read_pages(store, "date", descending=True) == by_date[::-1]
+    by_amount = [row["created_at"] for row in sorted(rows, key=lambda row: (row["amount"], row["created_at"]))]
+    assert read_pages(store, "amount", limit=4) == by_amount
+
+    in_february = [row["created_at"] for row in store.scan("2024-02-01", "2024-02-29", "travel")]
+    assert read_pages(store, "date", start_date="2024-02-01", end_date="2024-02-29", category="travel") == in_february
+
+
+def test_page_sees_appends_after_the_index_is_built(tmp_path):
+    store = SegmentStore(tmp_path, compact_threshold=1000)
+    store.append_many([expense("2024-01-05", 1, "a"), expense("2024-01-07", 2, "c")])
+    first = store.page("date", False, None, 1)
+    assert [record["created_at"] for _, record in first] == ["a", "c"]
+
+    store.append(expense("2024-01-06", 3, "b"))
+    rest = store.page("date", False, first[0][0], 10)
+    assert [record["created_at"] for _, record in rest] == ["b", "c"]
+
+    store.compact()
+    assert [record["created_at"] for _, record in store.page("date", True, None, None)] == ["c", "b", "a"]
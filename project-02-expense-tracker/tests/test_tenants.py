@@ -0,0 +1,33 @@
+import pytest
+
+from expense_tracker.tools.tenants import TenantCatalog, UnknownTenantError
+
+
+def test_unregistered_tenants_are_rejected(tmp_path):
+    catalog = TenantCatalog(tmp_path)
+    with pytest.raises(UnknownTenantError):
+        catalog.shard_dir("acme")
+    assert not (tmp_path / "tenants").exists()
+
+    shard = catalog.register("acme")
+    assert catalog.shard_dir("acme") == shard
+    assert shard.is_dir()
+
+
+def test_registrations_from_other_workers_are_seen(tmp_path):
+    catalog = TenantCatalog(tmp_path)
+    assert not catalog.is_registered("acme")
+    TenantCatalog(tmp_path).register("acme")
+    assert catalog.is_registered("acme")
+
+
+def test_auto_registration(tmp_path, monkeypatch):
+    monkeypatch.setenv("EXPENSE_TENANT_AUTO_REGISTER", "true")
+    catalog = TenantCatalog(tmp_path)
+    assert catalog.shard_dir("globex").is_dir()
+    assert "globex" in TenantCatalog(tmp_path).tenants()
+
+
+def test_invalid_ids_are_rejected(tmp_path):
+    with pytest.raises(ValueError):
+        TenantCatalog(tmp_path).register("../etc")